@@ -0,0 +1,136 @@
+"""
+Benchmark da inicialização do dashboard.
+
+Mede, sempre em processos novos (cache de imports frio):
+    - o tempo de import de cada view e das bibliotecas pesadas;
+    - o tempo até a primeira pintura (primeiro elemento enviado pelo main.py) e
+      até o fim da primeira execução do script, com o Streamlit já carregado,
+      como acontece na primeira sessão de um servidor recém-iniciado;
+    - o tempo até o modelo ficar pronto pelo aquecimento em segundo plano.
+
+Uso:
+    python benchmarks/bench_inicializacao.py
+    python benchmarks/bench_inicializacao.py --repeticoes 5 --comparar benchmarks/resultados/<anterior>.json
+"""
+import os
+import sys
+import json
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+
+from bench_pipeline import RAIZ, PASTA_RESULTADOS, comparar, _commit_atual
+
+MODULOS = [
+    'pandas',
+    'plotly.express',
+    'sklearn.decomposition',
+    'views.visualizacao_estatistica',
+    'views.coorte',
+    'views.ml_teste',
+]
+
+CODIGO_IMPORT = """
+import sys, time
+sys.path.insert(0, {raiz!r})
+import streamlit
+inicio = time.perf_counter()
+import {modulo}
+print(time.perf_counter() - inicio)
+"""
+
+CODIGO_PRIMEIRA_PINTURA = """
+import sys, json, time
+sys.path.insert(0, {raiz!r})
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+marcas = {{}}
+titulo_original = st.title
+def titulo(*args, **kwargs):
+    marcas.setdefault('primeira_pintura', time.perf_counter() - inicio)
+    return titulo_original(*args, **kwargs)
+st.title = titulo
+
+app = AppTest.from_file({main!r}, default_timeout=600)
+inicio = time.perf_counter()
+app.run()
+marcas['primeira_execucao'] = time.perf_counter() - inicio
+marcas['sklearn_carregado'] = 'sklearn' in sys.modules
+
+from utils import aquecimento
+thread = aquecimento._threads.get('modelo')
+if thread is not None:
+    thread.join()
+    marcas['modelo_pronto'] = time.perf_counter() - inicio
+print(json.dumps(marcas))
+"""
+
+
+def _executar(codigo, aquecimento=False):
+    ambiente = {**os.environ, 'DASHBOARD_AQUECIMENTO': '1' if aquecimento else '0'}
+    saida = subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, env=ambiente,
+                           capture_output=True, text=True, check=True).stdout
+    return saida.strip().splitlines()[-1]
+
+
+def medir_importacoes(medicoes, repeticoes):
+    print("Imports (processo novo, após `import streamlit`)")
+    for modulo in MODULOS:
+        tempos = [float(_executar(CODIGO_IMPORT.format(raiz=RAIZ, modulo=modulo))) for _ in range(repeticoes)]
+        tempo = statistics.median(tempos)
+        print(f"  {'import ' + modulo:<45} {tempo * 1000:>10.1f} ms", flush=True)
+        medicoes.append({'etapa': f'import {modulo}', 'tempo_s': round(tempo, 6)})
+
+
+def medir_primeira_pintura(medicoes, repeticoes):
+    print("Primeira execução do main.py (processo novo)")
+    codigo = CODIGO_PRIMEIRA_PINTURA.format(raiz=RAIZ, main=os.path.join(RAIZ, 'main.py'))
+
+    execucoes = [json.loads(_executar(codigo)) for _ in range(repeticoes)]
+    for marca in ('primeira_pintura', 'primeira_execucao'):
+        tempo = statistics.median(e[marca] for e in execucoes)
+        print(f"  {marca:<45} {tempo * 1000:>10.1f} ms", flush=True)
+        medicoes.append({'etapa': marca, 'tempo_s': round(tempo, 6)})
+    print(f"  {'scikit-learn carregado sem análise':<45} {'sim' if execucoes[0]['sklearn_carregado'] else 'não':>10}")
+
+    aquecida = json.loads(_executar(codigo, aquecimento=True))
+    if 'modelo_pronto' in aquecida:
+        print(f"  {'modelo_pronto (aquecimento)':<45} {aquecida['modelo_pronto'] * 1000:>10.1f} ms", flush=True)
+        medicoes.append({'etapa': 'modelo_pronto', 'tempo_s': round(aquecida['modelo_pronto'], 6)})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da inicialização do dashboard.")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Processos por medição (usa a mediana)")
+    parser.add_argument("--comparar", help="Arquivo de resultados anterior para comparação")
+    args = parser.parse_args(argv)
+
+    medicoes = []
+    medir_importacoes(medicoes, args.repeticoes)
+    medir_primeira_pintura(medicoes, args.repeticoes)
+
+    resultado = {
+        'commit': _commit_atual(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'maquina': platform.machine(),
+        'cpus': os.cpu_count(),
+        'medicoes': medicoes,
+    }
+    os.makedirs(PASTA_RESULTADOS, exist_ok=True)
+    caminho = os.path.join(PASTA_RESULTADOS,
+                           f"inicializacao_{datetime.now():%Y%m%d-%H%M%S}_{resultado['commit']}.json")
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados gravados em {caminho}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            comparar(resultado, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Benchmark das etapas de processamento e do pipeline de ML.
+
+Mede tempo e pico de memória (tracemalloc) de cada etapa com os CSVs reais de
+treino/ e com sessões sintéticas no mesmo esquema, em escalas crescentes.
+Os resultados são gravados em benchmarks/resultados/ para comparação entre commits.
+
+Uso:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --tamanhos 10000 100000 1000000 --pacientes 50
+    python benchmarks/bench_pipeline.py --comparar benchmarks/resultados/<anterior>.json
+"""
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from utils.base_treino import carregar_base_treino  # noqa: E402
+from utils.processamento import (calcular_frames_por_segundo, calcular_tempos_picos,  # noqa: E402
+                                 plot_intervalos_picos)
+from views import ml_teste  # noqa: E402
+
+PASTA_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+PASTA_TREINO = os.path.join(RAIZ, "treino")
+
+COLUNAS_CSV = [
+    'time', 'ballX', 'ballY',
+    'shoulderLangle', 'shoulderRangle', 'shoulderLTransv', 'shoulderRTransv',
+    'elbowLangle', 'elbowRangle', 'hipLangle', 'hipRangle', 'kneeLangle', 'kneeRangle',
+] + [f'{lado}_{parte}{eixo}'
+     for parte in ('shoulder', 'elbow', 'wrist', 'hip', 'knee', 'ankle')
+     for lado in ('l', 'r')
+     for eixo in 'XYZ']
+
+# Faixa típica (mínimo, amplitude) de cada ângulo nos dados reais
+FAIXAS_ANGULOS = {
+    'shoulderLangle': (15, 60), 'shoulderRangle': (15, 60),
+    'shoulderLTransv': (0, 30), 'shoulderRTransv': (0, 30),
+    'elbowLangle': (40, 60), 'elbowRangle': (40, 60),
+    'hipLangle': (5, 40), 'hipRangle': (5, 40),
+    'kneeLangle': (20, 40), 'kneeRangle': (20, 40),
+}
+
+
+def gerar_sessao(n_frames, fps=25, semente=0):
+    """
+    Sintetiza uma sessão com o mesmo esquema dos CSVs de captura: tempo HHMMSS,
+    ângulos inteiros com movimentos periódicos e ruído, e coordenadas xyz.
+    """
+    rng = np.random.default_rng(semente)
+    segundos = 8 * 3600 + np.arange(n_frames) // fps
+    tempo = (segundos // 3600) * 10000 + (segundos // 60 % 60) * 100 + segundos % 60
+
+    t = np.arange(n_frames) / fps
+    dados = {'time': tempo.astype(np.int32)}
+    dados['ballX'] = rng.normal(0, 5, n_frames).round(3)
+    dados['ballY'] = rng.normal(-12, 1, n_frames).round(3)
+    for i, (coluna, (minimo, amplitude)) in enumerate(FAIXAS_ANGULOS.items()):
+        periodo = rng.uniform(6, 14)
+        onda = np.clip(np.sin(2 * np.pi * t / periodo + i), 0, None) ** 2
+        dados[coluna] = (minimo + amplitude * onda + rng.normal(0, 3, n_frames)).clip(0, 179).astype(np.int16)
+    for coluna in COLUNAS_CSV[13:]:
+        dados[coluna] = rng.normal(0, 0.3, n_frames).round(3)
+    return pd.DataFrame(dados, columns=COLUNAS_CSV)
+
+
+def medir(nome, funcao, *args, **kwargs):
+    """
+    Executa `funcao` medindo tempo de parede e pico de memória alocada.
+
+    Retorna:
+        resultado da função, dict com a medição.
+    """
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcao(*args, **kwargs)
+    tempo = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    medicao = {'etapa': nome, 'tempo_s': round(tempo, 6), 'pico_memoria_mb': round(pico / 2 ** 20, 3)}
+    print(f"  {nome:<45} {tempo * 1000:>10.1f} ms {pico / 2 ** 20:>10.1f} MiB", flush=True)
+    return resultado, medicao
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+
+def bench_treino(medicoes, pasta_temporaria, pacientes, frames_por_paciente):
+    colunas = ml_teste.COLUNAS_MODELO
+    print(f"Corpus real ({PASTA_TREINO})")
+    base = os.path.join(pasta_temporaria, "base_real")
+    carregar_base_treino(PASTA_TREINO, colunas, base)
+    _, m = medir("carregar_dados_treino[real, base pronta]", carregar_base_treino, PASTA_TREINO, colunas, base)
+    medicoes.append(m)
+    dados_reais, m = medir("carregar_dados_treino[real, sem base]", carregar_base_treino, PASTA_TREINO, colunas,
+                           os.path.join(pasta_temporaria, "base_real_fria"))
+    medicoes.append(m)
+    pipeline, m = medir("treinar_modelo[real]", ml_teste.treinar_modelo, dados_reais)
+    medicoes.append(m)
+
+    print(f"Corpus sintético ({pacientes} pacientes x {frames_por_paciente} frames)")
+    pasta_corpus = os.path.join(pasta_temporaria, "corpus")
+    os.makedirs(pasta_corpus, exist_ok=True)
+    for paciente in range(pacientes):
+        gerar_sessao(frames_por_paciente, semente=paciente).to_csv(
+            os.path.join(pasta_corpus, f"P{paciente:04d}.csv"), index=False)
+    dados_corpus, m = medir(f"carregar_dados_treino[{pacientes} pacientes, sem base]", carregar_base_treino,
+                            pasta_corpus, colunas, os.path.join(pasta_temporaria, "base_corpus"))
+    medicoes.append(m)
+    _, m = medir(f"carregar_dados_treino[{pacientes} pacientes, base pronta]", carregar_base_treino,
+                 pasta_corpus, colunas, os.path.join(pasta_temporaria, "base_corpus"))
+    medicoes.append(m)
+    _, m = medir(f"treinar_modelo[{pacientes} pacientes]", ml_teste.treinar_modelo, dados_corpus)
+    medicoes.append(m)
+    return pipeline
+
+
+def bench_sessao(medicoes, n_frames, pipeline, sufixo):
+    df = gerar_sessao(n_frames)
+    fps, m = medir(f"calcular_frames_por_segundo[{sufixo}]", calcular_frames_por_segundo, df, 'time')
+    medicoes.append(m)
+    (picos, _, _), m = medir(f"calcular_tempos_picos[{sufixo}]", calcular_tempos_picos,
+                             df['shoulderLangle'], fps, 35, 2)
+    medicoes.append(m)
+    tempo = np.arange(len(df)) / fps
+    _, m = medir(f"plot_intervalos_picos[{sufixo}]", plot_intervalos_picos,
+                 tempo, df['shoulderLangle'], 35, picos)
+    medicoes.append(m)
+
+    scaler, pca, modelo = pipeline
+    dados = df[ml_teste.COLUNAS_MODELO]
+    (_, clusters), m = medir(f"aplicar_modelo[{sufixo}]", ml_teste.aplicar_modelo, dados, scaler, pca, modelo)
+    medicoes.append(m)
+    _, m = medir(f"identificar_outliers[{sufixo}]", ml_teste.identificar_outliers, dados, clusters, fps)
+    medicoes.append(m)
+
+
+def comparar(atual, anterior):
+    referencia = {m['etapa']: m for m in anterior['medicoes']}
+    print(f"\nComparação com {anterior['commit']} ({anterior['data']}):")
+    for m in atual['medicoes']:
+        antes = referencia.get(m['etapa'])
+        if antes is None or antes['tempo_s'] == 0:
+            continue
+        razao = m['tempo_s'] / antes['tempo_s']
+        print(f"  {m['etapa']:<45} {antes['tempo_s'] * 1000:>10.1f} -> {m['tempo_s'] * 1000:>10.1f} ms "
+              f"({razao:.2f}x)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do processamento e do pipeline de ML.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="Frames das sessões sintéticas")
+    parser.add_argument("--pacientes", type=int, default=20, help="Pacientes do corpus sintético de treino")
+    parser.add_argument("--frames-por-paciente", type=int, default=5_000)
+    parser.add_argument("--comparar", help="Arquivo de resultados anterior para comparação")
+    args = parser.parse_args(argv)
+
+    medicoes = []
+    with tempfile.TemporaryDirectory() as pasta_temporaria:
+        pipeline = bench_treino(medicoes, pasta_temporaria, args.pacientes, args.frames_por_paciente)
+
+        print("Sessões reais")
+        for arquivo in sorted(os.listdir(PASTA_TREINO))[:1]:
+            df = pd.read_csv(os.path.join(PASTA_TREINO, arquivo))
+            _, m = medir(f"calcular_frames_por_segundo[real {len(df)}]", calcular_frames_por_segundo, df, 'time')
+            medicoes.append(m)
+
+        for n_frames in args.tamanhos:
+            print(f"Sessão sintética com {n_frames} frames")
+            bench_sessao(medicoes, n_frames, pipeline, f"{n_frames}")
+
+    resultado = {
+        'commit': _commit_atual(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'maquina': platform.machine(),
+        'cpus': os.cpu_count(),
+        'medicoes': medicoes,
+    }
+    os.makedirs(PASTA_RESULTADOS, exist_ok=True)
+    caminho = os.path.join(PASTA_RESULTADOS, f"{datetime.now():%Y%m%d-%H%M%S}_{resultado['commit']}.json")
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados gravados em {caminho}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            comparar(resultado, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Processamento em lote (sem interface) de uma pasta de sessões capturadas.
+
+Cada CSV é processado em um processo separado e gera, na pasta de saída:
+    <sessao>.json     resumo (FPS, durações, níveis, clusters e episódios fora do padrão)
+    <sessao>.parquet  rótulo de cluster e coordenadas PCA de cada frame
+
+Uso:
+    python lote.py pasta_sessoes --saida resultados --workers 8
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from glob import glob
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from utils.sessao import Sessao
+from utils.processamento import calcular_tempos_picos, classificar
+from utils.base_treino import hash_arquivo
+from utils.indice_sessoes import indexar_sessao
+from views import ml_teste
+
+logger = logging.getLogger(__name__)
+
+LIMIAR_PADRAO = 35.0
+TEMPO_INICIAL_PADRAO = 2
+
+# Pipeline treinado, carregado uma vez por processo trabalhador
+_pipeline = None
+
+
+def _iniciar_trabalhador(pasta_treino):
+    global _pipeline
+    _pipeline = ml_teste.carregar_ou_treinar_modelo(pasta_treino, ml_teste.COLUNAS_MODELO)
+
+
+def processar_sessao(arquivo, pasta_saida, limiar=LIMIAR_PADRAO, tempo_inicial=TEMPO_INICIAL_PADRAO):
+    """
+    Processa um CSV de sessão e grava o resumo (JSON) e os rótulos por frame (Parquet).
+
+    Retorna:
+        dict: Nome da sessão, frames processados e caminho do resumo.
+    """
+    nome = os.path.splitext(os.path.basename(arquivo))[0]
+    sessao, _ = Sessao.de_csv(arquivo, ml_teste.COLUNAS_MODELO)
+    info_fps = sessao.info_fps
+    fps = sessao.fps
+
+    resumo = {
+        'sessao': nome,
+        'arquivo': os.path.abspath(arquivo),
+        'frames': len(sessao),
+        'fps_mediana': fps,
+        'quadros_perdidos': info_fps['quadros_perdidos'] if info_fps else None,
+        'duracao_total': len(sessao) / fps if fps else None,
+        'limiar': limiar,
+        'ombros': {},
+    }
+
+    # Sem a coluna `time` não há FPS para medir a duração dos movimentos
+    if not fps:
+        logger.warning(f"{arquivo} sem a coluna time: durações dos movimentos não calculadas.")
+    for coluna in ('shoulderLangle', 'shoulderRangle') if fps else ():
+        _, duracoes, media = calcular_tempos_picos(sessao[coluna], fps, limiar, tempo_inicial)
+        niveis = classificar(duracoes)
+        resumo['ombros'][coluna] = {
+            'duracoes': [round(float(d), 3) for d in duracoes],
+            'duracao_media': media,
+            'niveis': {nivel: niveis.count(nivel) for nivel in ('Nível 1', 'Nível 2', 'Nível 3')},
+        }
+
+    dados = sessao.quadro(ml_teste.COLUNAS_MODELO).dropna()
+    pontos = ml_teste.preparar_pontos(dados)
+    clusters = None
+    if _pipeline is not None and not pontos.empty:
+        scaler, pca, modelo = _pipeline
+        dados_pca, clusters = ml_teste.aplicar_modelo(pontos, scaler, pca, modelo)
+        # Rótulos e coordenadas por frame (no modo por janelas, os da janela que contém o frame)
+        ponto_do_frame = ml_teste.indice_ponto_por_frame(len(dados))
+        clusters, dados_pca = clusters[ponto_do_frame], dados_pca[ponto_do_frame]
+        episodios, _ = ml_teste.identificar_outliers(dados, clusters, fps)
+
+        rotulos, contagens = np.unique(clusters, return_counts=True)
+        resumo['clusters'] = {str(r): round(float(c) / len(clusters), 4) for r, c in zip(rotulos, contagens)}
+        resumo['episodios_fora_do_padrao'] = json.loads(episodios.to_json(orient='records'))
+
+        frames = dados.index.to_numpy()
+        por_frame = {'frame': frames}
+        if sessao.tempo is not None:
+            por_frame['time'] = sessao.tempo[frames]
+        pd.DataFrame({
+            **por_frame,
+            'cluster': clusters.astype(np.int16),
+            'PCA1': dados_pca[:, 0].astype(np.float32),
+            'PCA2': dados_pca[:, 1].astype(np.float32),
+        }).to_parquet(os.path.join(pasta_saida, f"{nome}.parquet"), index=False)
+
+    indexar_sessao(sessao, arquivo, hash_arquivo(arquivo), clusters)
+
+    caminho = os.path.join(pasta_saida, f"{nome}.json")
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(resumo, f, ensure_ascii=False, indent=2)
+
+    return {'sessao': nome, 'frames': len(sessao), 'resumo': caminho}
+
+
+def _barra_progresso(concluidos, total, frames, inicio, largura=30):
+    decorrido = max(time.perf_counter() - inicio, 1e-9)
+    cheio = int(largura * concluidos / total) if total else largura
+    sys.stderr.write(
+        f"\r[{'#' * cheio}{'.' * (largura - cheio)}] {concluidos}/{total} sessões "
+        f"| {concluidos / decorrido:.2f} sessões/s | {frames / decorrido:,.0f} frames/s"
+    )
+    sys.stderr.flush()
+
+
+def processar_pasta(pasta_sessoes, pasta_saida, pasta_treino="treino", workers=None,
+                    limiar=LIMIAR_PADRAO, tempo_inicial=TEMPO_INICIAL_PADRAO):
+    """
+    Processa todos os CSVs de uma pasta em paralelo, um processo por sessão.
+
+    Retorna:
+        dict: Sessões processadas, falhas e estatísticas de vazão.
+    """
+    arquivos = sorted(glob(os.path.join(pasta_sessoes, "*.csv")))
+    os.makedirs(pasta_saida, exist_ok=True)
+
+    # Treina (ou aquece o cache em disco) antes de abrir o pool
+    ml_teste.carregar_ou_treinar_modelo(pasta_treino, ml_teste.COLUNAS_MODELO)
+
+    inicio = time.perf_counter()
+    processadas, falhas, frames = [], [], 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_trabalhador,
+                             initargs=(pasta_treino,)) as pool:
+        futuros = {pool.submit(processar_sessao, arquivo, pasta_saida, limiar, tempo_inicial): arquivo
+                   for arquivo in arquivos}
+        _barra_progresso(0, len(arquivos), 0, inicio)
+        for futuro in as_completed(futuros):
+            try:
+                resultado = futuro.result()
+                processadas.append(resultado)
+                frames += resultado['frames']
+            except Exception as e:
+                logger.error(f"Erro ao processar {futuros[futuro]}: {e}")
+                falhas.append(futuros[futuro])
+            _barra_progresso(len(processadas) + len(falhas), len(arquivos), frames, inicio)
+    sys.stderr.write("\n")
+
+    decorrido = time.perf_counter() - inicio
+    return {
+        'sessoes': len(processadas),
+        'falhas': falhas,
+        'frames': frames,
+        'tempo': decorrido,
+        'sessoes_por_segundo': len(processadas) / decorrido if decorrido else 0.0,
+        'frames_por_segundo': frames / decorrido if decorrido else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Processamento em lote de sessões de reabilitação.")
+    parser.add_argument("pasta_sessoes", help="Pasta com os CSVs das sessões")
+    parser.add_argument("--saida", default="resultados", help="Pasta onde os resultados serão gravados")
+    parser.add_argument("--treino", default="treino", help="Pasta com os CSVs de treino do modelo")
+    parser.add_argument("--workers", type=int, default=None, help="Processos em paralelo (padrão: núcleos da CPU)")
+    parser.add_argument("--limiar", type=float, default=LIMIAR_PADRAO, help="Limiar de amplitude dos ombros (graus)")
+    parser.add_argument("--tempo-inicial", type=float, default=TEMPO_INICIAL_PADRAO,
+                        help="Segundos iniciais ignorados na detecção de picos")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    estatisticas = processar_pasta(args.pasta_sessoes, args.saida, args.treino, args.workers,
+                                   args.limiar, args.tempo_inicial)
+    print(
+        f"{estatisticas['sessoes']} sessões ({estatisticas['frames']} frames) em {estatisticas['tempo']:.1f}s "
+        f"— {estatisticas['sessoes_por_segundo']:.2f} sessões/s, {estatisticas['frames_por_segundo']:,.0f} frames/s"
+    )
+    if estatisticas['falhas']:
+        print(f"Falhas: {', '.join(estatisticas['falhas'])}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,33 +1,94 @@
 import os
 import logging
-import pandas as pd
+import importlib.machinery
+
+# O Streamlit executa este script como um __main__ sem __spec__, e com spawn cada
+# processo de análise (utils.jobs) reexecutaria o script inteiro ao iniciar. Com um
+# __spec__ de nome "__main__", o multiprocessing não reimporta o módulo principal.
+__spec__ = importlib.machinery.ModuleSpec("__main__", None)
+
 import streamlit as st
 
-from views import visualizacao_estatistica
-from views import ml_teste  # importa o pipeline completo com PCA + DBSCAN
+# As views (pandas, plotly, scikit-learn) só são importadas quando a seção
+# correspondente é escolhida; a seção inicial não importa nenhuma delas
+from utils.instrumentacao import iniciar_coleta, encerrar_coleta
+from utils.aquecimento import iniciar_aquecimento
+from utils import jobs
 
 st.set_page_config(page_title="Dashboard Análise de Interações", layout="wide")
 
-# Configuração do logger
-logging.basicConfig(level=logging.DEBUG)
+# Configuração do logger (DEBUG só quando pedido, ex.: LOG_LEVEL=DEBUG)
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
+# Métricas por etapa gravadas quando o painel de desempenho está ativo
+ARQUIVO_METRICAS = os.path.join(".cache", "metricas.jsonl")
+
+# Intervalo (s) de consulta do andamento de uma análise em segundo plano
+INTERVALO_JOBS = 1.0
+
+# -------- Acompanhamento das análises em segundo plano --------
+@st.fragment(run_every=INTERVALO_JOBS)
+def _acompanhar_analise(id_job):
+    # Só este trecho é reexecutado a cada segundo; ao terminar, a página inteira mostra o resultado
+    andamento = jobs.status(id_job)
+    if andamento is None or andamento["estado"] in (jobs.CONCLUIDO, jobs.ERRO):
+        st.rerun()
+    if andamento["estado"] == jobs.NA_FILA:
+        texto = f"⏳ {andamento['nome']}: aguardando um processo livre..."
+    else:
+        texto = f"⚙️ {andamento['nome']}: {andamento['etapa'] or 'iniciando'}"
+    st.progress(andamento["progresso"], text=texto)
+    st.caption(f"Enviado há {andamento['espera']:.0f}s")
+
 # ----------- INTERFACE PRINCIPAL ------------------
 
 st.title("🧠 Análise de Interações - Reabilitação Motora")
 
-# -------- Navegação por abas --------
-abas = st.tabs(["🏠 Início", "📊 Visualização Estatística", "🤖 Modelo Preditivo"])
+# -------- Navegação --------
+# Só a seção escolhida é executada (st.tabs executaria todas a cada rerun)
+SECOES = ["🏠 Início", "📊 Visualização Estatística", "🤖 Modelo Preditivo", "📚 Coorte"]
+secao = st.sidebar.radio("Seção", SECOES, key="secao")
+
+painel_desempenho = st.sidebar.checkbox(
+    "⏱️ Painel de desempenho",
+    value=os.environ.get("DASHBOARD_INSTRUMENTACAO") == "1",
+    help="Mede o tempo e a memória de cada etapa da análise."
+)
+coleta = iniciar_coleta() if painel_desempenho else None
+# Etapas medidas no processo da análise em segundo plano, exibidas no mesmo painel
+medicoes_analise = []
+
+# -------- Arquivos --------
+# Os uploads ficam na barra lateral, fora das seções, para continuarem enviados ao trocar de seção
+st.sidebar.markdown("### 📁 Arquivos")
+inicio_file = st.sidebar.file_uploader("📁 CSV do Início", type="csv", key="inicio")
+final_file = st.sidebar.file_uploader("📁 CSV do Final", type="csv", key="final")
+uploaded_file = st.sidebar.file_uploader("📁 Envie o arquivo CSV do paciente", type="csv")
+pasta_treinamento = "treino"  # ajuste se necessário
+
+if st.sidebar.button("🔍 Analisar"):
+    if uploaded_file is None:
+        st.sidebar.info("Envie um arquivo CSV para análise.")
+    else:
+        # A análise roda em um processo em segundo plano; a seção do modelo acompanha pelo id do job
+        try:
+            st.session_state.job_analise = jobs.enviar_analise(
+                uploaded_file.getvalue(), uploaded_file.name, pasta_treinamento,
+                ARQUIVO_METRICAS if painel_desempenho else None
+            )
+        except jobs.FilaCheia as e:
+            st.sidebar.warning(str(e))
 
 # -------- Página 1: Instruções --------
-with abas[0]:
+if secao == SECOES[0]:
     st.title("✨Reabilitação assistida por AR: visualização e análise dos dados")
     st.markdown("""
     Este dashboard tem como objetivo auxiliar na análise de dados obtidos a partir de interações com softwares de reabilitação.
                 
     ### 📁 Upload de Arquivo
     - O arquivo deve estar no formato **.CSV**.
-    - Faça o envio utilizando a barra lateral à esquerda.
+    - Faça o envio utilizando a barra lateral à esquerda; os arquivos continuam enviados ao trocar de seção.
                 
     ### ⚙️ Parâmetros
     - **Fonte dos dados**: Tipo de câmera utilizada (Infravermelho ou RGB).
@@ -37,14 +98,18 @@ with abas[0]:
 
     ### 🤖 Modelo Preditivo
     - Página dedicada à apresentação de resultados gerados pelo modelo de aprendizado de máquina não supervisionado.
+
+    ### 📚 Coorte
+    - Evolução de cada paciente e comparação entre grupos, a partir do resumo das sessões já analisadas.
     """)
 
 # -------- Página 2: Visualização Estatística --------
-with abas[1]:
-    visualizacao_estatistica.carregar()
+elif secao == SECOES[1]:
+    from views import visualizacao_estatistica
+    visualizacao_estatistica.carregar(inicio_file, final_file)
 
 # -------- Página 3: Resultados do Modelo Preditivo --------
-with abas[2]:
+elif secao == SECOES[2]:
     st.title("🤖 Resultados do Modelo de Aprendizado de Máquina")
 
     st.markdown("""
@@ -78,36 +143,77 @@ with abas[2]:
     Esses pontos podem indicar **compensações ou execuções atípicas** e merecem atenção especial.
     """)
 
-    uploaded_file = st.sidebar.file_uploader("📁 Envie o arquivo CSV do paciente", type="csv")
-    pasta_treinamento = "treino"  # ajuste se necessário
-
-    if st.sidebar.button("🔍 Analisar"):
-        if uploaded_file is None:
-            st.info("Envie um arquivo CSV para análise.")
-        else:
-            # Chamada da função principal do ml_teste.py
-            (fig_pca, fig_barras), clusters, interpretacao, tabela, pontos_outliers = ml_teste.processar_e_plotar(uploaded_file, pasta_treinamento)
-
-            if fig_pca and fig_barras:
-                st.subheader("Gráfico de Dispersão com PCA")
-                st.plotly_chart(fig_pca, use_container_width=True)
-
-                st.subheader("Gráfico de Médias por Cluster")
-                st.plotly_chart(fig_barras, use_container_width=True)
-
-                st.markdown("### 📄 Informações Médias por Cluster")
-                colunas_numericas = tabela.select_dtypes(include=['float', 'int']).columns
-                st.dataframe(tabela.style.format({col: "{:.2f}" for col in colunas_numericas}))
+    id_job = st.session_state.get("job_analise")
+    andamento = jobs.status(id_job) if id_job else None
+    estado = andamento["estado"] if andamento else None
+
+    if estado in (jobs.NA_FILA, jobs.EXECUTANDO):
+        _acompanhar_analise(id_job)
+    elif estado == jobs.ERRO:
+        st.error(f"Erro na análise de {andamento['nome']}: {andamento['erro']}")
+    elif estado == jobs.CONCLUIDO:
+        # Resultado de processar_e_plotar, guardado com o job
+        figuras, clusters, interpretacao, tabela, pontos_outliers, semelhantes = andamento["resultado"]
+        medicoes_analise = andamento["medicoes"]
+
+        if figuras:
+            fig_pca, fig_barras = figuras
+            st.caption(f"📄 {andamento['nome']}")
+
+            st.subheader("Gráfico de Dispersão com PCA")
+            st.plotly_chart(fig_pca, use_container_width=True)
+
+            st.subheader("Gráfico de Médias por Cluster")
+            st.plotly_chart(fig_barras, use_container_width=True)
+
+            st.markdown("### 📄 Informações Médias por Cluster")
+            colunas_numericas = tabela.select_dtypes(include=['float', 'int']).columns
+            st.dataframe(tabela.style.format({col: "{:.2f}" for col in colunas_numericas}))
+
+            st.markdown("### 🗂️ Sessões Semelhantes")
+            if semelhantes is not None and not semelhantes.empty:
+                st.caption("Sessões de treino e do histórico com distribuição de ângulos e clusters mais parecida.")
+                st.dataframe(semelhantes.style.format({"Distância": "{:.3f}"}), hide_index=True)
+            else:
+                st.caption("Nenhuma outra sessão indexada ainda.")
 
-                #st.markdown(f"### 🧾 Interpretação")
-                #st.success(interpretacao)
+            #st.markdown(f"### 🧾 Interpretação")
+            #st.success(interpretacao)
 
-                # Exibir outliers se houver
-                #if pontos_outliers is not None and not pontos_outliers.empty:
-                    #st.markdown("### ⚠️ Movimentos Fora do Padrão (Cluster -1)")
-                    #st.warning("Os movimentos abaixo foram classificados como **compensações ou execuções atípicas**.")
-                    #st.dataframe(pontos_outliers)
-
-            else:
-                st.warning(interpretacao)
+            # Exibir outliers se houver
+            #if pontos_outliers is not None and not pontos_outliers.empty:
+                #st.markdown("### ⚠️ Movimentos Fora do Padrão (Cluster -1)")
+                #st.warning("Os movimentos abaixo foram classificados como **compensações ou execuções atípicas**.")
+                #st.dataframe(pontos_outliers)
 
+        else:
+            st.warning(interpretacao)
+
+# -------- Página 4: Coorte e evolução dos pacientes --------
+else:
+    from views import coorte
+    coorte.carregar()
+
+# -------- Aquecimento do modelo --------
+# Página já desenhada: inicia um processo de análise e carrega o modelo nele
+iniciar_aquecimento("modelo", lambda: jobs.aquecer(pasta_treinamento).result())
+
+# -------- Painel de desempenho --------
+if coleta is not None:
+    import pandas as pd
+
+    medicoes = [("Página", m) for m in encerrar_coleta(coleta, ARQUIVO_METRICAS)]
+    medicoes += [("Análise", m) for m in medicoes_analise]
+    with st.sidebar:
+        st.markdown("### ⏱️ Desempenho")
+        if medicoes:
+            tabela_desempenho = pd.DataFrame([{
+                "Origem": origem,
+                "Etapa": m["etapa"],
+                "Tempo (ms)": m["tempo_s"] * 1000,
+                "Δ RSS (MiB)": m["rss_delta_bytes"] / 2 ** 20 if m["rss_delta_bytes"] is not None else None,
+            } for origem, m in medicoes])
+            st.dataframe(tabela_desempenho.style.format({"Tempo (ms)": "{:.1f}", "Δ RSS (MiB)": "{:.2f}"}),
+                         hide_index=True)
+        else:
+            st.caption("Nenhuma etapa executada nesta interação (resultados vindos do cache).")
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from utils.alinhamento import dtw_banda
+
+
+def _dtw_completo(a, b):
+    # DTW sem faixa, O(n·m), como referência
+    a, b = np.asarray(a, dtype=float).reshape(len(a), -1), np.asarray(b, dtype=float).reshape(len(b), -1)
+    custo = np.full((len(a) + 1, len(b) + 1), np.inf)
+    custo[0, 0] = 0.0
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            custo[i, j] = np.linalg.norm(a[i - 1] - b[j - 1]) + min(custo[i - 1, j], custo[i, j - 1], custo[i - 1, j - 1])
+    return custo[-1, -1]
+
+
+def _caminho_valido(caminho, n, m):
+    passos = np.diff(caminho, axis=0)
+    return (tuple(caminho[0]) == (0, 0) and tuple(caminho[-1]) == (n - 1, m - 1)
+            and np.all((passos >= 0) & (passos <= 1)) and np.all(passos.sum(axis=1) > 0))
+
+
+@pytest.mark.parametrize("n, m", [(30, 30), (25, 40), (40, 17), (1, 6)])
+def test_faixa_larga_igual_ao_dtw_completo(n, m):
+    rng = np.random.default_rng(n * m)
+    a, b = rng.normal(size=(n, 3)), rng.normal(size=(m, 3))
+    custo, caminho = dtw_banda(a, b, largura=max(n, m))
+    assert custo == pytest.approx(_dtw_completo(a, b))
+    assert _caminho_valido(caminho, n, m)
+    # O custo é a soma das distâncias ao longo do caminho devolvido
+    assert custo == pytest.approx(np.linalg.norm(a[caminho[:, 0]] - b[caminho[:, 1]], axis=1).sum())
+
+
+def test_faixa_estreita_nunca_menor_que_o_completo():
+    rng = np.random.default_rng(3)
+    a, b = np.cumsum(rng.normal(size=60)), np.cumsum(rng.normal(size=75))
+    custo, caminho = dtw_banda(a, b, largura=3)
+    assert custo >= _dtw_completo(a, b) - 1e-9
+    assert _caminho_valido(caminho, len(a), len(b))
+
+
+def test_sequencia_deslocada_alinha_sem_custo():
+    a = np.sin(np.linspace(0, 6, 50))
+    b = np.r_[np.full(5, a[0]), a]
+    custo, _ = dtw_banda(a, b)
+    assert custo == pytest.approx(0.0)
+    assert dtw_banda([], b)[0] == np.inf
@@ -0,0 +1,30 @@
+import numpy as np
+
+from utils.decimacao import indices_minmax, decimar
+
+
+def test_minmax_preserva_extremos():
+    y = np.sin(np.linspace(0, 20, 10_000))
+    y[1234], y[8765] = 5.0, -5.0
+    indices = indices_minmax(y, 100)
+    assert len(indices) <= 2 * 100 + 2
+    assert {1234, 8765} <= set(indices)
+
+
+def test_minmax_ignora_faixas_so_com_nan():
+    # Sessão reamostrada com uma lacuna maior que várias faixas
+    y = np.linspace(0, 1, 10_000)
+    y[3000:6000] = np.nan
+    indices = indices_minmax(y, 100)
+    assert np.all(np.diff(indices) > 0)
+    assert not np.isnan(y[indices[1:-1]]).any()
+    assert indices[0] == 0 and indices[-1] == len(y) - 1
+
+
+def test_decimar_serie_com_lacuna_no_fim():
+    x = np.arange(10_000, dtype=np.float64)
+    y = np.cos(x / 100)
+    y[-2500:] = np.nan
+    x_reduzido, y_reduzido = decimar(x, y, max_pontos=200)
+    assert len(x_reduzido) == len(y_reduzido) <= 202
+    assert np.nanmax(y_reduzido) == np.nanmax(y)
@@ -0,0 +1,39 @@
+import os
+import json
+
+import pandas as pd
+import pytest
+
+import lote
+from views import ml_teste
+
+PASTA_TREINO = os.path.abspath("treino")
+
+
+@pytest.fixture
+def sessao_sem_tempo(tmp_path, monkeypatch):
+    # Caches e índice de sessões (caminhos relativos) ficam dentro de tmp_path
+    monkeypatch.chdir(tmp_path)
+    df = pd.read_csv(os.path.join(PASTA_TREINO, "A_Final_Puzzle.csv"), usecols=ml_teste.COLUNAS_MODELO)
+    arquivo = tmp_path / "Z_Final_Puzzle.csv"
+    df.to_csv(arquivo, index=False)
+    return arquivo
+
+
+def test_sessao_sem_coluna_time(sessao_sem_tempo, tmp_path, monkeypatch):
+    monkeypatch.setattr(lote, "_pipeline", ml_teste.carregar_ou_treinar_modelo(PASTA_TREINO, ml_teste.COLUNAS_MODELO))
+    saida = tmp_path / "saida"
+    saida.mkdir()
+
+    resultado = lote.processar_sessao(str(sessao_sem_tempo), str(saida))
+
+    with open(resultado['resumo'], encoding='utf-8') as f:
+        resumo = json.load(f)
+    assert resumo['frames'] == len(pd.read_csv(sessao_sem_tempo))
+    assert resumo['fps_mediana'] is None and resumo['quadros_perdidos'] is None
+    assert resumo['ombros'] == {}
+    assert 'clusters' in resumo
+
+    por_frame = pd.read_parquet(saida / "Z_Final_Puzzle.parquet")
+    assert 'time' not in por_frame.columns
+    assert len(por_frame) == len(pd.read_csv(sessao_sem_tempo).dropna())
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from utils import processamento
+from utils.processamento import (decodificar_tempo, estimar_fps, calcular_tempos_picos, varrer_limiares,
+                                 sugerir_limiar, limiares_relativos, segmentar_movimentos)
+
+
+def _tempo_hhmmss(frames_por_segundo, inicio=(10, 0, 0)):
+    # Coluna `time` com a quantidade de frames pedida em cada segundo a partir de `inicio`
+    h, m, s = inicio
+    base = h * 3600 + m * 60 + s
+    segundos = np.repeat(base + np.arange(len(frames_por_segundo)), frames_por_segundo) % 86400
+    return (segundos // 3600) * 10000 + (segundos // 60 % 60) * 100 + segundos % 60
+
+
+def test_decodificar_tempo_vira_meia_noite():
+    assert decodificar_tempo([235958, 235959, 0, 1]).tolist() == [86398, 86399, 86400, 86401]
+
+
+def test_estimar_fps_ignora_pontas_e_conta_perdas():
+    # Pontas incompletas, um segundo com 3 frames a menos e um segundo sem captura
+    contagens = [12, 30, 30, 27, 30, 0, 30, 30, 7]
+    info = estimar_fps(_tempo_hhmmss(contagens))
+    assert info['fps_mediana'] == 30.0
+    assert info['quadros_perdidos'] == 3 + 30
+    assert info['segundos_com_perda'].tolist() == [10 * 3600 + 3]
+
+
+def test_estimar_fps_atravessa_meia_noite():
+    info = estimar_fps(_tempo_hhmmss([30] * 6, inicio=(23, 59, 57)))
+    assert info['fps_mediana'] == 30.0
+    assert info['quadros_perdidos'] == 0
+    assert np.all(np.diff(info['segundos']) == 1)
+
+
+def test_varredura_igual_ao_calculo_por_limiar(monkeypatch):
+    # Blocos pequenos para exercitar a varredura em partes
+    monkeypatch.setattr(processamento, 'MAX_ELEMENTOS_VARREDURA', 4096)
+    rng = np.random.default_rng(0)
+    dados = 40 + 30 * np.sin(np.linspace(0, 60, 3000)) + rng.normal(0, 4, 3000)
+    limiares = np.arange(10, 70, 0.5)
+
+    varredura = varrer_limiares(dados, 30, limiares, tempo_inicial=2)
+    for i, limiar in enumerate(limiares):
+        _, duracoes, media = calcular_tempos_picos(dados, 30, limiar, 2)
+        assert varredura['quantidades'][i] == len(duracoes)
+        assert varredura['medias'][i] == pytest.approx(media)
+        assert varredura['medianas'][i] == pytest.approx(np.median(duracoes) if len(duracoes) else 0.0)
+
+
+def test_sugerir_limiar_centro_do_maior_patamar():
+    varredura = {'limiares': np.arange(10, 19, dtype=float),
+                 'quantidades': np.array([5, 4, 3, 3, 3, 3, 2, 2, 0])}
+    assert sugerir_limiar(varredura) == 13.0
+    assert sugerir_limiar({'limiares': np.arange(3.0), 'quantidades': np.zeros(3, dtype=int)}) is None
+
+
+def _segmentar_laco(serie, alto, baixo):
+    # Referência direta da histerese: (último frame antes da subida, último frame ativo)
+    estado, inicio, intervalos = serie[0] > alto, None, []
+    for i in range(1, len(serie)):
+        anterior = estado
+        if serie[i] > alto:
+            estado = True
+        elif serie[i] <= baixo:
+            estado = False
+        if estado and not anterior:
+            inicio = i - 1
+        elif anterior and not estado and inicio is not None:
+            intervalos.append((inicio, i - 1))
+    return intervalos
+
+
+def test_histerese_nao_fragmenta_movimento_com_ruido_no_limiar():
+    # Um único movimento que oscila em torno do limiar alto antes de descer
+    serie = np.r_[np.zeros(30), [50, 41, 50, 41, 50], np.full(40, 60), [45, 38, 45], np.zeros(30)]
+    simples = segmentar_movimentos(serie[:, np.newaxis], 10, 42, duracao_minima=0)
+    histerese = segmentar_movimentos(serie[:, np.newaxis], 10, 42, limiar_baixo=20, duracao_minima=0)
+    assert len(simples) == 4
+    assert len(histerese) == 1
+    assert (histerese['inicio'][0], histerese['fim'][0]) == (29, 77)
+    assert histerese['pico'][0] == 60
+
+
+def test_segmentacao_igual_a_referencia():
+    rng = np.random.default_rng(1)
+    t = np.linspace(0, 80, 2000)[:, np.newaxis]
+    angulos = 40 + 30 * np.sin(t * [1.0, 1.3, 0.7]) + rng.normal(0, 6, (2000, 3))
+    alto, baixo = limiares_relativos(angulos, histerese=0.2)
+    assert np.all(baixo < alto)
+    movimentos = segmentar_movimentos(angulos, 30, alto, baixo, duracao_minima=0)
+    for j in range(3):
+        selecionados = movimentos[movimentos['articulacao'] == j]
+        esperado = _segmentar_laco(angulos[:, j], np.float32(alto[j]), np.float32(baixo[j]))
+        assert len(esperado) >= 5
+        assert list(zip(selecionados['inicio'], selecionados['fim'])) == esperado
+
+
+def test_segmentacao_sem_histerese_igual_aos_picos():
+    rng = np.random.default_rng(2)
+    angulos = 40 + 30 * np.sin(np.linspace(0, 40, 1500))[:, np.newaxis] + rng.normal(0, 3, (1500, 2))
+    movimentos = segmentar_movimentos(angulos, 30, 45, tempo_inicial=2)
+    for j in range(2):
+        picos, _, _ = calcular_tempos_picos(angulos[:, j], 30, 45, 2)
+        selecionados = movimentos[movimentos['articulacao'] == j]
+        assert np.column_stack((selecionados['inicio'], selecionados['fim'])).tolist() == picos.tolist()
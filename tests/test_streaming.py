@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+
+from utils.streaming import SeguidorCSV, MonitorSessao, BufferCircular
+
+
+def _escrever(caminho, texto, modo="wb"):
+    with open(caminho, modo) as f:
+        f.write(texto)
+
+
+def test_buffer_circular_guarda_as_ultimas_linhas():
+    buffer = BufferCircular(3, 1)
+    buffer.acrescentar([[1]])
+    buffer.acrescentar(np.arange(10, 17).reshape(-1, 1))
+    assert buffer.escritos == 8
+    assert buffer.ultimos().ravel().tolist() == [14, 15, 16]
+
+
+def test_seguidor_le_so_linhas_completas(tmp_path):
+    caminho = tmp_path / "vivo.csv"
+    _escrever(caminho, b"time,a\n1,10\n2,2")
+    seguidor = SeguidorCSV(str(caminho), ["a"])
+    assert seguidor.ler_novas_linhas()["a"].tolist() == [10]
+    _escrever(caminho, b"0\n3,30\n", "ab")
+    assert seguidor.ler_novas_linhas()["a"].tolist() == [20, 30]
+    seguidor.fechar()
+
+
+def test_seguidor_aceita_cabecalho_com_bom(tmp_path):
+    caminho = tmp_path / "vivo.csv"
+    _escrever(caminho, "\ufefftime,a\n1,10\n".encode("utf-8"))
+    seguidor = SeguidorCSV(str(caminho), ["time", "a"])
+    assert seguidor.ler_novas_linhas().to_numpy().tolist() == [[1, 10]]
+    seguidor.fechar()
+
+
+def test_seguidor_descarta_linha_parcial_ao_trocar_de_arquivo(tmp_path):
+    caminho = tmp_path / "vivo.csv"
+    _escrever(caminho, b"time,a\n1,10\n2,2")
+    seguidor = SeguidorCSV(str(caminho), ["time", "a"])
+    seguidor.ler_novas_linhas()
+
+    # Arquivo novo no mesmo caminho, com outra ordem de colunas
+    novo = tmp_path / "novo.csv"
+    _escrever(novo, b"a,time\n50,7\n")
+    os.replace(novo, caminho)
+    assert seguidor.ler_novas_linhas().to_numpy().tolist() == [[7, 50]]
+    assert seguidor.reinicios == 1
+    seguidor.fechar()
+
+
+def test_monitor_recomeca_quando_o_arquivo_e_substituido(tmp_path):
+    caminho = tmp_path / "vivo.csv"
+    linhas = "".join(f"{100000 + i // 30},{60 if 90 <= i < 150 else 0},0\n" for i in range(300))
+    _escrever(caminho, ("time,shoulderLangle,shoulderRangle\n" + linhas).encode())
+    monitor = MonitorSessao(str(caminho), ["shoulderLangle", "shoulderRangle"], limiar=35, tempo_inicial=1)
+    movimentos = monitor.atualizar()
+    assert len(movimentos["shoulderLangle"]) == 1
+    assert monitor.frames == 300
+
+    novo = tmp_path / "novo.csv"
+    _escrever(novo, b"time,shoulderLangle,shoulderRangle\n200000,0,0\n200000,0,0\n")
+    os.replace(novo, caminho)
+    monitor.atualizar()
+    assert monitor.frames == 2
+    assert monitor.detectores["shoulderLangle"].quantidade == 0
+    assert len(monitor.janela_recente()) == 2
+    monitor.fechar()
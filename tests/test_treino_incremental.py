@@ -0,0 +1,64 @@
+import numpy as np
+from sklearn.cluster import DBSCAN
+from sklearn.metrics import adjusted_rand_score
+
+from utils import treino_incremental
+from utils.treino_incremental import ArvoreIncremental, inserir_pontos_dbscan, _estruturas_vizinhanca
+
+EPS, MIN_SAMPLES = 0.3, 15
+
+
+def _pontos(seed=1):
+    rng = np.random.default_rng(seed)
+    pontos = np.concatenate([
+        rng.normal(0, 1, (1500, 2)),
+        rng.normal(5, 0.7, (800, 2)),
+        rng.uniform(-4, 9, (200, 2)),
+    ]).astype(np.float32)
+    rng.shuffle(pontos)
+    return pontos
+
+
+def test_insercao_incremental_igual_ao_dbscan_completo(monkeypatch):
+    # Reconstrói as árvores durante as inserções
+    monkeypatch.setattr(treino_incremental, "MINIMO_PENDENTES", 300)
+    pontos = _pontos()
+    n_inicial = 1000
+
+    inicial = DBSCAN(eps=EPS, min_samples=MIN_SAMPLES).fit(pontos[:n_inicial])
+    agrupados = pontos[:n_inicial]
+    contagens = ArvoreIncremental(agrupados).arvore.query_radius(agrupados, r=EPS, count_only=True).astype(np.int32)
+    rotulos = inicial.labels_.astype(np.int32)
+    estruturas = _estruturas_vizinhanca(agrupados, contagens, MIN_SAMPLES)
+    for inicio in range(n_inicial, len(pontos), 250):
+        agrupados, contagens, rotulos, estruturas = inserir_pontos_dbscan(
+            agrupados, contagens, rotulos, pontos[inicio:inicio + 250], EPS, MIN_SAMPLES, estruturas)
+
+    completo = DBSCAN(eps=EPS, min_samples=MIN_SAMPLES).fit(pontos)
+    nucleos = completo.core_sample_indices_
+    # Mesmos núcleos, mesmo ruído e mesma partição dos núcleos
+    assert np.array_equal(np.sort(estruturas["ordem_nucleos"]), nucleos)
+    assert np.array_equal(rotulos == -1, completo.labels_ == -1)
+    assert adjusted_rand_score(completo.labels_[nucleos], rotulos[nucleos]) == 1.0
+
+    # Cada borda fica em um grupo de algum núcleo a até eps dela
+    bordas = np.setdiff1d(np.flatnonzero(rotulos >= 0), nucleos)
+    vizinhos = estruturas["vizinhanca"].query_radius(pontos[bordas], r=EPS)
+    for borda, indices in zip(bordas, vizinhos):
+        indices = np.intersect1d(indices, nucleos)
+        assert rotulos[borda] in rotulos[indices]
+
+
+def test_arvore_de_nucleos_responde_como_forca_bruta():
+    pontos = _pontos(2)
+    contagens = ArvoreIncremental(pontos[:1200]).arvore.query_radius(pontos[:1200], r=EPS, count_only=True)
+    estruturas = _estruturas_vizinhanca(pontos[:1200], contagens.astype(np.int32), MIN_SAMPLES)
+    rotulos = DBSCAN(eps=EPS, min_samples=MIN_SAMPLES).fit(pontos[:1200]).labels_.astype(np.int32)
+    agrupados, _, _, estruturas = inserir_pontos_dbscan(
+        pontos[:1200], contagens.astype(np.int32), rotulos, pontos[1200:], EPS, MIN_SAMPLES, estruturas)
+
+    consultas = np.random.default_rng(3).normal(2, 2, (100, 2))
+    distancias, _ = estruturas["nucleos"].query(consultas, k=1)
+    nucleos = agrupados[estruturas["ordem_nucleos"]].astype(np.float64)
+    forca_bruta = np.linalg.norm(consultas[:, np.newaxis] - nucleos[np.newaxis], axis=2).min(axis=1)
+    assert np.allclose(distancias[:, 0], forca_bruta)
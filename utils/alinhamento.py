@@ -0,0 +1,162 @@
+"""
+Alinhamento dos movimentos do Início com os do Final por DTW (dynamic time warping).
+
+Cada movimento segmentado vira um descritor (duração, amplitude e velocidade
+média) e as duas sequências de movimentos são alinhadas por DTW restrito a uma
+faixa de Sakoe-Chiba em torno da diagonal. Só as células da faixa são
+calculadas, linha a linha e vetorizadas, então o custo é O(n·w) em vez de
+O(n²). O resultado são pares de movimentos correspondentes com as diferenças
+de velocidade e amplitude entre as sessões.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+# Meia largura padrão da faixa, como fração da sequência mais longa
+FRACAO_BANDA = 0.1
+LARGURA_MINIMA = 2
+
+DESCRITORES = ('duracao', 'amplitude', 'velocidade')
+
+
+def _limites_banda(n, m, largura):
+    # Centro da faixa acompanha a diagonal (0, 0) -> (n - 1, m - 1)
+    centro = np.rint(np.arange(n) * ((m - 1) / (n - 1) if n > 1 else 0)).astype(np.int64)
+    return np.maximum(centro - largura, 0), np.minimum(centro + largura, m - 1)
+
+
+def dtw_banda(a, b, largura=None):
+    """
+    DTW entre duas sequências de vetores com faixa de Sakoe-Chiba.
+
+    Parâmetros:
+        a (array n x d), b (array m x d): Sequências (1D são tratadas como d = 1).
+        largura (int): Meia largura da faixa, em elementos de `b`
+            (padrão: FRACAO_BANDA da sequência mais longa).
+
+    Retorna:
+        custo (float): Soma das distâncias euclidianas ao longo do caminho.
+        caminho (np.array k x 2): Pares (i, j) alinhados, em ordem.
+    """
+    n, m = len(a), len(b)
+    if n == 0 or m == 0:
+        return math.inf, np.empty((0, 2), dtype=np.int64)
+    a = np.asarray(a, dtype=np.float64).reshape(n, -1)
+    b = np.asarray(b, dtype=np.float64).reshape(m, -1)
+
+    if largura is None:
+        largura = math.ceil(FRACAO_BANDA * max(n, m))
+    # A faixa precisa cobrir o passo da diagonal para que o caminho seja contínuo
+    largura = max(int(largura), LARGURA_MINIMA, math.ceil((m - 1) / max(n - 1, 1)))
+    inicio, fim = _limites_banda(n, m, largura)
+    colunas = 2 * largura + 1
+
+    # Distâncias de todas as células da faixa de uma vez (n x colunas)
+    indices = inicio[:, np.newaxis] + np.arange(colunas)
+    dentro = indices <= fim[:, np.newaxis]
+    distancias = np.linalg.norm(a[:, np.newaxis, :] - b[np.minimum(indices, m - 1)], axis=2)
+    distancias[~dentro] = np.inf
+
+    acumulado = np.full((n, colunas), np.inf)
+    for i in range(n):
+        if i == 0:
+            entrada = np.full(colunas, np.inf)
+            entrada[0] = 0.0
+        else:
+            # Vizinhos da linha anterior (mesma coluna e diagonal), deslocados para a faixa desta linha
+            # anterior[k] = D[i - 1, inicio[i] + k - 1]
+            deslocamento = inicio[i] - inicio[i - 1]
+            anterior = np.full(colunas + 1, np.inf)
+            primeiro, ultimo = max(0, 1 - deslocamento), min(colunas + 1, colunas + 1 - deslocamento)
+            if primeiro < ultimo:
+                anterior[primeiro:ultimo] = acumulado[i - 1, primeiro + deslocamento - 1:ultimo + deslocamento - 1]
+            entrada = np.minimum(anterior[:-1], anterior[1:])
+        # Passos horizontais: D[j] = S[j] + min_{k<=j}(entrada[k] - S[k-1]), com S a soma acumulada da linha
+        linha = np.where(dentro[i], distancias[i], 0.0)
+        soma = np.cumsum(linha)
+        acumulado[i] = np.where(dentro[i], soma + np.minimum.accumulate(entrada - (soma - linha)), np.inf)
+
+    # Caminho de volta a partir de (n - 1, m - 1)
+    caminho = [(n - 1, m - 1)]
+    i, j = n - 1, m - 1
+    while i > 0 or j > 0:
+        candidatos = []
+        for di, dj in ((1, 1), (1, 0), (0, 1)):
+            pi, pj = i - di, j - dj
+            if pi >= 0 and pj >= 0 and inicio[pi] <= pj <= fim[pi]:
+                candidatos.append((acumulado[pi, pj - inicio[pi]], pi, pj))
+        _, i, j = min(candidatos)
+        caminho.append((i, j))
+
+    return float(acumulado[n - 1, m - 1 - inicio[n - 1]]), np.array(caminho[::-1], dtype=np.int64)
+
+
+def descrever_movimentos(serie, picos, frames_por_seg):
+    """
+    Descritores de cada movimento de uma série.
+
+    Parâmetros:
+        serie (array): Ângulo frame a frame.
+        picos (array k x 2): Intervalos (inicio, fim) de `calcular_tempos_picos`.
+
+    Retorna:
+        DataFrame com inicio e fim (frames), tempo (s), duracao (s), amplitude
+        (graus, máximo - mínimo no movimento) e velocidade (graus/s, |variação| média).
+    """
+    serie = np.asarray(serie, dtype=np.float64)
+    picos = np.asarray(picos, dtype=np.int64).reshape(-1, 2)
+    if len(picos) == 0:
+        return pd.DataFrame(columns=['inicio', 'fim', 'tempo', *DESCRITORES])
+
+    inicios, finais = picos[:, 0], picos[:, 1]
+    limites = np.column_stack((inicios, finais + 1)).ravel()
+    extendida = np.r_[serie, serie[-1]]
+    maximos = np.maximum.reduceat(extendida, limites)[::2]
+    minimos = np.minimum.reduceat(extendida, limites)[::2]
+
+    variacao = np.r_[0.0, np.cumsum(np.abs(np.diff(serie)))]
+    passos = np.maximum(finais - inicios, 1)
+    return pd.DataFrame({
+        'inicio': inicios,
+        'fim': finais,
+        'tempo': inicios / frames_por_seg,
+        'duracao': (finais - inicios) / frames_por_seg,
+        'amplitude': maximos - minimos,
+        'velocidade': (variacao[finais] - variacao[inicios]) / passos * frames_por_seg,
+    })
+
+
+def alinhar_movimentos(serie_a, picos_a, fps_a, serie_b, picos_b, fps_b, largura=None):
+    """
+    Alinha os movimentos de duas sessões (ex.: Início e Final) e compara cada par.
+
+    Os descritores são padronizados com a média e o desvio das duas sessões juntas,
+    para que nenhuma grandeza domine a distância do DTW.
+
+    Retorna:
+        dict com:
+            'pares' (DataFrame): Um par alinhado por linha, com os descritores dos dois
+                movimentos (sufixos _a e _b) e as diferenças delta_* (b - a).
+            'custo' (float): Custo DTW médio por par (inf sem movimentos).
+    """
+    desc_a = descrever_movimentos(serie_a, picos_a, fps_a)
+    desc_b = descrever_movimentos(serie_b, picos_b, fps_b)
+    if desc_a.empty or desc_b.empty:
+        return {'pares': pd.DataFrame(), 'custo': math.inf}
+
+    valores = np.vstack((desc_a[list(DESCRITORES)].to_numpy(), desc_b[list(DESCRITORES)].to_numpy()))
+    media, desvio = valores.mean(axis=0), valores.std(axis=0)
+    desvio[desvio == 0] = 1.0
+    padronizados = (valores - media) / desvio
+
+    custo, caminho = dtw_banda(padronizados[:len(desc_a)], padronizados[len(desc_a):], largura)
+
+    pares = pd.concat([
+        desc_a.iloc[caminho[:, 0]].reset_index().add_suffix('_a'),
+        desc_b.iloc[caminho[:, 1]].reset_index().add_suffix('_b'),
+    ], axis=1).rename(columns={'index_a': 'movimento_a', 'index_b': 'movimento_b'})
+    for descritor in DESCRITORES:
+        pares[f'delta_{descritor}'] = pares[f'{descritor}_b'] - pares[f'{descritor}_a']
+
+    return {'pares': pares, 'custo': custo / len(caminho)}
@@ -0,0 +1,46 @@
+"""
+Aquecimento em segundo plano.
+
+Depois que a primeira página é desenhada, uma thread executa uma tarefa cara
+(no dashboard, importar o pipeline de ML e carregar ou treinar o modelo), para
+que a primeira análise não pague esse custo. A tarefa roda uma única vez por
+processo do Streamlit, mesmo com várias sessões e reruns.
+"""
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# DASHBOARD_AQUECIMENTO=0 desliga o aquecimento (ex.: máquinas com pouca memória)
+AQUECIMENTO_ATIVO = os.environ.get("DASHBOARD_AQUECIMENTO", "1") == "1"
+
+_threads = {}
+_trava = threading.Lock()
+
+
+def _executar(nome, tarefa):
+    inicio = time.perf_counter()
+    try:
+        tarefa()
+        logger.info(f"Aquecimento '{nome}' concluído em {time.perf_counter() - inicio:.1f}s")
+    except Exception as e:
+        logger.warning(f"Falha no aquecimento '{nome}': {e}")
+
+
+def iniciar_aquecimento(nome, tarefa):
+    """
+    Inicia `tarefa` em uma thread daemon, se ainda não foi iniciada neste processo.
+
+    Retorna:
+        threading.Thread, ou None com o aquecimento desligado.
+    """
+    if not AQUECIMENTO_ATIVO:
+        return None
+    with _trava:
+        if nome not in _threads:
+            _threads[nome] = threading.Thread(target=_executar, args=(nome, tarefa),
+                                              name=f"aquecimento-{nome}", daemon=True)
+            _threads[nome].start()
+        return _threads[nome]
@@ -0,0 +1,313 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from glob import glob
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: a trava de arquivo só serializa as threads do próprio processo
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Base colunar derivada de treino/: apenas as colunas do modelo, em float32
+PASTA_BASE = os.path.join(".cache", "base_treino")
+ARQUIVO_MANIFESTO = "manifesto.json"
+ARQUIVO_DADOS = "dados.npy"
+
+# Leitura paralela dos CSVs de treino: threads (None = padrão do Python) e parser
+# ("c" ou "pyarrow", que libera o GIL e escala melhor com o número de núcleos)
+WORKERS_LEITURA = int(os.environ["DASHBOARD_WORKERS_LEITURA"]) if os.environ.get("DASHBOARD_WORKERS_LEITURA") else None
+MOTOR_CSV = os.environ.get("DASHBOARD_MOTOR_CSV", "pyarrow")
+
+_hashes_arquivos = {}
+
+
+def hash_arquivo(arquivo):
+    """
+    Calcula o SHA-256 do conteúdo de um arquivo, reaproveitando o valor
+    enquanto tamanho e data de modificação não mudarem.
+    """
+    info = os.stat(arquivo)
+    chave = (os.path.abspath(arquivo), info.st_size, info.st_mtime_ns)
+    if chave not in _hashes_arquivos:
+        h = hashlib.sha256()
+        with open(arquivo, "rb") as f:
+            for bloco in iter(lambda: f.read(1 << 20), b""):
+                h.update(bloco)
+        _hashes_arquivos[chave] = h.hexdigest()
+    return _hashes_arquivos[chave]
+
+
+def hash_conteudo(arquivo):
+    """
+    SHA-256 do conteúdo de um caminho, de bytes ou de um arquivo enviado pelo Streamlit.
+    """
+    if isinstance(arquivo, (str, os.PathLike)):
+        return hash_arquivo(arquivo)
+    if isinstance(arquivo, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(arquivo).hexdigest()
+    return hashlib.sha256(arquivo.getvalue()).hexdigest()
+
+
+def calcular_assinatura_treino(pasta_treino, colunas, params):
+    """
+    Gera a assinatura do treino a partir do conteúdo dos CSVs, das colunas e dos hiperparâmetros.
+
+    Retorna:
+        str: Hash hexadecimal que identifica o modelo treinado.
+    """
+    h = hashlib.sha256()
+    for arquivo in sorted(glob(os.path.join(pasta_treino, "*.csv"))):
+        h.update(os.path.basename(arquivo).encode("utf-8"))
+        h.update(hash_arquivo(arquivo).encode("ascii"))
+    h.update(json.dumps({"colunas": list(colunas), "params": params}, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _pasta_colunas(pasta_base, colunas):
+    # Cada conjunto de colunas tem a sua própria base
+    chave = hashlib.sha256(json.dumps(list(colunas)).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(pasta_base, chave)
+
+
+def salvar_atomico(caminho, escrever, modo="wb"):
+    """
+    Grava em um arquivo temporário e o renomeia, para que outros processos nunca
+    leiam um arquivo pela metade.
+
+    Parâmetros:
+        escrever (callable): Recebe o arquivo aberto em `modo` e grava o conteúdo.
+    """
+    # Nome temporário único também entre threads do mesmo processo (sessões do Streamlit, leitura paralela)
+    descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho) or ".",
+                                             prefix=f"{os.path.basename(caminho)}.", suffix=".tmp")
+    try:
+        with open(descritor, modo, encoding=None if "b" in modo else "utf-8") as f:
+            escrever(f)
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.remove(temporario)
+        raise
+
+
+_travas_processo = {}
+_trava_travas = threading.Lock()
+
+
+@contextmanager
+def trava_arquivo(caminho):
+    """
+    Trava exclusiva sobre `caminho` entre processos e threads (flock em `caminho`.lock),
+    para leituras seguidas de escrita do mesmo estado em disco.
+    """
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    if fcntl is None:
+        with _trava_travas:
+            trava = _travas_processo.setdefault(os.path.abspath(caminho), threading.Lock())
+        with trava:
+            yield
+        return
+    with open(f"{caminho}.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _ler_manifesto(pasta):
+    caminho = os.path.join(pasta, ARQUIVO_MANIFESTO)
+    if not os.path.exists(caminho):
+        return {"arquivos": {}}
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Manifesto da base de treino inválido, reconstruindo: {e}")
+        return {"arquivos": {}}
+
+
+def _motor_csv(motor):
+    if motor == "pyarrow":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            logger.warning("pyarrow não instalado; usando o parser padrão do pandas.")
+            return "c"
+    return motor
+
+
+def colunas_ausentes(arquivo, colunas):
+    """
+    Confere, lendo só a primeira linha (sem BOM UTF-8), quais colunas pedidas faltam no CSV.
+
+    Retorna:
+        list: Colunas ausentes, na ordem de `colunas` (vazia se o cabeçalho estiver completo).
+    """
+    with open(arquivo, encoding="utf-8-sig", errors="replace") as f:
+        cabecalho = {nome.strip().strip('"') for nome in f.readline().strip().split(",")}
+    return [coluna for coluna in colunas if coluna not in cabecalho]
+
+
+def validar_cabecalho(arquivo, colunas):
+    """
+    Confere, lendo só a primeira linha, se o CSV tem todas as colunas pedidas.
+
+    Retorna:
+        bool
+    """
+    return not colunas_ausentes(arquivo, colunas)
+
+
+def ingerir_csv(arquivo, colunas, motor=MOTOR_CSV):
+    """
+    Lê apenas as colunas do modelo de um CSV de treino, já em float32.
+    O cabeçalho é validado antes, sem ler o corpo de arquivos com esquema errado.
+    Arquivos recusados ficam de fora da base, com o motivo registrado no log.
+
+    Retorna:
+        np.ndarray (linhas x colunas) ou None se o arquivo não tiver as colunas esperadas
+        ou algum valor não puder ser lido como número.
+    """
+    faltando = colunas_ausentes(arquivo, colunas)
+    if faltando:
+        logger.warning(f"{arquivo} ignorado na base de treino: colunas ausentes ({', '.join(faltando)}).")
+        return None
+    try:
+        df = pd.read_csv(arquivo, usecols=colunas, dtype={c: np.float32 for c in colunas}, engine=_motor_csv(motor))
+    except ValueError as e:
+        logger.warning(f"{arquivo} ignorado na base de treino: valor não numérico ({e}).")
+        return None
+    return np.ascontiguousarray(df[colunas].dropna().to_numpy(dtype=np.float32))
+
+
+def _sincronizar_arquivo(arquivo, registro, pasta, colunas, motor):
+    # Executado nas threads do pool: hash, validação e ingestão de um arquivo
+    assinatura = hash_arquivo(arquivo)
+    if registro and registro["sha256"] == assinatura and os.path.exists(os.path.join(pasta, registro["npy"])):
+        return registro, False
+
+    dados = ingerir_csv(arquivo, colunas, motor)
+    if dados is None:
+        return None, False
+    npy = f"{assinatura}.npy"
+    salvar_atomico(os.path.join(pasta, npy), lambda f: np.save(f, dados))
+    logger.info(f"Arquivo ingerido na base de treino: {arquivo}")
+    return {"sha256": assinatura, "npy": npy, "linhas": int(len(dados))}, True
+
+
+def atualizar_base_treino(pasta_treino, colunas, pasta_base=PASTA_BASE, workers=WORKERS_LEITURA, motor=MOTOR_CSV,
+                          consolidar=True):
+    """
+    Sincroniza a base colunar com a pasta de treino, processando somente
+    arquivos novos ou alterados (em paralelo) e descartando os que foram removidos.
+
+    Parâmetros:
+        pasta_treino (str): Caminho para a pasta com arquivos CSV de treino.
+        colunas (list): Colunas do modelo.
+        pasta_base (str): Diretório onde a base é mantida.
+        workers (int): Threads de leitura (None = padrão do ThreadPoolExecutor).
+        motor (str): Parser do pandas ("c" ou "pyarrow").
+        consolidar (bool): Se False, só os blocos por arquivo são atualizados e o
+            .npy consolidado fica para a próxima leitura que precisar dele.
+
+    Retorna:
+        str: Diretório da base correspondente às colunas informadas.
+    """
+    pasta = _pasta_colunas(pasta_base, colunas)
+    os.makedirs(pasta, exist_ok=True)
+    manifesto = _ler_manifesto(pasta)
+    anteriores = manifesto["arquivos"]
+
+    arquivos = sorted(glob(os.path.join(pasta_treino, "*.csv")))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futuros = [
+            pool.submit(_sincronizar_arquivo, arquivo, anteriores.get(os.path.basename(arquivo)), pasta, colunas, motor)
+            for arquivo in arquivos
+        ]
+
+    # Resultados na ordem dos arquivos, para a base consolidada ser determinística
+    atuais = {}
+    alterou = False
+    for arquivo, futuro in zip(arquivos, futuros):
+        try:
+            registro, ingerido = futuro.result()
+        except Exception as e:
+            logger.error(f"Erro ao carregar {arquivo}: {e}")
+            continue
+        if registro is not None:
+            atuais[os.path.basename(arquivo)] = registro
+            alterou |= ingerido
+
+    if set(atuais) != set(anteriores):
+        alterou = True
+
+    # O manifesto registra quais blocos estão no .npy consolidado, que só é refeito quando pedido
+    blocos_atuais = [r["npy"] for r in atuais.values()]
+    consolidado_em_dia = (manifesto.get("consolidado") == blocos_atuais
+                          and os.path.exists(os.path.join(pasta, ARQUIVO_DADOS)))
+    if not alterou and (consolidado_em_dia or not consolidar):
+        return pasta
+
+    if consolidar and not consolidado_em_dia:
+        # Consolida os blocos por arquivo em um único .npy mapeável em memória
+        blocos = [np.load(os.path.join(pasta, npy), mmap_mode="r") for npy in blocos_atuais]
+        consolidado = np.concatenate(blocos) if blocos else np.empty((0, len(colunas)), dtype=np.float32)
+        salvar_atomico(os.path.join(pasta, ARQUIVO_DADOS), lambda f: np.save(f, consolidado))
+        consolidado_em_dia = True
+
+    manifesto = {"colunas": list(colunas), "arquivos": atuais,
+                 "consolidado": blocos_atuais if consolidado_em_dia else manifesto.get("consolidado")}
+    salvar_atomico(
+        os.path.join(pasta, ARQUIVO_MANIFESTO),
+        lambda f: json.dump(manifesto, f, indent=2),
+        modo="w",
+    )
+
+    # Remove blocos que não pertencem mais a nenhum arquivo de treino
+    em_uso = set(blocos_atuais) | {ARQUIVO_DADOS}
+    for bloco in glob(os.path.join(pasta, "*.npy")):
+        if os.path.basename(bloco) not in em_uso:
+            os.remove(bloco)
+
+    return pasta
+
+
+def carregar_base_treino(pasta_treino, colunas, pasta_base=PASTA_BASE):
+    """
+    Atualiza a base colunar e devolve os dados de treino mapeados em memória.
+
+    Retorna:
+        DataFrame float32 com as colunas do modelo (vazio se não houver dados).
+    """
+    pasta = atualizar_base_treino(pasta_treino, colunas, pasta_base)
+    dados = np.load(os.path.join(pasta, ARQUIVO_DADOS), mmap_mode="r")
+    if len(dados) == 0:
+        return pd.DataFrame()
+    return pd.DataFrame(dados, columns=list(colunas), copy=False)
+
+
+def blocos_base_treino(pasta_treino, colunas, pasta_base=PASTA_BASE):
+    """
+    Atualiza a base colunar e devolve os dados de cada arquivo de treino separadamente,
+    na mesma ordem da base consolidada (usado pelo treino incremental). Não refaz o
+    .npy consolidado, então o custo depende só dos arquivos novos ou alterados.
+
+    Retorna:
+        dict {nome do arquivo: {'sha256', 'dados' (np.ndarray mapeado em memória)}}.
+    """
+    pasta = atualizar_base_treino(pasta_treino, colunas, pasta_base, consolidar=False)
+    return {
+        nome: {"sha256": r["sha256"], "dados": np.load(os.path.join(pasta, r["npy"]), mmap_mode="r")}
+        for nome, r in _ler_manifesto(pasta)["arquivos"].items()
+    }
@@ -0,0 +1,115 @@
+import numpy as np
+import plotly.graph_objects as go
+
+# Pontos enviados ao navegador por série quando a resolução é reduzida
+ORCAMENTO_PONTOS = 2000
+# Acima disto a série é desenhada com WebGL (Scattergl) em vez de SVG
+LIMITE_WEBGL = 5000
+
+
+def indices_minmax(y, n_baldes):
+    """
+    Divide a série em `n_baldes` faixas e mantém o mínimo e o máximo de cada uma,
+    preservando os picos visíveis. Valores NaN são ignorados.
+
+    Retorna:
+        np.array ordenado com os índices selecionados (no máximo 2 * n_baldes).
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = y.size
+    if n <= 2 * n_baldes:
+        return np.arange(n)
+
+    tamanho = int(np.ceil(n / n_baldes))
+    n_baldes = int(np.ceil(n / tamanho))
+    preenchido = np.full(n_baldes * tamanho, np.nan)
+    preenchido[:n] = y
+    baldes = preenchido.reshape(n_baldes, tamanho)
+
+    # Faixas só com NaN (lacunas de sessões reamostradas) não têm mínimo nem máximo
+    validos = ~np.isnan(baldes)
+    com_dados = validos.any(axis=1)
+    deslocamento = np.arange(n_baldes) * tamanho
+    minimos = deslocamento + np.argmin(np.where(validos, baldes, np.inf), axis=1)
+    maximos = deslocamento + np.argmax(np.where(validos, baldes, -np.inf), axis=1)
+    return np.unique(np.concatenate(([0, n - 1], minimos[com_dados], maximos[com_dados])))
+
+
+def indices_lttb(x, y, n_saida):
+    """
+    Largest-Triangle-Three-Buckets: escolhe em cada faixa o ponto que forma o maior
+    triângulo com o ponto anterior escolhido e a média da faixa seguinte.
+
+    Retorna:
+        np.array ordenado com `n_saida` índices (incluindo o primeiro e o último).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = y.size
+    if n_saida >= n or n_saida < 3:
+        return np.arange(n)
+
+    limites = np.linspace(1, n - 1, n_saida - 1).astype(np.int64)
+    selecionados = np.empty(n_saida, dtype=np.int64)
+    selecionados[0], selecionados[-1] = 0, n - 1
+
+    anterior = 0
+    for balde in range(n_saida - 2):
+        inicio, fim = limites[balde], limites[balde + 1]
+        proximo_fim = limites[balde + 2] if balde + 2 < len(limites) else n
+        media_x = x[fim:proximo_fim].mean() if proximo_fim > fim else x[-1]
+        media_y = y[fim:proximo_fim].mean() if proximo_fim > fim else y[-1]
+
+        areas = np.abs(
+            (x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+            - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(areas))
+        selecionados[balde + 1] = anterior
+
+    return selecionados
+
+
+def decimar(x, y, max_pontos=ORCAMENTO_PONTOS, metodo='minmax'):
+    """
+    Reduz uma série a no máximo `max_pontos` pontos mantendo sua forma.
+
+    Parâmetros:
+        metodo (str): 'minmax' (mínimo/máximo por faixa) ou 'lttb'.
+
+    Retorna:
+        x, y (np.array) reduzidos.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if y.size <= max_pontos:
+        return x, y
+    if metodo == 'lttb':
+        indices = indices_lttb(x, y, max_pontos)
+    else:
+        indices = indices_minmax(y, max_pontos // 2)
+    return x[indices], y[indices]
+
+
+def criar_serie(x, y, max_pontos=ORCAMENTO_PONTOS, intervalo=None, resolucao_total=False, metodo='minmax', **kwargs):
+    """
+    Cria o trace de uma série temporal longa: recorta o intervalo pedido, reduz a
+    resolução (salvo se `resolucao_total`) e usa WebGL quando ainda há muitos pontos.
+
+    Parâmetros:
+        intervalo (tuple): (x mínimo, x máximo) exibido; None para a série inteira.
+        kwargs: Repassados ao go.Scatter/go.Scattergl (name, line, mode...).
+
+    Retorna:
+        go.Scatter ou go.Scattergl.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if intervalo is not None:
+        i0, i1 = np.searchsorted(x, intervalo[0], side='left'), np.searchsorted(x, intervalo[1], side='right')
+        x, y = x[i0:i1], y[i0:i1]
+    if not resolucao_total:
+        x, y = decimar(x, y, max_pontos, metodo)
+
+    classe = go.Scattergl if y.size > LIMITE_WEBGL else go.Scatter
+    return classe(x=x, y=y, **kwargs)
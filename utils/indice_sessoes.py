@@ -0,0 +1,276 @@
+"""
+Índice local (SQLite) com o resumo de cada sessão analisada.
+
+Sempre que um CSV é analisado (aba estatística, modelo ou lote), o resumo da
+sessão é gravado aqui: FPS, duração, média e mediana de cada ângulo, movimentos
+por articulação com durações e níveis de `classificar`, e a fração de frames
+em cada cluster. As consultas de coorte e de evolução leem só este índice,
+sem reabrir os CSVs.
+
+Sessões são identificadas pelo SHA-256 do conteúdo; reanalisar o mesmo
+arquivo atualiza o registro em vez de duplicá-lo.
+"""
+import os
+import sqlite3
+import logging
+from datetime import datetime
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from utils.processamento import (ARTICULACOES, limiares_relativos, segmentar_movimentos, resumir_movimentos)
+
+logger = logging.getLogger(__name__)
+
+ARQUIVO_INDICE = os.environ.get("DASHBOARD_INDICE_SESSOES", os.path.join(".cache", "indice_sessoes.sqlite"))
+
+# Mesmos parâmetros da seção de assimetria da aba estatística
+FRACAO_LIMIAR = 0.5
+HISTERESE = 0.1
+TEMPO_INICIAL = 2
+
+# Ordem cronológica das etapas do protocolo (deduzidas do nome do arquivo); as demais vêm depois
+ORDEM_ETAPAS = {"Início": 0, "Inicio": 0, "Final": 1}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS sessoes (
+    id INTEGER PRIMARY KEY,
+    sha256 TEXT NOT NULL UNIQUE,
+    nome TEXT NOT NULL,
+    paciente TEXT NOT NULL,
+    etapa TEXT,
+    analisada_em TEXT NOT NULL,
+    frames INTEGER NOT NULL,
+    fps REAL,
+    duracao REAL,
+    quadros_perdidos INTEGER
+);
+CREATE TABLE IF NOT EXISTS articulacoes (
+    sessao_id INTEGER NOT NULL REFERENCES sessoes(id) ON DELETE CASCADE,
+    articulacao TEXT NOT NULL,
+    media REAL,
+    mediana REAL,
+    movimentos INTEGER,
+    duracao_media REAL,
+    nivel_1 INTEGER,
+    nivel_2 INTEGER,
+    nivel_3 INTEGER,
+    PRIMARY KEY (sessao_id, articulacao)
+);
+CREATE TABLE IF NOT EXISTS clusters (
+    sessao_id INTEGER NOT NULL REFERENCES sessoes(id) ON DELETE CASCADE,
+    cluster INTEGER NOT NULL,
+    fracao REAL NOT NULL,
+    PRIMARY KEY (sessao_id, cluster)
+);
+CREATE INDEX IF NOT EXISTS sessoes_paciente ON sessoes(paciente);
+"""
+
+
+def conectar(caminho=ARQUIVO_INDICE):
+    """
+    Abre o índice, criando o arquivo e as tabelas se necessário.
+    O modo WAL permite leituras enquanto os processos do lote gravam.
+    """
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    conexao = sqlite3.connect(caminho, timeout=30)
+    conexao.execute("PRAGMA journal_mode=WAL")
+    conexao.execute("PRAGMA foreign_keys=ON")
+    conexao.executescript(ESQUEMA)
+    return conexao
+
+
+def identificar_sessao(nome):
+    """
+    Deduz paciente e etapa do nome do arquivo no padrão <paciente>_<etapa>_<atividade>.csv
+    (ex.: "A_Início_Puzzle.csv" -> ("A", "Início")).
+
+    Retorna:
+        tuple: (paciente, etapa ou None).
+    """
+    partes = os.path.splitext(os.path.basename(nome))[0].split("_")
+    return partes[0], (partes[1] if len(partes) > 1 else None)
+
+
+def resumir_sessao(sessao, nome, sha256, clusters=None):
+    """
+    Monta o resumo de uma sessão (utils.sessao.Sessao) para o índice.
+
+    Parâmetros:
+        clusters (np.array): Rótulos de cluster por frame, se o modelo foi aplicado.
+
+    Retorna:
+        dict com os campos da sessão, 'articulacoes' (list[dict]) e 'clusters' (dict).
+    """
+    paciente, etapa = identificar_sessao(nome)
+    fps = sessao.fps
+    info = sessao.info_fps or {}
+    angulos = sessao.quadro([a for a in ARTICULACOES if a in sessao.colunas])
+
+    articulacoes = []
+    if fps and len(angulos):
+        valores = angulos.to_numpy()
+        limiar_alto, limiar_baixo = limiares_relativos(valores, FRACAO_LIMIAR, HISTERESE)
+        resumo = resumir_movimentos(
+            segmentar_movimentos(valores, fps, limiar_alto, limiar_baixo, TEMPO_INICIAL), list(angulos.columns))
+        for coluna in angulos.columns:
+            niveis = resumo[coluna]['niveis']
+            articulacoes.append({
+                'articulacao': coluna,
+                'media': float(angulos[coluna].mean()),
+                'mediana': float(angulos[coluna].median()),
+                'movimentos': int(resumo[coluna]['quantidade']),
+                'duracao_media': float(resumo[coluna]['duracao_media']),
+                'nivel_1': int(niveis.get('Nível 1', 0)),
+                'nivel_2': int(niveis.get('Nível 2', 0)),
+                'nivel_3': int(niveis.get('Nível 3', 0)),
+            })
+
+    fracoes = {}
+    if clusters is not None and len(clusters):
+        rotulos, contagens = np.unique(clusters, return_counts=True)
+        fracoes = {int(r): float(c) / len(clusters) for r, c in zip(rotulos, contagens)}
+
+    return {
+        'sha256': sha256,
+        'nome': os.path.basename(nome),
+        'paciente': paciente,
+        'etapa': etapa,
+        'frames': len(sessao),
+        'fps': fps,
+        'duracao': len(sessao) / fps if fps else None,
+        'quadros_perdidos': info.get('quadros_perdidos'),
+        'articulacoes': articulacoes,
+        'clusters': fracoes,
+    }
+
+
+def registrar_sessao(resumo, caminho=ARQUIVO_INDICE):
+    """
+    Grava (ou atualiza) o resumo de uma sessão. Sem `clusters` no resumo, as
+    frações de clusters já registradas para a sessão são mantidas.
+
+    Retorna:
+        int: id da sessão no índice.
+    """
+    with closing(conectar(caminho)) as conexao, conexao:
+        campos = ('sha256', 'nome', 'paciente', 'etapa', 'frames', 'fps', 'duracao', 'quadros_perdidos')
+        conexao.execute(
+            f"INSERT INTO sessoes ({', '.join(campos)}, analisada_em) VALUES ({', '.join('?' * len(campos))}, ?) "
+            f"ON CONFLICT(sha256) DO UPDATE SET {', '.join(f'{c}=excluded.{c}' for c in campos[1:])}, "
+            f"analisada_em=excluded.analisada_em",
+            [resumo[c] for c in campos] + [datetime.now().isoformat(timespec='seconds')],
+        )
+        sessao_id = conexao.execute("SELECT id FROM sessoes WHERE sha256 = ?", (resumo['sha256'],)).fetchone()[0]
+
+        if resumo['articulacoes']:
+            conexao.execute("DELETE FROM articulacoes WHERE sessao_id = ?", (sessao_id,))
+            conexao.executemany(
+                "INSERT INTO articulacoes VALUES (:sessao_id, :articulacao, :media, :mediana, :movimentos, "
+                ":duracao_media, :nivel_1, :nivel_2, :nivel_3)",
+                [{'sessao_id': sessao_id, **a} for a in resumo['articulacoes']],
+            )
+        if resumo['clusters']:
+            registrar_clusters(resumo['sha256'], resumo['clusters'], conexao=conexao)
+    return sessao_id
+
+
+def registrar_clusters(sha256, fracoes, caminho=ARQUIVO_INDICE, conexao=None):
+    """
+    Atualiza a fração de frames por cluster de uma sessão já registrada.
+    """
+    if conexao is None:
+        with closing(conectar(caminho)) as nova, nova:
+            return registrar_clusters(sha256, fracoes, conexao=nova)
+    linha = conexao.execute("SELECT id FROM sessoes WHERE sha256 = ?", (sha256,)).fetchone()
+    if linha is None:
+        logger.warning(f"Sessão {sha256[:12]} não está no índice; clusters não registrados.")
+        return
+    conexao.execute("DELETE FROM clusters WHERE sessao_id = ?", (linha[0],))
+    conexao.executemany("INSERT INTO clusters VALUES (?, ?, ?)",
+                        [(linha[0], int(c), float(f)) for c, f in fracoes.items()])
+
+
+def sessao_registrada(sha256, caminho=ARQUIVO_INDICE):
+    if not os.path.exists(caminho):
+        return False
+    with closing(conectar(caminho)) as conexao:
+        return conexao.execute("SELECT 1 FROM sessoes WHERE sha256 = ?", (sha256,)).fetchone() is not None
+
+
+def indexar_sessao(sessao, nome, sha256, clusters=None, caminho=ARQUIVO_INDICE):
+    """
+    Resume e grava uma sessão; falhas no índice nunca interrompem a análise.
+    """
+    try:
+        return registrar_sessao(resumir_sessao(sessao, nome, sha256, clusters), caminho)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"Não foi possível registrar {nome} no índice de sessões: {e}")
+        return None
+
+
+def consultar(sql, parametros=(), caminho=ARQUIVO_INDICE):
+    """
+    Executa uma consulta no índice.
+
+    Retorna:
+        DataFrame (vazio se o índice ainda não existir).
+    """
+    if not os.path.exists(caminho):
+        return pd.DataFrame()
+    with closing(conectar(caminho)) as conexao:
+        return pd.read_sql_query(sql, conexao, params=parametros)
+
+
+def listar_pacientes(caminho=ARQUIVO_INDICE):
+    tabela = consultar("SELECT DISTINCT paciente FROM sessoes ORDER BY paciente", caminho=caminho)
+    return tabela['paciente'].tolist() if not tabela.empty else []
+
+
+def _ordem_sessoes():
+    # Etapa do protocolo (ORDEM_ETAPAS) e depois nome do arquivo; reanalisar não muda a ordem
+    casos = " ".join(f"WHEN '{etapa}' THEN {ordem}" for etapa, ordem in ORDEM_ETAPAS.items())
+    return f"s.paciente, CASE s.etapa {casos} ELSE {len(ORDEM_ETAPAS)} END, s.nome"
+
+
+def sessoes_dos_pacientes(pacientes, caminho=ARQUIVO_INDICE):
+    """
+    Retorna:
+        DataFrame com uma linha por sessão e articulação dos pacientes pedidos, na
+        ordem das etapas do protocolo (desempate pelo nome do arquivo), com a coluna
+        'sessao' numerando as sessões de cada paciente a partir de 1.
+    """
+    if not pacientes:
+        return pd.DataFrame()
+    marcadores = ", ".join("?" * len(pacientes))
+    tabela = consultar(
+        f"""
+        SELECT s.id, s.nome, s.paciente, s.etapa, s.analisada_em, s.frames, s.fps, s.duracao,
+               s.quadros_perdidos, a.articulacao, a.media, a.mediana, a.movimentos, a.duracao_media,
+               a.nivel_1, a.nivel_2, a.nivel_3
+        FROM sessoes s JOIN articulacoes a ON a.sessao_id = s.id
+        WHERE s.paciente IN ({marcadores})
+        ORDER BY {_ordem_sessoes()}, a.articulacao
+        """,
+        list(pacientes), caminho=caminho,
+    )
+    if not tabela.empty:
+        primeira_linha = ~tabela.duplicated('id')
+        tabela['sessao'] = primeira_linha.astype(int).groupby(tabela['paciente']).cumsum()
+    return tabela
+
+
+def fracoes_clusters(pacientes, caminho=ARQUIVO_INDICE):
+    """
+    Retorna:
+        DataFrame (nome, paciente, cluster, fracao) das sessões com modelo aplicado.
+    """
+    if not pacientes:
+        return pd.DataFrame()
+    marcadores = ", ".join("?" * len(pacientes))
+    return consultar(
+        f"SELECT s.nome, s.paciente, c.cluster, c.fracao FROM clusters c JOIN sessoes s ON s.id = c.sessao_id "
+        f"WHERE s.paciente IN ({marcadores}) ORDER BY {_ordem_sessoes()}, c.cluster",
+        list(pacientes), caminho=caminho,
+    )
@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import logging
+import contextvars
+from contextlib import nullcontext
+
+logger = logging.getLogger(__name__)
+
+# Medições da execução atual; None significa instrumentação desligada
+_medicoes = contextvars.ContextVar("medicoes_instrumentacao", default=None)
+_NULO = nullcontext()
+
+try:
+    _TAMANHO_PAGINA = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _TAMANHO_PAGINA = None
+
+
+def memoria_residente():
+    """
+    Memória residente (RSS) do processo em bytes, ou None se não for possível medir.
+    """
+    if _TAMANHO_PAGINA is not None:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * _TAMANHO_PAGINA
+        except (OSError, ValueError, IndexError):
+            pass
+    try:
+        import resource
+        # Pico (não o valor atual) em KiB no Linux; melhor aproximação disponível
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, OSError):
+        return None
+
+
+class _Etapa:
+    __slots__ = ("medicoes", "nome", "inicio", "rss_inicio")
+
+    def __init__(self, medicoes, nome):
+        self.medicoes = medicoes
+        self.nome = nome
+
+    def __enter__(self):
+        self.rss_inicio = memoria_residente()
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duracao = time.perf_counter() - self.inicio
+        rss_fim = memoria_residente()
+        delta = rss_fim - self.rss_inicio if rss_fim is not None and self.rss_inicio is not None else None
+        self.medicoes.append({"etapa": self.nome, "tempo_s": duracao, "rss_delta_bytes": delta})
+        return False
+
+
+def etapa(nome):
+    """
+    Mede tempo e variação de RSS de um trecho do pipeline:
+
+        with etapa("DBSCAN"):
+            ...
+
+    Com a instrumentação desligada devolve um contexto vazio, sem custo de medição.
+    """
+    medicoes = _medicoes.get()
+    if medicoes is None:
+        return _NULO
+    return _Etapa(medicoes, nome)
+
+
+def iniciar_coleta(medicoes=None):
+    """
+    Liga a instrumentação para a execução atual (thread/contexto).
+
+    Parâmetros:
+        medicoes (list): Lista que recebe cada etapa ao terminar (padrão: lista nova);
+            uma subclasse de list pode reagir a cada etapa, ex.: para informar progresso.
+
+    Retorna:
+        token a ser passado para `encerrar_coleta`.
+    """
+    return _medicoes.set([] if medicoes is None else medicoes)
+
+
+def encerrar_coleta(token, arquivo_metricas=None, **contexto):
+    """
+    Desliga a instrumentação e devolve as medições coletadas, gravando-as
+    (uma linha JSON por etapa) em `arquivo_metricas` se informado.
+
+    Retorna:
+        list[dict]: Medições na ordem em que as etapas terminaram.
+    """
+    medicoes = _medicoes.get() or []
+    _medicoes.reset(token)
+
+    if arquivo_metricas and medicoes:
+        try:
+            os.makedirs(os.path.dirname(arquivo_metricas) or ".", exist_ok=True)
+            carimbo = time.time()
+            with open(arquivo_metricas, "a", encoding="utf-8") as f:
+                for medicao in medicoes:
+                    f.write(json.dumps({"timestamp": carimbo, **contexto, **medicao}, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar métricas em {arquivo_metricas}: {e}")
+
+    for medicao in medicoes:
+        logger.debug(f"Etapa {medicao['etapa']}: {medicao['tempo_s'] * 1000:.1f} ms")
+    return medicoes
@@ -0,0 +1,87 @@
+"""
+Extração de características por janelas de movimento.
+
+Em vez de agrupar frames isolados (posturas), o modelo pode agrupar janelas de
+`tamanho` frames consecutivos (~1 s nas capturas de 24-25 FPS), descritas por:
+    - média de cada ângulo;
+    - amplitude (máximo - mínimo) de cada ângulo;
+    - velocidade média de cada ângulo (|variação| média, em graus por frame);
+    - assimetria esquerda/direita de cada articulação, (E - D) / (E + D) das médias.
+
+As janelas são views deslizantes do array original (sem cópia) e todas as
+estatísticas são calculadas de uma vez, vetorizadas.
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+SUFIXOS = ('media', 'amplitude', 'velocidade')
+
+
+def pares_lados(colunas):
+    """
+    Retorna:
+        list[(prefixo, indice_esquerdo, indice_direito)] das articulações com os dois lados em `colunas`.
+    """
+    colunas = list(colunas)
+    pares = []
+    for i, coluna in enumerate(colunas):
+        if 'L' in coluna:
+            prefixo, sufixo = coluna.split('L', 1)
+            direito = f'{prefixo}R{sufixo}'
+            if direito in colunas:
+                pares.append((prefixo, i, colunas.index(direito)))
+    return pares
+
+
+def nomes_caracteristicas(colunas):
+    nomes = [f'{coluna}_{sufixo}' for sufixo in SUFIXOS for coluna in colunas]
+    return nomes + [f'{prefixo}_assimetria' for prefixo, _, _ in pares_lados(colunas)]
+
+
+def extrair_janelas(angulos, tamanho, passo=None, pares=()):
+    """
+    Calcula as características de cada janela de `tamanho` frames.
+
+    Parâmetros:
+        angulos (np.array): Frames x articulações.
+        tamanho (int): Frames por janela.
+        passo (int): Deslocamento entre janelas (padrão: `tamanho`, sem sobreposição).
+        pares (list): Pares (prefixo, esquerdo, direito) de `pares_lados` para a assimetria.
+
+    Retorna:
+        np.array float32 (janelas x características), na ordem de `nomes_caracteristicas`.
+    """
+    angulos = np.asarray(angulos, dtype=np.float32)
+    passo = passo or tamanho
+    n_caracteristicas = 3 * angulos.shape[1] + len(pares)
+    if len(angulos) < tamanho:
+        return np.empty((0, n_caracteristicas), dtype=np.float32)
+
+    # (janelas, articulações, frames) sem copiar os dados
+    janelas = sliding_window_view(angulos, tamanho, axis=0)[::passo]
+    media = janelas.mean(axis=2)
+    amplitude = janelas.max(axis=2) - janelas.min(axis=2)
+    velocidade = np.abs(np.diff(janelas, axis=2)).mean(axis=2) if tamanho > 1 else np.zeros_like(media)
+
+    esquerdo = media[:, [e for _, e, _ in pares]]
+    direito = media[:, [d for _, _, d in pares]]
+    soma = esquerdo + direito
+    assimetria = np.divide(esquerdo - direito, soma, out=np.zeros_like(soma), where=soma != 0)
+    return np.hstack((media, amplitude, velocidade, assimetria)).astype(np.float32)
+
+
+def caracteristicas_janelas(dados, tamanho, passo=None):
+    """
+    Versão com DataFrame de `extrair_janelas`.
+
+    Parâmetros:
+        dados (DataFrame): Frames com as colunas de ângulos.
+
+    Retorna:
+        DataFrame (uma linha por janela; índice = primeiro frame da janela).
+    """
+    colunas = list(dados.columns)
+    valores = extrair_janelas(dados.to_numpy(), tamanho, passo, pares_lados(colunas))
+    inicio = dados.index.to_numpy()[::passo or tamanho][:len(valores)]
+    return pd.DataFrame(valores, columns=nomes_caracteristicas(colunas), index=inicio)
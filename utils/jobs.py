@@ -0,0 +1,292 @@
+"""
+Execução das análises de ML em segundo plano.
+
+O botão "Analisar" não roda mais o pipeline dentro do script do Streamlit:
+`enviar_analise` coloca o CSV em uma fila atendida por um pool limitado de
+processos e devolve na hora o id do job, que a seção do modelo consulta com
+`status` até o resultado ficar pronto. O id é o hash do conteúdo do arquivo e
+da assinatura do treino (CSVs de treino/, colunas e hiperparâmetros), então
+envios repetidos do mesmo arquivo (por qualquer usuário) compartilham o mesmo
+job e o mesmo resultado, e um treino alterado gera um job novo.
+
+Cada processo trabalhador informa as etapas concluídas (as mesmas de
+utils.instrumentacao) por uma fila, usada para mostrar o progresso.
+
+O índice de sessões semelhantes é sincronizado com treino/ e o histórico por
+tarefas próprias no pool (após o aquecimento e, no máximo a cada
+INTERVALO_SINCRONIZACAO segundos, após um envio), nunca dentro de uma análise.
+"""
+import io
+import os
+import time
+import queue
+import hashlib
+import logging
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from utils.instrumentacao import iniciar_coleta, encerrar_coleta
+
+logger = logging.getLogger(__name__)
+
+# Processos de análise em paralelo (padrão: núcleos da CPU)
+WORKERS_ANALISE = int(os.environ.get("DASHBOARD_WORKERS_ANALISE", "0")) or os.cpu_count() or 1
+# Jobs aguardando ou executando; envios acima disso são recusados
+MAX_JOBS_ATIVOS = int(os.environ.get("DASHBOARD_MAX_JOBS", str(4 * WORKERS_ANALISE)))
+# Jobs concluídos mantidos em memória com o resultado
+MAX_JOBS_GUARDADOS = 32
+# Intervalo mínimo (s) entre sincronizações do índice de similaridade com as pastas de sessões
+INTERVALO_SINCRONIZACAO = float(os.environ.get("DASHBOARD_INTERVALO_SINCRONIZACAO", "300"))
+
+NA_FILA, EXECUTANDO, CONCLUIDO, ERRO = "na_fila", "executando", "concluido", "erro"
+
+# Etapas principais de `processar_e_plotar`, na ordem, para a barra de progresso
+ETAPAS_ANALISE = [
+    "Carregamento do modelo",
+    "Leitura do CSV",
+    "Índice de sessões",
+    "Construção dos gráficos",
+    "Explicação dos outliers",
+    "Sessões semelhantes",
+]
+
+_pool = None
+_fila_progresso = None
+_jobs = OrderedDict()
+_trava = threading.Lock()
+_ultima_sincronizacao = None
+
+# Estado de cada processo trabalhador
+_fila_trabalhador = None
+
+
+class FilaCheia(Exception):
+    """Já há MAX_JOBS_ATIVOS análises na fila ou executando."""
+
+
+class _Job:
+    __slots__ = ("id", "nome", "futuro", "enviado_em", "etapa", "concluidas")
+
+    def __init__(self, id_job, nome, futuro):
+        self.id = id_job
+        self.nome = nome
+        self.futuro = futuro
+        self.enviado_em = time.time()
+        self.etapa = None
+        self.concluidas = 0
+
+
+class _ArquivoEnviado(io.BytesIO):
+    # Conteúdo do upload com o nome original, como o UploadedFile do Streamlit
+    def __init__(self, conteudo, name):
+        super().__init__(conteudo)
+        self.name = name
+
+
+class _ProgressoEtapas(list):
+    # Medições de utils.instrumentacao que também avisam o processo principal a cada etapa
+    def __init__(self, id_job):
+        super().__init__()
+        self.id_job = id_job
+
+    def append(self, medicao):
+        super().append(medicao)
+        _fila_trabalhador.put((self.id_job, medicao["etapa"]))
+
+
+def _iniciar_trabalhador(fila):
+    global _fila_trabalhador
+    _fila_trabalhador = fila
+
+
+def _executar_analise(id_job, conteudo, nome, pasta_treino, arquivo_metricas):
+    from views import ml_teste
+
+    token = iniciar_coleta(_ProgressoEtapas(id_job))
+    try:
+        resultado = ml_teste.processar_e_plotar(_ArquivoEnviado(conteudo, nome), pasta_treino)
+    finally:
+        medicoes = encerrar_coleta(token, arquivo_metricas, job=id_job, sessao=nome)
+    # As medições voltam com o resultado para o painel de desempenho da página
+    return resultado, list(medicoes)
+
+
+def _aquecer_trabalhador(pasta_treino):
+    from views import ml_teste
+    ml_teste.carregar_ou_treinar_modelo(pasta_treino, ml_teste.COLUNAS_MODELO)
+
+
+def _sincronizar_trabalhador(pasta_treino):
+    from views import ml_teste
+    try:
+        ml_teste.sincronizar_indice_similaridade(pasta_treino)
+    except Exception as e:
+        # Ninguém espera por esta tarefa: o erro só é registrado
+        logger.warning(f"Falha ao sincronizar o índice de similaridade: {e}")
+
+
+def _obter_pool():
+    global _pool, _fila_progresso
+    if multiprocessing.parent_process() is not None:
+        # Nunca cria um pool dentro de um processo trabalhador (ver o __spec__ de main.py)
+        raise RuntimeError("O pool de análises só pode ser criado no processo do dashboard.")
+    if _pool is None:
+        # spawn: o processo do Streamlit tem várias threads, e fork nesse caso não é seguro
+        contexto = multiprocessing.get_context("spawn")
+        _fila_progresso = contexto.Queue()
+        _pool = ProcessPoolExecutor(max_workers=WORKERS_ANALISE, mp_context=contexto,
+                                    initializer=_iniciar_trabalhador, initargs=(_fila_progresso,))
+        logger.info(f"Pool de análises iniciado com {WORKERS_ANALISE} processos.")
+    return _pool
+
+
+def _descartar_pool():
+    # Um processo do pool morreu (ex.: falta de memória): o executor fica quebrado para sempre
+    global _pool, _fila_progresso
+    _pool.shutdown(wait=False, cancel_futures=True)
+    _fila_progresso.close()
+    _pool = None
+    _fila_progresso = None
+
+
+def _submeter(funcao, *args):
+    # Chamado com _trava: recria o pool uma vez se o atual estiver quebrado
+    try:
+        return _obter_pool().submit(funcao, *args)
+    except BrokenProcessPool:
+        logger.warning("Pool de análises quebrado (um processo terminou de forma inesperada); recriando.")
+        _descartar_pool()
+        return _obter_pool().submit(funcao, *args)
+
+
+def _id_job(conteudo, pasta_treino):
+    # Import local: utils.base_treino carrega o pandas, que o main.py só importa depois da primeira pintura
+    from utils.base_treino import hash_conteudo, calcular_assinatura_treino
+    from utils.parametros_modelo import COLUNAS_MODELO, PARAMS_MODELO
+
+    h = hashlib.sha256(hash_conteudo(conteudo).encode("ascii"))
+    h.update(calcular_assinatura_treino(pasta_treino, COLUNAS_MODELO, PARAMS_MODELO).encode("ascii"))
+    return h.hexdigest()[:16]
+
+
+def _ativos():
+    return sum(not job.futuro.done() for job in _jobs.values())
+
+
+def _descartar_antigos():
+    concluidos = [id_job for id_job, job in _jobs.items() if job.futuro.done()]
+    for id_job in concluidos[:max(len(concluidos) - MAX_JOBS_GUARDADOS, 0)]:
+        del _jobs[id_job]
+
+
+def enviar_analise(conteudo, nome, pasta_treino, arquivo_metricas=None):
+    """
+    Coloca a análise de um CSV na fila, ou reaproveita o job do mesmo arquivo.
+
+    Parâmetros:
+        conteudo (bytes): Conteúdo do CSV enviado.
+        nome (str): Nome do arquivo.
+        arquivo_metricas (str): Se informado, as medições das etapas são gravadas nele.
+
+    Retorna:
+        str: Id do job.
+
+    Lança:
+        FilaCheia se já houver MAX_JOBS_ATIVOS jobs na fila ou executando.
+    """
+    id_job = _id_job(conteudo, pasta_treino)
+    with _trava:
+        job = _jobs.get(id_job)
+        if job is not None and not (job.futuro.done() and job.futuro.exception() is not None):
+            _jobs.move_to_end(id_job)
+            logger.info(f"Análise de {nome} já enviada; reaproveitando o job {id_job}.")
+            return id_job
+
+        if _ativos() >= MAX_JOBS_ATIVOS:
+            raise FilaCheia("Muitas análises em andamento; tente novamente em instantes.")
+
+        futuro = _submeter(_executar_analise, id_job, conteudo, nome, pasta_treino, arquivo_metricas)
+        _jobs[id_job] = _Job(id_job, nome, futuro)
+        _descartar_antigos()
+        _agendar_sincronizacao(pasta_treino)
+    logger.info(f"Análise de {nome} enviada como job {id_job}.")
+    return id_job
+
+
+def _agendar_sincronizacao(pasta_treino, forcar=False):
+    # Chamado com _trava: entra na fila depois das tarefas já enviadas
+    global _ultima_sincronizacao
+    agora = time.monotonic()
+    if not forcar and _ultima_sincronizacao is not None and agora - _ultima_sincronizacao < INTERVALO_SINCRONIZACAO:
+        return
+    _ultima_sincronizacao = agora
+    _submeter(_sincronizar_trabalhador, pasta_treino)
+
+
+def aquecer(pasta_treino):
+    """
+    Inicia um processo trabalhador e carrega (ou treina) o modelo nele. Em seguida,
+    agenda a sincronização do índice de similaridade, sem esperar por ela.
+
+    Retorna:
+        Future do carregamento do modelo.
+    """
+    with _trava:
+        futuro = _submeter(_aquecer_trabalhador, pasta_treino)
+        _agendar_sincronizacao(pasta_treino, forcar=True)
+        return futuro
+
+
+def _ler_progresso():
+    while True:
+        try:
+            id_job, etapa = _fila_progresso.get_nowait()
+        except queue.Empty:
+            return
+        job = _jobs.get(id_job)
+        if job is None:
+            continue
+        job.etapa = etapa
+        if etapa in ETAPAS_ANALISE:
+            job.concluidas = max(job.concluidas, ETAPAS_ANALISE.index(etapa) + 1)
+
+
+def status(id_job):
+    """
+    Retorna:
+        dict com 'estado' (na_fila, executando, concluido ou erro), 'progresso' (0 a 1),
+        'etapa' (última etapa concluída), 'nome', 'espera' (segundos desde o envio),
+        'resultado' (retorno de `processar_e_plotar`, se concluído), 'medicoes' (etapas
+        medidas no processo trabalhador, se concluído) e 'erro' (mensagem); ou None para
+        um id desconhecido.
+    """
+    with _trava:
+        if _fila_progresso is not None:
+            _ler_progresso()
+        job = _jobs.get(id_job)
+        if job is None:
+            return None
+
+        futuro = job.futuro
+        info = {
+            "nome": job.nome,
+            "etapa": job.etapa,
+            "progresso": job.concluidas / len(ETAPAS_ANALISE),
+            "espera": time.time() - job.enviado_em,
+            "resultado": None,
+            "medicoes": [],
+            "erro": None,
+        }
+        if not futuro.done():
+            info["estado"] = EXECUTANDO if futuro.running() else NA_FILA
+        elif futuro.exception() is not None:
+            info["estado"] = ERRO
+            info["erro"] = str(futuro.exception())
+        else:
+            info["estado"] = CONCLUIDO
+            info["progresso"] = 1.0
+            info["resultado"], info["medicoes"] = futuro.result()
+        return info
@@ -0,0 +1,106 @@
+import os
+import time
+import logging
+
+import numpy as np
+import pandas as pd
+
+from utils.parametros_modelo import COLUNAS_MODELO
+
+logger = logging.getLogger(__name__)
+
+# Ângulos do modelo e as rotações transversais dos ombros
+COLUNAS_ANGULOS = COLUNAS_MODELO + ['shoulderLTransv', 'shoulderRTransv']
+
+# Tipos compactos para o esquema exportado pelo software de captura
+TIPOS_COLUNAS = {'time': np.int32, **{coluna: np.int16 for coluna in COLUNAS_ANGULOS}}
+TIPO_PADRAO = np.float32
+
+# Acima deste tamanho o arquivo é lido em blocos
+LIMITE_LEITURA_EM_BLOCOS = 64 * 1024 * 1024
+TAMANHO_BLOCO = 100_000
+
+
+def _tamanho_arquivo(arquivo):
+    if hasattr(arquivo, 'size'):
+        return arquivo.size
+    if isinstance(arquivo, (str, os.PathLike)):
+        return os.path.getsize(arquivo)
+    return None
+
+
+def ler_cabecalho(arquivo):
+    """
+    Lê só a primeira linha do CSV (sem BOM UTF-8) e devolve os nomes das colunas.
+
+    Parâmetros:
+        arquivo (str | arquivo): Caminho ou arquivo enviado pelo Streamlit.
+
+    Retorna:
+        list[str]
+    """
+    if isinstance(arquivo, (str, os.PathLike)):
+        with open(arquivo, 'rb') as f:
+            linha = f.readline()
+    else:
+        arquivo.seek(0)
+        linha = arquivo.readline()
+        arquivo.seek(0)
+    if isinstance(linha, bytes):
+        linha = linha.decode('utf-8-sig', errors='replace')
+    return [nome.strip().strip('"') for nome in linha.lstrip('\ufeff').strip().split(',')]
+
+
+def _ler(arquivo, colunas, tipos, tamanho_bloco):
+    if hasattr(arquivo, 'seek'):
+        arquivo.seek(0)
+    if tamanho_bloco is None:
+        return pd.read_csv(arquivo, usecols=colunas, dtype=tipos)
+
+    blocos = []
+    for bloco in pd.read_csv(arquivo, usecols=colunas, dtype=tipos, chunksize=tamanho_bloco):
+        blocos.append(bloco)
+    if not blocos:
+        return pd.DataFrame({coluna: pd.Series(dtype=tipos[coluna]) for coluna in colunas})
+    return pd.concat(blocos, ignore_index=True)
+
+
+def ler_csv_sessao(arquivo, colunas, tamanho_bloco=None):
+    """
+    Lê apenas as colunas pedidas de um CSV de sessão, com tipos compactos
+    (int32 para o tempo, int16 para ângulos e float32 para o restante).
+
+    Parâmetros:
+        arquivo (str | arquivo): Caminho ou arquivo enviado pelo Streamlit.
+        colunas (list): Colunas a serem lidas.
+        tamanho_bloco (int): Linhas por bloco; se None, arquivos grandes
+            (acima de LIMITE_LEITURA_EM_BLOCOS) são lidos em blocos automaticamente.
+
+    Retorna:
+        df (DataFrame): Dados lidos, na ordem de `colunas`.
+        metricas (dict): Tempo de leitura (s), memória ocupada (bytes), linhas e se houve leitura em blocos.
+    """
+    tipos = {coluna: TIPOS_COLUNAS.get(coluna, TIPO_PADRAO) for coluna in colunas}
+    if tamanho_bloco is None:
+        tamanho = _tamanho_arquivo(arquivo)
+        if tamanho is not None and tamanho > LIMITE_LEITURA_EM_BLOCOS:
+            tamanho_bloco = TAMANHO_BLOCO
+
+    inicio = time.perf_counter()
+    try:
+        df = _ler(arquivo, colunas, tipos, tamanho_bloco)
+    except (ValueError, OverflowError):
+        # Valores ausentes ou fracionários não cabem em inteiros: recua para float32
+        logger.warning("Colunas inteiras com valores inválidos; usando float32.")
+        tipos = {coluna: TIPO_PADRAO for coluna in colunas}
+        df = _ler(arquivo, colunas, tipos, tamanho_bloco)
+    df = df[colunas]
+
+    metricas = {
+        'tempo_leitura': time.perf_counter() - inicio,
+        'memoria_bytes': int(df.memory_usage(index=False, deep=True).sum()),
+        'linhas': len(df),
+        'em_blocos': tamanho_bloco is not None,
+    }
+    logger.debug(f"CSV lido: {metricas}")
+    return df, metricas
@@ -0,0 +1,30 @@
+"""
+Colunas e hiperparâmetros do modelo, sem dependências pesadas: usados pelo pipeline
+(views.ml_teste) e pelo processo do dashboard para identificar os jobs de análise.
+"""
+import os
+
+# Ângulos articulares usados pelo modelo
+COLUNAS_MODELO = [
+    'shoulderLangle', 'shoulderRangle',
+    'elbowLangle', 'elbowRangle',
+    'hipLangle', 'hipRangle',
+    'kneeLangle', 'kneeRangle'
+]
+
+# Hiperparâmetros do pipeline; qualquer alteração invalida o cache de modelos.
+# "motor" escolhe o algoritmo de agrupamento (ver utils.agrupamento.MOTORES) e
+# "janela_frames" > 0 agrupa janelas de movimento em vez de frames (ver utils.janelas)
+PARAMS_MODELO = {
+    "n_components": 2,
+    "eps": 0.6,
+    "min_samples": 30,
+    "motor": os.environ.get("DASHBOARD_MOTOR_AGRUPAMENTO", "dbscan"),
+    "janela_frames": int(os.environ.get("DASHBOARD_JANELA_FRAMES", "0")),
+}
+
+# Com janelas há ~FPS vezes menos pontos, mais espalhados no plano do PCA;
+# valores escolhidos para ~5% de ruído nas janelas de 25 frames de treino/
+PARAMS_JANELAS = {"eps": 1.0, "min_samples": 10}
+if PARAMS_MODELO["janela_frames"]:
+    PARAMS_MODELO.update(PARAMS_JANELAS)
@@ -1,39 +1,318 @@
 import numpy as np
 import plotly.graph_objects as go
 
+from utils.decimacao import criar_serie, ORCAMENTO_PONTOS
+from utils.parametros_modelo import COLUNAS_MODELO
+
+def decodificar_tempo(tempo_hhmmss):
+    """
+    Converte os valores inteiros HHMMSS da coluna `time` em segundos corridos,
+    tratando a virada da meia-noite.
+
+    Retorna:
+        np.array (int64) com um valor por frame.
+    """
+    t = np.asarray(tempo_hhmmss, dtype=np.int64)
+    segundos = (t // 10000) * 3600 + (t // 100 % 100) * 60 + t % 100
+    if segundos.size > 1:
+        segundos = segundos + 86400 * np.r_[0, np.cumsum(np.diff(segundos) < 0)]
+    return segundos
+
+def estimar_fps(tempo_hhmmss):
+    """
+    Estima a taxa de quadros a partir da contagem de frames em cada segundo da captura.
+    O primeiro e o último segundo costumam estar incompletos e não entram na mediana.
+
+    Retorna:
+        dict com:
+            segundos (np.array): Segundo de cada grupo de frames.
+            fps_por_segundo (np.array): Frames capturados em cada um desses segundos.
+            fps_mediana (float): Taxa de quadros representativa da sessão (None se vazia).
+            quadros_perdidos (int): Frames faltantes estimados (segundos incompletos ou sem captura).
+            segundos_com_perda (np.array): Segundos com menos frames que o esperado.
+    """
+    segundos = decodificar_tempo(tempo_hhmmss)
+    if segundos.size == 0:
+        return {'segundos': segundos, 'fps_por_segundo': segundos, 'fps_mediana': None,
+                'quadros_perdidos': 0, 'segundos_com_perda': segundos}
+
+    inicios = np.r_[0, np.flatnonzero(np.diff(segundos)) + 1]
+    contagens = np.diff(np.r_[inicios, segundos.size])
+    segundos_grupo = segundos[inicios]
+
+    completos = contagens[1:-1] if contagens.size > 2 else contagens
+    fps_mediana = float(np.median(completos))
+
+    esperado = int(round(fps_mediana))
+    deficit = np.maximum(esperado - contagens, 0)
+    deficit[[0, -1]] = 0
+    sem_captura = np.maximum(np.diff(segundos_grupo) - 1, 0)
+
+    return {
+        'segundos': segundos_grupo,
+        'fps_por_segundo': contagens,
+        'fps_mediana': fps_mediana,
+        'quadros_perdidos': int(deficit.sum() + sem_captura.sum() * esperado),
+        'segundos_com_perda': segundos_grupo[deficit > 0],
+    }
+
 def calcular_frames_por_segundo(df, time):
-    df['seconds'] = df[time].astype(str).str[-2:]
-    df['count'] = (df['seconds'] != df['seconds'].shift(1)).cumsum()
-    result = df.groupby('count').size().reset_index(name='counts')
-    frames_por_seg = result.loc[1, 'counts'] if len(result) > 1 else None
-    return frames_por_seg
+    """
+    Taxa de quadros mediana da sessão (não altera o DataFrame recebido).
+    """
+    return estimar_fps(df[time].to_numpy())['fps_mediana']
 
-def calcular_tempos_picos(dados, frames_por_seg, amplitude_limite, tempo_inicial, duracao_minima=1):
-    tempo = np.arange(len(dados)) / frames_por_seg
-    mascara = dados > amplitude_limite
-    intervalos = np.diff(mascara.astype(int))
-    inicios_picos = np.where(intervalos == 1)[0]
-    finais_picos = np.where(intervalos == -1)[0]
+def eixo_tempo(tempo_hhmmss, frames_por_seg=None):
+    """
+    Reconstrói o instante de cada frame (s, a partir do primeiro segundo capturado),
+    distribuindo os frames de cada segundo uniformemente dentro dele. Os segundos
+    incompletos das pontas usam a taxa `frames_por_seg` (mediana, se omitida).
+
+    Retorna:
+        np.array (float64) com um instante por frame.
+    """
+    segundos = decodificar_tempo(tempo_hhmmss)
+    if segundos.size == 0:
+        return np.empty(0)
+    if frames_por_seg is None:
+        frames_por_seg = estimar_fps(tempo_hhmmss)['fps_mediana']
+
+    inicios = np.r_[0, np.flatnonzero(np.diff(segundos)) + 1]
+    contagens = np.diff(np.r_[inicios, segundos.size])
+    grupo = np.repeat(np.arange(inicios.size), contagens)
+    posicao = np.arange(segundos.size) - inicios[grupo]
+
+    passo = 1.0 / contagens[grupo]
+    deslocamento = np.zeros(segundos.size)
+    if inicios.size > 1:
+        # Primeiro segundo: frames alinhados ao final; último: ao início
+        primeiro = grupo == 0
+        ultimo = grupo == inicios.size - 1
+        passo[primeiro | ultimo] = 1.0 / max(frames_por_seg, contagens[0], contagens[-1])
+        deslocamento[primeiro] = 1.0 - contagens[0] * passo[primeiro]
 
-    if inicios_picos.size == 0 or finais_picos.size == 0:
-        return [], 0.0
+    tempo = segundos + deslocamento + posicao * passo
+    return tempo - segundos[0]
 
-    if finais_picos[0] < inicios_picos[0]:
-        finais_picos = finais_picos[1:]
-    if len(finais_picos) < len(inicios_picos):
-        inicios_picos = inicios_picos[:len(finais_picos)]
+def reamostrar_uniforme(tempo, valores, frames_por_seg):
+    """
+    Interpola os valores em uma grade de tempo uniforme com a taxa `frames_por_seg`.
 
-    inicios_picos = np.array([pico for pico in inicios_picos if tempo[pico] > tempo_inicial])
-    finais_picos = np.array([pico for pico in finais_picos if tempo[pico] > tempo_inicial])
+    Parâmetros:
+        tempo (np.array): Instante de cada frame (ver `eixo_tempo`).
+        valores (array 1D ou frames x colunas): Séries a reamostrar.
+        frames_por_seg (float): Taxa da grade uniforme.
 
-    picos_filtrados = [(inicio, final) for inicio, final in zip(inicios_picos, finais_picos)
-                       if ((tempo[final] - tempo[inicio]) * frames_por_seg) >= duracao_minima * frames_por_seg]
+    Retorna:
+        grade (np.array), valores_reamostrados (np.array float32 com o mesmo número de colunas).
+    """
+    valores = np.asarray(valores, dtype=np.float32)
+    if len(tempo) == 0:
+        return np.empty(0), valores
+    grade = np.arange(tempo[0], tempo[-1] + 1e-9, 1.0 / frames_por_seg)
+    if valores.ndim == 1:
+        return grade, np.interp(grade, tempo, valores).astype(np.float32)
+    colunas = [np.interp(grade, tempo, valores[:, j]) for j in range(valores.shape[1])]
+    return grade, np.column_stack(colunas).astype(np.float32)
 
-    duracoes_picos = [(tempo[final] - tempo[inicio]) for inicio, final in picos_filtrados]
-    media_duracao = sum(duracoes_picos) / len(duracoes_picos) if duracoes_picos else 0.0
+# Limite de elementos da máscara (limiares x frames) avaliada de uma vez na varredura
+MAX_ELEMENTOS_VARREDURA = 1 << 24
+
+def _intervalos_acima(mascara):
+    """
+    Localiza os intervalos completos acima do limiar em cada linha de uma máscara 2D.
+    Intervalos já em curso no primeiro frame ou ainda abertos no último são descartados.
+
+    Retorna:
+        linhas, inicios, finais (np.array): Linha da máscara, último frame antes
+        da subida e último frame acima do limiar de cada intervalo.
+    """
+    bordas = np.diff(mascara.astype(np.int8), axis=1)
+    linhas_i, inicios = np.nonzero(bordas == 1)
+    linhas_f, finais = np.nonzero(bordas == -1)
+
+    primeiro_final = np.r_[True, linhas_f[1:] != linhas_f[:-1]]
+    ultimo_inicio = np.r_[linhas_i[1:] != linhas_i[:-1], True]
+    manter_f = ~(primeiro_final & mascara[linhas_f, 0])
+    manter_i = ~(ultimo_inicio & mascara[linhas_i, -1])
+
+    return linhas_i[manter_i], inicios[manter_i], finais[manter_f]
+
+def _filtrar_intervalos(inicios, finais, frames_por_seg, tempo_inicial, duracao_minima):
+    return (inicios / frames_por_seg > tempo_inicial) & ((finais - inicios) >= duracao_minima * frames_por_seg)
+
+def calcular_tempos_picos(dados, frames_por_seg, amplitude_limite, tempo_inicial, duracao_minima=1):
+    dados = np.asarray(dados)
+    if dados.size < 2:
+        return np.empty((0, 2), dtype=np.intp), np.empty(0), 0.0
+
+    _, inicios, finais = _intervalos_acima((dados > amplitude_limite)[np.newaxis, :])
+    validos = _filtrar_intervalos(inicios, finais, frames_por_seg, tempo_inicial, duracao_minima)
+    inicios, finais = inicios[validos], finais[validos]
+
+    picos_filtrados = np.column_stack((inicios, finais))
+    duracoes_picos = (finais - inicios) / frames_por_seg
+    media_duracao = float(duracoes_picos.mean()) if duracoes_picos.size else 0.0
 
     return picos_filtrados, duracoes_picos, media_duracao
 
+def varrer_limiares(dados, frames_por_seg, limiares, tempo_inicial, duracao_minima=1):
+    """
+    Avalia vários limiares de amplitude de uma só vez, sem repetir o cálculo completo por limiar.
+
+    Retorna:
+        dict com arrays alinhados a `limiares`: quantidades de picos, média e mediana das durações (s).
+    """
+    dados = np.asarray(dados)
+    limiares = np.asarray(limiares, dtype=float)
+    quantidades = np.zeros(len(limiares), dtype=int)
+    medias = np.zeros(len(limiares))
+    medianas = np.zeros(len(limiares))
+
+    passo = max(1, MAX_ELEMENTOS_VARREDURA // max(dados.size, 1))
+    for inicio_bloco in range(0, len(limiares) if dados.size >= 2 else 0, passo):
+        bloco = limiares[inicio_bloco:inicio_bloco + passo]
+        linhas, inicios, finais = _intervalos_acima(dados[np.newaxis, :] > bloco[:, np.newaxis])
+        validos = _filtrar_intervalos(inicios, finais, frames_por_seg, tempo_inicial, duracao_minima)
+        linhas = linhas[validos]
+        duracoes = (finais[validos] - inicios[validos]) / frames_por_seg
+
+        contagem = np.bincount(linhas, minlength=len(bloco))
+        com_picos = contagem > 0
+        media = np.zeros(len(bloco))
+        media[com_picos] = np.bincount(linhas, weights=duracoes, minlength=len(bloco))[com_picos] / contagem[com_picos]
+
+        # Mediana por limiar: ordena (linha, duração) e toma o(s) elemento(s) central(is) de cada grupo
+        ordenadas = duracoes[np.lexsort((duracoes, linhas))]
+        deslocamentos = np.r_[0, np.cumsum(contagem)[:-1]]
+        mediana = np.zeros(len(bloco))
+        baixo = deslocamentos[com_picos] + (contagem[com_picos] - 1) // 2
+        alto = deslocamentos[com_picos] + contagem[com_picos] // 2
+        mediana[com_picos] = (ordenadas[baixo] + ordenadas[alto]) / 2
+
+        fatia = slice(inicio_bloco, inicio_bloco + len(bloco))
+        quantidades[fatia], medias[fatia], medianas[fatia] = contagem, media, mediana
+
+    return {'limiares': limiares, 'quantidades': quantidades, 'medias': medias, 'medianas': medianas}
+
+def sugerir_limiar(varredura):
+    """
+    Sugere o limiar central do maior patamar em que a quantidade de picos não muda,
+    ou seja, a região em que a detecção é menos sensível ao valor escolhido.
+
+    Retorna:
+        float ou None se nenhum limiar detectar picos.
+    """
+    quantidades = varredura['quantidades']
+    if not np.any(quantidades > 0):
+        return None
+
+    mudancas = np.flatnonzero(np.diff(quantidades) != 0) + 1
+    inicios = np.r_[0, mudancas]
+    finais = np.r_[mudancas, len(quantidades)]
+    tamanhos = np.where(quantidades[inicios] > 0, finais - inicios, 0)
+    maior = np.argmax(tamanhos)
+    return float(varredura['limiares'][(inicios[maior] + finais[maior] - 1) // 2])
+
+
+# Ângulos articulares usados na segmentação conjunta (pares esquerdo/direito)
+# Articulações analisadas: as mesmas do modelo (definidas em utils.parametros_modelo)
+ARTICULACOES = COLUNAS_MODELO
+
+TIPO_MOVIMENTO = np.dtype([
+    ('articulacao', np.uint8),
+    ('inicio', np.int32),
+    ('fim', np.int32),
+    ('duracao', np.float32),
+    ('pico', np.float32),
+])
+
+def limiares_relativos(angulos, fracao=0.5, histerese=0.1):
+    """
+    Define limiares de histerese por articulação a partir da faixa útil (percentis 5 e 95) de cada coluna.
+
+    Retorna:
+        limiar_alto, limiar_baixo (np.array): Um valor por coluna de `angulos`.
+    """
+    baixo, alto = np.percentile(np.asarray(angulos, dtype=np.float32), [5, 95], axis=0)
+    faixa = alto - baixo
+    limiar_alto = baixo + fracao * faixa
+    return limiar_alto, limiar_alto - histerese * faixa
+
+def segmentar_movimentos(angulos, frames_por_seg, limiar_alto, limiar_baixo=None, tempo_inicial=0, duracao_minima=1):
+    """
+    Segmenta movimentos em todas as articulações de uma vez, com limiar de histerese:
+    o movimento começa ao ultrapassar `limiar_alto` e só termina ao cair abaixo de `limiar_baixo`.
+
+    Parâmetros:
+        angulos (array frames x articulações): Matriz de ângulos.
+        frames_por_seg (float): Taxa de quadros da sessão.
+        limiar_alto, limiar_baixo (float ou array por articulação): Limiares de histerese
+            (sem `limiar_baixo`, equivale ao limiar simples de `calcular_tempos_picos`).
+        tempo_inicial (float): Segundos iniciais ignorados.
+        duracao_minima (float): Duração mínima do movimento em segundos.
+
+    Retorna:
+        np.ndarray estruturado (TIPO_MOVIMENTO) com um registro por movimento,
+        ordenado por articulação e início.
+    """
+    serie = np.asarray(angulos, dtype=np.float32).T
+    if serie.ndim != 2 or serie.shape[1] < 2:
+        return np.empty(0, dtype=TIPO_MOVIMENTO)
+
+    n_articulacoes, n_frames = serie.shape
+    alto = np.broadcast_to(np.asarray(limiar_alto, dtype=np.float32), (n_articulacoes,))[:, np.newaxis]
+    baixo = alto if limiar_baixo is None else \
+        np.broadcast_to(np.asarray(limiar_baixo, dtype=np.float32), (n_articulacoes,))[:, np.newaxis]
+
+    # Histerese: o estado só muda fora da faixa entre os limiares e se propaga adiante
+    acima = serie > alto
+    definido = acima | (serie <= baixo)
+    ultimo_definido = np.where(definido, np.arange(n_frames), -1)
+    np.maximum.accumulate(ultimo_definido, axis=1, out=ultimo_definido)
+    estado = np.take_along_axis(acima, np.maximum(ultimo_definido, 0), axis=1) & (ultimo_definido >= 0)
+
+    linhas, inicios, finais = _intervalos_acima(estado)
+    validos = _filtrar_intervalos(inicios, finais, frames_por_seg, tempo_inicial, duracao_minima)
+    linhas, inicios, finais = linhas[validos], inicios[validos], finais[validos]
+
+    movimentos = np.empty(len(linhas), dtype=TIPO_MOVIMENTO)
+    movimentos['articulacao'] = linhas
+    movimentos['inicio'] = inicios
+    movimentos['fim'] = finais
+    movimentos['duracao'] = (finais - inicios) / frames_por_seg
+    if len(linhas):
+        # Pico de cada movimento: máximo entre o primeiro e o último frame acima do limiar
+        limites = np.column_stack((linhas * n_frames + inicios + 1, linhas * n_frames + finais + 1)).ravel()
+        movimentos['pico'] = np.maximum.reduceat(serie.ravel(), limites)[::2]
+    return movimentos
+
+def resumir_movimentos(movimentos, articulacoes=ARTICULACOES):
+    """
+    Resume os movimentos segmentados por articulação, incluindo a classificação por nível.
+
+    Retorna:
+        dict {articulação: {'quantidade', 'duracao_media', 'pico_medio', 'niveis'}}.
+    """
+    resumo = {}
+    for indice, articulacao in enumerate(articulacoes):
+        selecionados = movimentos[movimentos['articulacao'] == indice]
+        niveis = classificar(selecionados['duracao'])
+        resumo[articulacao] = {
+            'quantidade': len(selecionados),
+            'duracao_media': float(selecionados['duracao'].mean()) if len(selecionados) else 0.0,
+            'pico_medio': float(selecionados['pico'].mean()) if len(selecionados) else 0.0,
+            'niveis': {nivel: niveis.count(nivel) for nivel in ('Nível 1', 'Nível 2', 'Nível 3')},
+        }
+    return resumo
+
+def indice_assimetria(esquerdo, direito):
+    """
+    Índice de assimetria (E - D) / (E + D): 0 é simétrico, positivo indica predomínio do lado esquerdo.
+    """
+    total = esquerdo + direito
+    return (esquerdo - direito) / total if total else 0.0
+
 
 def classificar(picos):
     classificacao = []
@@ -48,13 +327,36 @@ def classificar(picos):
 
 
 
-def plot_intervalos_picos(tempo, dados, amplitude_limite, picos_filtrados, titulo="Picos Identificados"):
+def plot_intervalos_picos(tempo, dados, amplitude_limite, picos_filtrados, titulo="Picos Identificados",
+                          max_pontos=ORCAMENTO_PONTOS, intervalo=None, resolucao_total=False):
     fig = go.Figure()
+    tempo = np.asarray(tempo)
+    amplitude_maxima = float(np.max(dados))
 
-    # Linha principal da amplitude
+    # Faixas destacadas dos picos: um único polígono preenchido, separado por NaN
+    picos = np.asarray(picos_filtrados, dtype=np.intp).reshape(-1, 2)
+    x0, x1 = tempo[picos[:, 0]], tempo[picos[:, 1]]
+    zeros = np.zeros(len(picos))
+    topo = np.full(len(picos), amplitude_maxima)
+    separador = np.full(len(picos), np.nan)
     fig.add_trace(go.Scatter(
-        x=tempo,
-        y=dados,
+        x=np.column_stack((x0, x0, x1, x1, x0, separador)).ravel(),
+        y=np.column_stack((zeros, topo, topo, zeros, zeros, separador)).ravel(),
+        mode='lines',
+        fill='toself',
+        fillcolor='rgba(255, 255, 0, 0.3)',
+        line=dict(width=0),
+        hoverinfo='skip',
+        name='Movimento Esperado'
+    ))
+
+    # Linha principal da amplitude (resolução reduzida para sessões longas)
+    fig.add_trace(criar_serie(
+        tempo,
+        dados,
+        max_pontos=max_pontos,
+        intervalo=intervalo,
+        resolucao_total=resolucao_total,
         mode='lines',
         name='Amplitude',
         line=dict(color='blue')
@@ -69,27 +371,13 @@ def plot_intervalos_picos(tempo, dados, amplitude_limite, picos_filtrados, titul
         line=dict(color='red', dash='dash')
     ))
 
-    # Faixas destacadas dos picos
-    for inicio, fim in picos_filtrados:
-        fig.add_shape(
-            type='rect',
-            x0=tempo[inicio],
-            x1=tempo[fim],
-            y0=0,
-            y1=max(dados),
-            fillcolor='yellow',
-            opacity=0.3,
-            line_width=0,
-            layer="below"
-        )
-
     # Layout do gráfico
     fig.update_layout(
         title=titulo,
         xaxis_title='Tempo (segundos)',
         yaxis_title='Amplitude de Movimento (graus)',
-        yaxis=dict(range=[0, max(dados)]),
-        xaxis=dict(range=[0, max(tempo)]),
+        yaxis=dict(range=[0, amplitude_maxima]),
+        xaxis=dict(range=list(intervalo) if intervalo is not None else [0, tempo[-1]]),
         legend=dict(x=0.01, y=0.99),
         height=400
     )
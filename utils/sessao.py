@@ -0,0 +1,134 @@
+"""
+Modelo compacto de uma sessão capturada, compartilhado pelas views.
+
+Em vez de um DataFrame com todas as colunas do CSV, a sessão guarda arrays
+NumPy contíguos por tipo: tempo HHMMSS (int32), ângulos (int16, uma linha por
+articulação) e, só quando pedidas, coordenadas xyz (float32). O eixo de tempo
+e o FPS são calculados uma vez na leitura. As views pegam colunas como views
+dos arrays (sem cópia) e só montam DataFrames com as colunas que usam.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from utils.leitura import ler_csv_sessao, ler_cabecalho, COLUNAS_ANGULOS
+from utils.processamento import estimar_fps, eixo_tempo
+
+logger = logging.getLogger(__name__)
+
+COLUNAS_COORDENADAS = [
+    f'{lado}_{parte}{eixo}'
+    for parte in ('shoulder', 'elbow', 'wrist', 'hip', 'knee', 'ankle')
+    for lado in ('l', 'r')
+    for eixo in 'XYZ'
+]
+
+
+class Sessao:
+    """
+    Dados de uma sessão em arrays contíguos.
+
+    Atributos:
+        tempo (np.array int32): Coluna `time` (HHMMSS), ou None se o arquivo não a tiver.
+        segundos (np.array float32): Instante de cada frame desde o início da sessão.
+        angulos (np.array): Ângulos (articulações x frames), int16 ou float32 se houver falhas.
+        coordenadas (np.array float32): Coordenadas (colunas x frames), ou None se não lidas.
+        info_fps (dict): Resultado de `estimar_fps`, ou None sem a coluna `time`.
+    """
+    __slots__ = ("tempo", "segundos", "angulos", "coordenadas", "info_fps", "_indices")
+
+    def __init__(self, tempo, angulos, nomes_angulos, coordenadas=None, nomes_coordenadas=()):
+        self.tempo = tempo
+        self.angulos = angulos
+        self.coordenadas = coordenadas
+        self._indices = {nome: ('angulos', i) for i, nome in enumerate(nomes_angulos)}
+        self._indices.update({nome: ('coordenadas', i) for i, nome in enumerate(nomes_coordenadas)})
+
+        if tempo is not None and len(tempo):
+            self.info_fps = estimar_fps(tempo)
+            self.segundos = eixo_tempo(tempo, self.info_fps['fps_mediana']).astype(np.float32)
+        else:
+            self.info_fps = None
+            self.segundos = None
+
+    @classmethod
+    def de_csv(cls, arquivo, angulos=COLUNAS_ANGULOS, coordenadas=False, tamanho_bloco=None):
+        """
+        Lê um CSV de sessão com apenas as colunas necessárias.
+
+        Parâmetros:
+            arquivo (str | arquivo): Caminho ou arquivo enviado pelo Streamlit.
+            angulos (list): Ângulos a carregar.
+            coordenadas (bool): Se True, carrega também as coordenadas xyz.
+
+        Retorna:
+            sessao (Sessao), metricas (dict) da leitura (ver `ler_csv_sessao`).
+
+        Lança:
+            ValueError se faltar alguma das colunas pedidas.
+        """
+        angulos = list(angulos)
+        nomes_coordenadas = COLUNAS_COORDENADAS if coordenadas else []
+        colunas = angulos + nomes_coordenadas
+
+        # Colunas conferidas pelo cabeçalho antes de ler o corpo
+        cabecalho = set(ler_cabecalho(arquivo))
+        faltando = [coluna for coluna in colunas if coluna not in cabecalho]
+        if faltando:
+            raise ValueError(f"Colunas ausentes no CSV: {', '.join(faltando)}")
+        # Arquivos sem a coluna `time` ainda podem ser analisados pelo modelo
+        com_tempo = 'time' in cabecalho
+
+        df, metricas = ler_csv_sessao(arquivo, ['time'] + colunas if com_tempo else colunas, tamanho_bloco)
+        tempo = df['time'].to_numpy() if com_tempo else None
+
+        sessao = cls(
+            tempo,
+            np.ascontiguousarray(df[angulos].to_numpy().T),
+            angulos,
+            np.ascontiguousarray(df[nomes_coordenadas].to_numpy(dtype=np.float32).T) if coordenadas else None,
+            nomes_coordenadas,
+        )
+        metricas['memoria_bytes'] = sessao.memoria_bytes
+        return sessao, metricas
+
+    def __len__(self):
+        return self.angulos.shape[1]
+
+    @property
+    def fps(self):
+        return self.info_fps['fps_mediana'] if self.info_fps else None
+
+    @property
+    def colunas(self):
+        return list(self._indices)
+
+    @property
+    def memoria_bytes(self):
+        arrays = (self.tempo, self.segundos, self.angulos, self.coordenadas)
+        return int(sum(a.nbytes for a in arrays if a is not None))
+
+    def coluna(self, nome):
+        """
+        Retorna:
+            np.array: View (sem cópia) da coluna pedida.
+        """
+        if nome == 'time' and self.tempo is not None:
+            return self.tempo
+        if nome not in self._indices:
+            raise KeyError(nome)
+        grupo, indice = self._indices[nome]
+        return getattr(self, grupo)[indice]
+
+    def quadro(self, colunas=None):
+        """
+        Monta um DataFrame apenas com as colunas pedidas (padrão: ângulos),
+        reaproveitando a memória dos arrays da sessão.
+        """
+        if colunas is None:
+            colunas = [nome for nome, (grupo, _) in self._indices.items() if grupo == 'angulos']
+        return pd.DataFrame({nome: self.coluna(nome) for nome in colunas}, copy=False)
+
+    def __getitem__(self, nome):
+        return self.coluna(nome)
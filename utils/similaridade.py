@@ -0,0 +1,290 @@
+"""
+Busca de sessões históricas semelhantes.
+
+Cada sessão vira um vetor de tamanho fixo (embedding):
+    - percentis 10, 50 e 90, média e desvio de cada ângulo (em fração de 180°);
+    - histograma dos rótulos de cluster do modelo, em fração dos pontos da sessão.
+
+Os vetores ficam em uma BallTree persistida em disco, uma por modelo (o
+histograma só faz sentido para os clusters de um mesmo modelo). Sessões novas
+entram primeiro em uma lista pendente, comparada por força bruta, e a árvore é
+reconstruída quando essa lista cresce; a busca nunca reabre os CSVs.
+
+Vários processos do pool de análises gravam o mesmo índice: `salvar` relê o
+arquivo sob uma trava e reaplica nele só as sessões acrescentadas por este
+processo, e `recarregar` troca a cópia em memória quando outro processo gravou.
+"""
+import os
+import hashlib
+import logging
+
+import joblib
+import numpy as np
+from sklearn.neighbors import BallTree
+
+from utils.base_treino import salvar_atomico, trava_arquivo
+
+logger = logging.getLogger(__name__)
+
+PASTA_SIMILARIDADE = os.path.join(".cache", "similaridade")
+ARQUIVO_INDICE = "indice.joblib"
+
+PERCENTIS = (10, 50, 90)
+# Peso do histograma de clusters em relação às estatísticas dos ângulos
+PESO_CLUSTERS = 1.0
+# A árvore é reconstruída quando as pendentes passam de max(MINIMO, FRACAO * árvore)
+MINIMO_PENDENTES = 64
+FRACAO_PENDENTES = 0.1
+
+
+def chave_modelo(scaler, pca, modelo):
+    """
+    Identifica o modelo pelos parâmetros aprendidos e pelos rótulos dos núcleos.
+    """
+    h = hashlib.sha256()
+    for array in (scaler.mean_, scaler.scale_, pca.components_, modelo.indice_nucleos_[1]):
+        h.update(np.ascontiguousarray(array).tobytes())
+    return h.hexdigest()[:16]
+
+
+def rotulos_modelo(modelo):
+    """
+    Retorna:
+        np.array: Rótulos possíveis do modelo, com -1 (fora do padrão) primeiro.
+    """
+    return np.union1d([-1], np.unique(modelo.indice_nucleos_[1])).astype(np.int64)
+
+
+def embedding_sessao(angulos, clusters, rotulos):
+    """
+    Parâmetros:
+        angulos (array frames x articulações): Ângulos da sessão, sem valores nulos.
+        clusters (array): Rótulo de cluster de cada ponto da sessão.
+        rotulos (array): Saída de `rotulos_modelo`.
+
+    Retorna:
+        np.array float32 de tamanho 5 * articulações + len(rotulos).
+    """
+    angulos = np.asarray(angulos, dtype=np.float32) / 180.0
+    estatisticas = np.vstack((
+        np.percentile(angulos, PERCENTIS, axis=0),
+        angulos.mean(axis=0),
+        angulos.std(axis=0),
+    )).ravel()
+
+    clusters = np.asarray(clusters)
+    histograma = np.zeros(len(rotulos), dtype=np.float32)
+    if clusters.size:
+        posicoes = np.searchsorted(rotulos, clusters)
+        conhecidos = (posicoes < len(rotulos)) & (rotulos[np.minimum(posicoes, len(rotulos) - 1)] == clusters)
+        np.add.at(histograma, posicoes[conhecidos], 1.0)
+        histograma /= clusters.size
+    return np.r_[estatisticas, PESO_CLUSTERS * histograma].astype(np.float32)
+
+
+def _assinatura_arquivo(caminho):
+    try:
+        info = os.stat(caminho)
+    except FileNotFoundError:
+        return None
+    return info.st_ino, info.st_size, info.st_mtime_ns
+
+
+class IndiceSimilaridade:
+    """
+    Embeddings das sessões de um modelo, com BallTree e lista de pendentes.
+
+    Atributos:
+        embeddings (np.array float32): Um vetor por sessão; os `n_arvore` primeiros estão na árvore.
+        sessoes (list[dict]): nome, sha256, origem e, para arquivos de pasta, caminho/tamanho/mtime.
+    """
+    __slots__ = ("caminho", "embeddings", "sessoes", "arvore", "n_arvore", "_hashes", "_caminhos",
+                 "_alteracoes", "_assinatura")
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.embeddings = None
+        self.sessoes = []
+        self.arvore = None
+        self.n_arvore = 0
+        self._hashes = {}
+        self._caminhos = {}
+        # Sessões acrescentadas desde a última leitura ou gravação, reaplicadas em `salvar`
+        self._alteracoes = []
+        # (inode, tamanho, mtime) do arquivo quando foi lido ou gravado por este processo
+        self._assinatura = None
+
+    @classmethod
+    def carregar(cls, chave, pasta_base=PASTA_SIMILARIDADE):
+        return cls._ler(os.path.join(pasta_base, chave, ARQUIVO_INDICE))
+
+    @classmethod
+    def _ler(cls, caminho):
+        indice = cls(caminho)
+        assinatura = _assinatura_arquivo(caminho)
+        if assinatura is not None:
+            try:
+                estado = joblib.load(caminho)
+                indice.embeddings, indice.sessoes = estado["embeddings"], estado["sessoes"]
+                indice.arvore, indice.n_arvore = estado["arvore"], estado["n_arvore"]
+            except Exception as e:
+                logger.warning(f"Índice de similaridade inválido em {caminho}, recriando: {e}")
+                indice = cls(caminho)
+        indice._assinatura = assinatura
+        indice._hashes = {sessao["sha256"]: i for i, sessao in enumerate(indice.sessoes)}
+        indice._caminhos = {sessao["caminho"]: i for i, sessao in enumerate(indice.sessoes) if "caminho" in sessao}
+        return indice
+
+    def _copiar_de(self, outro):
+        for atributo in ("embeddings", "sessoes", "arvore", "n_arvore", "_hashes", "_caminhos", "_assinatura"):
+            setattr(self, atributo, getattr(outro, atributo))
+
+    def recarregar(self):
+        """
+        Relê o arquivo se outro processo o gravou depois da última leitura, mantendo as
+        sessões acrescentadas aqui e ainda não gravadas.
+        """
+        if _assinatura_arquivo(self.caminho) == self._assinatura:
+            return
+        atual = self._ler(self.caminho)
+        for embedding, sessao in self._alteracoes:
+            atual._aplicar(embedding, sessao)
+        self._copiar_de(atual)
+
+    def __len__(self):
+        return len(self.sessoes)
+
+    def __contains__(self, sha256):
+        return sha256 in self._hashes
+
+    def salvar(self):
+        """
+        Grava o índice. Sob a trava do arquivo, parte do que está em disco (se outro
+        processo gravou depois da nossa leitura) e reaplica as sessões acrescentadas aqui.
+        """
+        with trava_arquivo(self.caminho):
+            self.recarregar()
+            estado = {"embeddings": self.embeddings, "sessoes": self.sessoes,
+                      "arvore": self.arvore, "n_arvore": self.n_arvore}
+            salvar_atomico(self.caminho, lambda f: joblib.dump(estado, f))
+            self._assinatura = _assinatura_arquivo(self.caminho)
+        self._alteracoes = []
+
+    def adicionar(self, embedding, nome, sha256, origem, **extras):
+        """
+        Acrescenta uma sessão, ou substitui a do mesmo `caminho` (arquivos de pasta) ou
+        do mesmo sha256 (sessões enviadas). Não grava em disco.
+        """
+        embedding = np.asarray(embedding, dtype=np.float32)
+        sessao = {"nome": nome, "sha256": sha256, "origem": origem, **extras}
+        self._alteracoes.append((embedding, sessao))
+        self._aplicar(embedding, sessao)
+
+    def _aplicar(self, embedding, sessao):
+        embedding = embedding[np.newaxis, :]
+        sha256, caminho = sessao["sha256"], sessao.get("caminho")
+        posicao = self._caminhos.get(caminho) if caminho else None
+        if posicao is None and sha256 in self._hashes and "caminho" not in self.sessoes[self._hashes[sha256]]:
+            # Um arquivo de pasta com o conteúdo de uma sessão enviada toma o lugar dela
+            posicao = self._hashes[sha256]
+        if posicao is not None:
+            anterior = self.sessoes[posicao]
+            if self._hashes.get(anterior["sha256"]) == posicao:
+                del self._hashes[anterior["sha256"]]
+            self._hashes[sha256] = posicao
+            if caminho:
+                self._caminhos[caminho] = posicao
+            self.sessoes[posicao] = sessao
+            if not np.array_equal(self.embeddings[posicao], embedding[0]):
+                self.embeddings[posicao] = embedding[0]
+                if posicao < self.n_arvore:
+                    # A árvore guarda uma cópia do vetor antigo
+                    self.reconstruir()
+        else:
+            self._hashes[sha256] = len(self.sessoes)
+            if caminho:
+                self._caminhos[caminho] = len(self.sessoes)
+            self.sessoes.append(sessao)
+            self.embeddings = embedding if self.embeddings is None else np.vstack((self.embeddings, embedding))
+
+        pendentes = len(self.sessoes) - self.n_arvore
+        if pendentes > max(MINIMO_PENDENTES, FRACAO_PENDENTES * self.n_arvore):
+            self.reconstruir()
+
+    def reconstruir(self):
+        if self.embeddings is not None and len(self.embeddings):
+            self.arvore = BallTree(self.embeddings)
+            self.n_arvore = len(self.embeddings)
+            logger.info(f"Índice de similaridade reconstruído com {self.n_arvore} sessões.")
+
+    def sincronizar(self, pastas, embutir):
+        """
+        Indexa os CSVs das pastas que ainda não estão no índice (ou mudaram desde a última vez).
+
+        Parâmetros:
+            pastas (list): Pastas de sessões (as inexistentes são ignoradas).
+            embutir (callable): caminho -> (embedding, sha256), ou None se o arquivo for inválido.
+
+        Retorna:
+            int: Sessões acrescentadas ou atualizadas (um arquivo alterado substitui a entrada do mesmo caminho).
+        """
+        self.recarregar()
+        conhecidos = {s["caminho"]: (s["tamanho"], s["mtime"]) for s in self.sessoes if "caminho" in s}
+        novos = 0
+        for pasta in pastas:
+            if not os.path.isdir(pasta):
+                continue
+            for entrada in sorted(os.scandir(pasta), key=lambda e: e.name):
+                if not entrada.name.endswith(".csv"):
+                    continue
+                info = entrada.stat()
+                caminho = os.path.abspath(entrada.path)
+                if conhecidos.get(caminho) == (info.st_size, info.st_mtime):
+                    continue
+                resultado = embutir(entrada.path)
+                if resultado is None:
+                    continue
+                embedding, sha256 = resultado
+                self.adicionar(embedding, entrada.name, sha256, pasta,
+                               caminho=caminho, tamanho=info.st_size, mtime=info.st_mtime)
+                novos += 1
+        if novos:
+            logger.info(f"{novos} sessões acrescentadas ao índice de similaridade.")
+            self.salvar()
+        return novos
+
+    def buscar(self, embedding, k=5, excluir=None):
+        """
+        As `k` sessões mais próximas (distância euclidiana entre embeddings).
+
+        Parâmetros:
+            excluir (str): sha256 a ignorar (a própria sessão consultada).
+
+        Retorna:
+            list[dict]: Sessões com a chave 'distancia', da mais próxima à mais distante.
+        """
+        if not self.sessoes:
+            return []
+        consulta = np.asarray(embedding, dtype=np.float32)[np.newaxis, :]
+        quantidade = k + (excluir in self._hashes)
+
+        distancias, posicoes = [], []
+        if self.arvore is not None and self.n_arvore:
+            d, p = self.arvore.query(consulta, k=min(quantidade, self.n_arvore))
+            distancias.append(d[0])
+            posicoes.append(p[0])
+        if len(self.sessoes) > self.n_arvore:
+            pendentes = self.embeddings[self.n_arvore:]
+            distancias.append(np.linalg.norm(pendentes - consulta, axis=1))
+            posicoes.append(np.arange(self.n_arvore, len(self.sessoes)))
+
+        distancias, posicoes = np.concatenate(distancias), np.concatenate(posicoes)
+        resultado = []
+        for i in np.argsort(distancias, kind="stable"):
+            sessao = self.sessoes[posicoes[i]]
+            if sessao["sha256"] == excluir:
+                continue
+            resultado.append({**sessao, "distancia": float(distancias[i])})
+            if len(resultado) == k:
+                break
+        return resultado
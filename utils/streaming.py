@@ -0,0 +1,343 @@
+"""
+Modo ao vivo: acompanha um CSV que o software de captura ainda está gravando
+(ou um pipe nomeado no lugar dele) e detecta os movimentos à medida que terminam.
+
+Toda a memória é limitada: os frames recentes ficam em um buffer circular de
+tamanho fixo, o FPS é estimado a partir dos últimos segundos completos e cada
+ombro tem um detector de estado com o mesmo critério de `calcular_tempos_picos`.
+O custo de cada atualização é proporcional apenas aos frames novos.
+"""
+import os
+import io
+import errno
+import logging
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from utils.processamento import classificar
+
+logger = logging.getLogger(__name__)
+
+# Frames mantidos no buffer circular (~5 min a 30 FPS)
+CAPACIDADE_PADRAO = 10_000
+# Segundos completos usados na estimativa do FPS ao vivo
+SEGUNDOS_FPS = 10
+# FPS assumido até o primeiro segundo completo de captura
+FPS_INICIAL = 30.0
+# Movimentos recentes mantidos para exibição
+MAX_MOVIMENTOS_RECENTES = 200
+# Bytes lidos por chamada ao sistema
+TAMANHO_LEITURA = 1 << 20
+# Bytes lidos por atualização; um atraso maior é consumido nas atualizações seguintes
+MAX_BYTES_ATUALIZACAO = 4 * TAMANHO_LEITURA
+
+
+class BufferCircular:
+    """
+    Buffer de tamanho fixo com as últimas `capacidade` linhas de uma matriz float32.
+    """
+    __slots__ = ("dados", "escritos")
+
+    def __init__(self, capacidade, n_colunas):
+        self.dados = np.empty((capacidade, n_colunas), dtype=np.float32)
+        self.escritos = 0
+
+    def __len__(self):
+        return min(self.escritos, len(self.dados))
+
+    def acrescentar(self, linhas):
+        linhas = np.asarray(linhas, dtype=np.float32)
+        total = len(linhas)
+        capacidade = len(self.dados)
+        # Só as últimas `capacidade` linhas cabem, mas todas contam como escritas
+        linhas = linhas[-capacidade:]
+        inicio = (self.escritos + total - len(linhas)) % capacidade
+        primeira_parte = min(len(linhas), capacidade - inicio)
+        self.dados[inicio:inicio + primeira_parte] = linhas[:primeira_parte]
+        self.dados[:len(linhas) - primeira_parte] = linhas[primeira_parte:]
+        self.escritos += total
+
+    def ultimos(self):
+        """
+        Retorna:
+            np.array com as linhas do buffer em ordem cronológica (cópia).
+        """
+        capacidade = len(self.dados)
+        if self.escritos <= capacidade:
+            return self.dados[:self.escritos].copy()
+        inicio = self.escritos % capacidade
+        return np.concatenate((self.dados[inicio:], self.dados[:inicio]))
+
+
+class SeguidorCSV:
+    """
+    Lê apenas as linhas acrescentadas a um CSV desde a última leitura (como `tail -f`).
+    Também aceita um pipe nomeado (FIFO) alimentado pelo software de captura.
+    Linhas incompletas ficam guardadas até o restante chegar. `reinicios` conta as
+    vezes em que o arquivo foi truncado ou substituído e a leitura recomeçou.
+    """
+    __slots__ = ("caminho", "colunas", "descritor", "identidade", "posicao", "pendente", "cabecalho", "reinicios")
+
+    def __init__(self, caminho, colunas):
+        self.caminho = caminho
+        self.colunas = list(colunas)
+        self.descritor = None
+        self.identidade = None
+        self.posicao = 0
+        self.pendente = b""
+        self.cabecalho = None
+        self.reinicios = 0
+
+    def _abrir(self):
+        # O_NONBLOCK evita travar em um FIFO ainda sem escritor
+        self.descritor = os.open(self.caminho, os.O_RDONLY | os.O_NONBLOCK)
+        info = os.fstat(self.descritor)
+        self.identidade = (info.st_dev, info.st_ino)
+        self.posicao = 0
+        self.pendente = b""
+
+    def fechar(self):
+        if self.descritor is not None:
+            os.close(self.descritor)
+            self.descritor = None
+
+    def _reiniciado(self):
+        # Truncado (tamanho menor que o já lido) ou substituído por outro arquivo no mesmo caminho
+        try:
+            info = os.stat(self.caminho)
+        except FileNotFoundError:
+            # Entre a remoção e a criação do arquivo novo: segue no descritor atual
+            return False
+        if not os.path.isfile(self.caminho):
+            return False
+        return (info.st_dev, info.st_ino) != self.identidade or info.st_size < self.posicao
+
+    def _ler_bytes(self):
+        if self.descritor is None:
+            self._abrir()
+        elif self._reiniciado():
+            logger.warning(f"{self.caminho} foi truncado ou substituído; reiniciando a leitura.")
+            self.fechar()
+            self._abrir()
+            self.cabecalho = None
+            self.reinicios += 1
+
+        blocos = []
+        lidos = 0
+        while lidos < MAX_BYTES_ATUALIZACAO:
+            try:
+                bloco = os.read(self.descritor, min(TAMANHO_LEITURA, MAX_BYTES_ATUALIZACAO - lidos))
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
+            if not bloco:
+                break
+            blocos.append(bloco)
+            lidos += len(bloco)
+        self.posicao += lidos
+        return b"".join(blocos)
+
+    def ler_novas_linhas(self):
+        """
+        Retorna:
+            DataFrame com as linhas completas novas (apenas `colunas`), possivelmente vazio.
+        """
+        # Lê antes de usar `pendente`: se o arquivo foi trocado, _ler_bytes descarta a linha parcial antiga
+        novos = self._ler_bytes()
+        texto = self.pendente + novos
+        corte = texto.rfind(b"\n") + 1
+        completas, self.pendente = texto[:corte], texto[corte:]
+
+        if self.cabecalho is None and completas:
+            fim_cabecalho = completas.index(b"\n") + 1
+            # utf-8-sig: o BOM que alguns exportadores gravam não entra no nome da primeira coluna
+            linha = completas[:fim_cabecalho].decode("utf-8-sig")
+            self.cabecalho = [nome.strip().strip('"') for nome in linha.strip().split(",")]
+            faltando = set(self.colunas) - set(self.cabecalho)
+            if faltando:
+                raise ValueError(f"Colunas ausentes no fluxo: {', '.join(sorted(faltando))}")
+            completas = completas[fim_cabecalho:]
+
+        if not completas:
+            return pd.DataFrame(columns=self.colunas, dtype=np.float32)
+        return pd.read_csv(io.BytesIO(completas), header=None, names=self.cabecalho,
+                           usecols=self.colunas, dtype=np.float32)[self.colunas]
+
+
+class DetectorPicosOnline:
+    """
+    Versão por estados de `calcular_tempos_picos`: acompanha se o sinal está acima do
+    limiar e emite cada movimento quando ele termina, já com o nível de `classificar`.
+    Como no processamento do arquivo inteiro, um movimento já em curso no primeiro
+    frame é descartado, e só contam os que começam após `tempo_inicial` segundos e
+    duram pelo menos `duracao_minima` segundos.
+    """
+    __slots__ = ("limiar", "tempo_inicial", "duracao_minima", "frame", "acima", "inicio",
+                 "quantidade", "soma_duracoes", "niveis", "recentes")
+
+    def __init__(self, limiar, tempo_inicial=0, duracao_minima=1, max_recentes=MAX_MOVIMENTOS_RECENTES):
+        self.limiar = limiar
+        self.tempo_inicial = tempo_inicial
+        self.duracao_minima = duracao_minima
+        self.frame = 0
+        self.acima = None
+        self.inicio = None
+        self.quantidade = 0
+        self.soma_duracoes = 0.0
+        self.niveis = {'Nível 1': 0, 'Nível 2': 0, 'Nível 3': 0}
+        self.recentes = deque(maxlen=max_recentes)
+
+    @property
+    def media_duracao(self):
+        return self.soma_duracoes / self.quantidade if self.quantidade else 0.0
+
+    def processar(self, valores, frames_por_seg):
+        """
+        Consome um bloco de frames novos.
+
+        Retorna:
+            list[dict]: Movimentos concluídos no bloco (inicio, fim, duracao, nivel).
+        """
+        mascara = np.asarray(valores) > self.limiar
+        if mascara.size == 0:
+            return []
+
+        # Bordas no bloco, considerando o último estado do bloco anterior
+        anterior = mascara[0] if self.acima is None else self.acima
+        bordas = np.diff(np.r_[anterior, mascara].astype(np.int8))
+        subidas = np.flatnonzero(bordas == 1) + self.frame - 1
+        descidas = np.flatnonzero(bordas == -1) + self.frame - 1
+
+        # Intercala subidas e descidas; um movimento aberto vem do bloco anterior
+        eventos = np.r_[subidas, descidas]
+        tipos = np.r_[np.ones(len(subidas), dtype=np.int8), np.zeros(len(descidas), dtype=np.int8)]
+        ordem = np.argsort(eventos, kind="stable")
+
+        concluidos = []
+        for quadro, subida in zip(eventos[ordem], tipos[ordem]):
+            if subida:
+                self.inicio = int(quadro)
+            elif self.inicio is not None:
+                concluidos.append(self._emitir(self.inicio, int(quadro), frames_por_seg))
+                self.inicio = None
+
+        self.acima = bool(mascara[-1])
+        self.frame += len(mascara)
+        return [m for m in concluidos if m is not None]
+
+    def _emitir(self, inicio, fim, frames_por_seg):
+        if not (inicio / frames_por_seg > self.tempo_inicial and fim - inicio >= self.duracao_minima * frames_por_seg):
+            return None
+        duracao = (fim - inicio) / frames_por_seg
+        movimento = {'inicio': inicio, 'fim': fim, 'duracao': duracao, 'nivel': classificar([duracao])[0]}
+        self.quantidade += 1
+        self.soma_duracoes += duracao
+        self.niveis[movimento['nivel']] += 1
+        self.recentes.append(movimento)
+        return movimento
+
+
+class EstimadorFPS:
+    """
+    FPS ao vivo: mediana dos frames por segundo nos últimos `janela` segundos completos
+    da coluna `time` (HHMMSS). O primeiro segundo visto pode estar incompleto e é ignorado.
+    """
+    __slots__ = ("segundo_atual", "contagem_atual", "segundos_vistos", "contagens")
+
+    def __init__(self, janela=SEGUNDOS_FPS):
+        self.segundo_atual = None
+        self.contagem_atual = 0
+        self.segundos_vistos = 0
+        self.contagens = deque(maxlen=janela)
+
+    @property
+    def fps(self):
+        return float(np.median(self.contagens)) if self.contagens else FPS_INICIAL
+
+    def atualizar(self, tempo_hhmmss):
+        tempo = np.asarray(tempo_hhmmss, dtype=np.int64)
+        if tempo.size == 0:
+            return
+        limites = np.r_[0, np.flatnonzero(np.diff(tempo)) + 1, tempo.size]
+        for segundo, tamanho in zip(tempo[limites[:-1]], np.diff(limites)):
+            if segundo == self.segundo_atual:
+                self.contagem_atual += int(tamanho)
+                continue
+            if self.segundos_vistos >= 2:
+                self.contagens.append(self.contagem_atual)
+            self.segundos_vistos += 1
+            self.segundo_atual, self.contagem_atual = segundo, int(tamanho)
+
+
+class MonitorSessao:
+    """
+    Junta leitura incremental, buffer circular, FPS ao vivo e um detector por ombro.
+    Guardado no session_state do Streamlit, sobrevive aos reruns sem reler o arquivo.
+    Se o arquivo seguido for truncado ou substituído, começa outra sessão do zero.
+    """
+    __slots__ = ("seguidor", "buffer", "estimador_fps", "detectores", "reinicios")
+
+    def __init__(self, caminho, colunas, limiar, tempo_inicial=0, duracao_minima=1,
+                 capacidade=CAPACIDADE_PADRAO, colunas_detectadas=('shoulderLangle', 'shoulderRangle')):
+        colunas = list(colunas)
+        if 'time' not in colunas:
+            colunas = ['time'] + colunas
+        self.seguidor = SeguidorCSV(caminho, colunas)
+        self.buffer = BufferCircular(capacidade, len(colunas))
+        self.estimador_fps = EstimadorFPS()
+        self.detectores = {coluna: DetectorPicosOnline(limiar, tempo_inicial, duracao_minima)
+                           for coluna in colunas_detectadas}
+        self.reinicios = 0
+
+    @property
+    def colunas(self):
+        return self.seguidor.colunas
+
+    @property
+    def frames(self):
+        return self.buffer.escritos
+
+    def atualizar(self):
+        """
+        Processa os frames que chegaram desde a última chamada.
+
+        Retorna:
+            dict {coluna: list de movimentos concluídos nesta atualização}.
+        """
+        novos = self.seguidor.ler_novas_linhas()
+        if self.seguidor.reinicios != self.reinicios:
+            self.reinicios = self.seguidor.reinicios
+            self._reiniciar()
+        if novos.empty:
+            return {coluna: [] for coluna in self.detectores}
+
+        self.estimador_fps.atualizar(novos['time'].to_numpy())
+        self.buffer.acrescentar(novos.to_numpy())
+        fps = self.estimador_fps.fps
+        return {coluna: detector.processar(novos[coluna].to_numpy(), fps)
+                for coluna, detector in self.detectores.items()}
+
+    def _reiniciar(self):
+        # Sessão nova no mesmo caminho: nada de frames, FPS ou movimentos da anterior
+        self.buffer = BufferCircular(len(self.buffer.dados), len(self.colunas))
+        self.estimador_fps = EstimadorFPS(self.estimador_fps.contagens.maxlen)
+        self.detectores = {
+            coluna: DetectorPicosOnline(d.limiar, d.tempo_inicial, d.duracao_minima, d.recentes.maxlen)
+            for coluna, d in self.detectores.items()
+        }
+
+    def janela_recente(self):
+        """
+        Retorna:
+            DataFrame com os frames do buffer e a coluna 'segundos' (tempo relativo ao início).
+        """
+        dados = pd.DataFrame(self.buffer.ultimos(), columns=self.colunas)
+        primeiro = self.frames - len(dados)
+        dados['segundos'] = (primeiro + np.arange(len(dados))) / self.estimador_fps.fps
+        return dados
+
+    def fechar(self):
+        self.seguidor.fechar()
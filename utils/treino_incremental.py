@@ -0,0 +1,545 @@
+"""
+Treino incremental do pipeline (StandardScaler + PCA + DBSCAN).
+
+Quando só há CSVs novos em treino/, o normalizador e o PCA do último treino
+completo ficam congelados (o espaço PCA dos pontos já agrupados não muda) e
+apenas os frames novos são projetados e inseridos no DBSCAN:
+
+    1. conta os vizinhos (raio eps) de cada frame novo e soma esses frames à
+       contagem dos vizinhos antigos;
+    2. os pontos que passam a ter min_samples vizinhos viram núcleos;
+    3. os núcleos novos ligam-se aos grupos antigos e entre si, e as componentes
+       conexas (union-find via scipy) dão os grupos fundidos;
+    4. só os frames de borda vizinhos dos núcleos novos são rotulados de novo.
+
+Inserções nunca removem núcleos, então os núcleos, os grupos e o ruído são os
+mesmos do DBSCAN completo sobre a mesma projeção. Um ponto de borda ao alcance
+de dois grupos pode ficar em outro deles: no próprio DBSCAN essa escolha depende
+da ordem de visita. As buscas de vizinhança, que dominam o custo, envolvem só os
+frames novos e seus vizinhos.
+As KD-trees de todos os pontos e dos núcleos ficam no estado (ArvoreIncremental):
+cada atualização só monta uma árvore pequena com os pontos pendentes, e a árvore
+principal é reconstruída quando as pendentes passam de
+max(MINIMO_PENDENTES, FRACAO_PENDENTES * árvore).
+
+Em paralelo, o StandardScaler acumulado (partial_fit) e um IncrementalPCA
+acompanham a deriva dos dados em relação ao espaço congelado. Um treino
+completo é feito quando:
+    - algum arquivo foi removido ou alterado;
+    - os frames acumulados desde o último treino completo passam de
+      FRACAO_MAXIMA_INCREMENTAL da base;
+    - a média de alguma articulação se desloca mais que LIMITE_DESVIO_MEDIA
+      desvios-padrão, ou o subespaço principal gira mais que LIMITE_ROTACAO_PCA
+      (seno do maior ângulo principal);
+    - o motor de agrupamento não é o DBSCAN exato.
+
+O estado completo (estado.joblib) só é gravado no treino completo e a cada
+MAXIMO_INCREMENTOS atualizações; nas demais, só os pontos novos e os acumuladores
+vão para um arquivo de incremento, reaplicado sobre o estado ao carregá-lo. Assim
+o custo de gravar uma atualização depende dos dados novos, não da base inteira.
+
+Cada treino é registrado em uma linha de versoes.jsonl (arquivos e hashes
+incluídos no modelo). Os processos do pool de análises fazem a leitura e a
+gravação do estado sob uma trava de arquivo, um de cada vez.
+"""
+import os
+import json
+import copy
+import uuid
+import hashlib
+import logging
+from glob import glob
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from sklearn.decomposition import IncrementalPCA
+from sklearn.neighbors import KDTree
+
+from utils.base_treino import blocos_base_treino, salvar_atomico, trava_arquivo
+
+logger = logging.getLogger(__name__)
+
+PASTA_INCREMENTAL = os.path.join(".cache", "modelos", "incremental")
+ARQUIVO_ESTADO = "estado.joblib"
+PASTA_INCREMENTOS = "incrementos"
+ARQUIVO_VERSOES = "versoes.jsonl"
+
+# Atualizações gravadas como incremento antes de o estado completo ser regravado
+MAXIMO_INCREMENTOS = 16
+
+# Política de retreino completo
+FRACAO_MAXIMA_INCREMENTAL = 0.5
+LIMITE_DESVIO_MEDIA = 0.25
+LIMITE_ROTACAO_PCA = 0.2
+
+# Frames por lote no partial_fit do IncrementalPCA
+TAMANHO_LOTE_IPCA = 50_000
+
+# A árvore principal é reconstruída quando as pendentes passam de max(MINIMO, FRACAO * árvore)
+MINIMO_PENDENTES = 2048
+FRACAO_PENDENTES = 0.1
+
+
+def _pasta_estado(pasta_base, colunas, params):
+    chave = json.dumps({"colunas": list(colunas), "params": params}, sort_keys=True)
+    return os.path.join(pasta_base, hashlib.sha256(chave.encode("utf-8")).hexdigest()[:12])
+
+
+def _ajustar_ipca(ipca, dados_norm):
+    # O IncrementalPCA exige lotes com pelo menos n_components frames
+    for inicio in range(0, len(dados_norm), TAMANHO_LOTE_IPCA):
+        lote = dados_norm[inicio:inicio + TAMANHO_LOTE_IPCA]
+        if len(lote) >= ipca.n_components:
+            ipca.partial_fit(lote)
+    return ipca
+
+
+class ArvoreIncremental:
+    """
+    KD-tree que aceita inserções sem ser reconstruída a cada vez.
+
+    Os pontos inseridos ficam em uma árvore pendente, pequena; a principal só é
+    refeita quando as pendentes passam do limite. `acrescentar` devolve uma nova
+    instância (a árvore principal é compartilhada), então modelos já servidos com
+    a instância anterior não mudam. Os índices seguem a ordem de inserção.
+    """
+    __slots__ = ("arvore", "n_arvore", "pendentes")
+
+    def __init__(self, pontos):
+        pontos = np.asarray(pontos, dtype=np.float64)
+        self.arvore = KDTree(pontos) if len(pontos) else None
+        self.n_arvore = len(pontos)
+        self.pendentes = None
+
+    def __len__(self):
+        return self.n_arvore + (len(self.pendentes.data) if self.pendentes is not None else 0)
+
+    def acrescentar(self, novos):
+        novos = np.asarray(novos, dtype=np.float64)
+        if not len(novos):
+            return self
+        anteriores = [np.asarray(self.pendentes.data)] if self.pendentes is not None else []
+        pendentes = np.concatenate(anteriores + [novos])
+        if len(pendentes) > max(MINIMO_PENDENTES, FRACAO_PENDENTES * self.n_arvore):
+            principal = [np.asarray(self.arvore.data)] if self.arvore is not None else []
+            logger.info(f"KD-tree incremental reconstruída com {self.n_arvore + len(pendentes)} pontos.")
+            return ArvoreIncremental(np.concatenate(principal + [pendentes]))
+        atualizada = copy.copy(self)
+        atualizada.pendentes = KDTree(pendentes)
+        return atualizada
+
+    def _partes(self):
+        return [(arvore, deslocamento) for arvore, deslocamento in ((self.arvore, 0), (self.pendentes, self.n_arvore))
+                if arvore is not None]
+
+    def query_radius(self, pontos, r):
+        """
+        Retorna:
+            np.array de objetos: índices dos vizinhos de cada ponto no raio `r`.
+        """
+        pontos = np.asarray(pontos, dtype=np.float64)
+        partes = self._partes()
+        if len(partes) == 1 and partes[0][1] == 0:
+            return partes[0][0].query_radius(pontos, r=r)
+        resultado = np.empty(len(pontos), dtype=object)
+        resultado[:] = [np.empty(0, dtype=np.intp)] * len(pontos)
+        for arvore, deslocamento in partes:
+            for i, vizinhos in enumerate(arvore.query_radius(pontos, r=r)):
+                resultado[i] = np.concatenate([resultado[i], vizinhos + deslocamento])
+        return resultado
+
+    def query(self, pontos, k=1):
+        """
+        Vizinho mais próximo (só k=1), com a mesma saída de KDTree.query.
+        """
+        if k != 1:
+            raise ValueError("ArvoreIncremental só suporta k=1.")
+        pontos = np.asarray(pontos, dtype=np.float64)
+        distancias = np.full((len(pontos), 1), np.inf)
+        indices = np.zeros((len(pontos), 1), dtype=np.intp)
+        for arvore, deslocamento in self._partes():
+            d, i = arvore.query(pontos, k=1)
+            melhor = d < distancias
+            distancias = np.where(melhor, d, distancias)
+            indices = np.where(melhor, i + deslocamento, indices)
+        return distancias, indices
+
+
+def _estruturas_vizinhanca(pontos, contagens, min_samples):
+    # Árvores de todos os pontos e dos núcleos (com o índice do ponto de cada núcleo)
+    ordem_nucleos = np.flatnonzero(contagens >= min_samples)
+    return {
+        "vizinhanca": ArvoreIncremental(pontos),
+        "nucleos": ArvoreIncremental(pontos[ordem_nucleos]),
+        "ordem_nucleos": ordem_nucleos,
+    }
+
+
+def treino_completo(dados_treino, params, treinar):
+    """
+    Treina o pipeline do zero e monta o estado usado pelas atualizações incrementais.
+
+    Parâmetros:
+        dados_treino (DataFrame): Dados de treino (colunas do modelo).
+        params (dict): Hiperparâmetros do pipeline.
+        treinar (callable): Função de treino completo (ml_teste.treinar_modelo).
+
+    Retorna:
+        dict: Estado com o pipeline, os pontos projetados e os acumuladores de deriva.
+    """
+    scaler, pca, modelo = treinar(dados_treino, params)
+    dados_norm = scaler.transform(dados_treino)
+    pontos = pca.transform(dados_norm).astype(np.float32)
+
+    estado = {
+        "pipeline": (scaler, pca, modelo),
+        "colunas": list(dados_treino.columns),
+        "scaler_acumulado": copy.deepcopy(scaler),
+        "ipca": _ajustar_ipca(IncrementalPCA(n_components=params["n_components"]), dados_norm),
+        "pontos": pontos,
+        "linhas_treino_completo": len(pontos),
+        "linhagem": uuid.uuid4().hex,
+    }
+    if params.get("motor", "dbscan") == "dbscan":
+        # Só no DBSCAN exato labels_ tem um rótulo por ponto (no dbscan_grade é um por célula)
+        estado["rotulos"] = np.asarray(modelo.labels_, dtype=np.int32)
+        vizinhanca = ArvoreIncremental(pontos)
+        estado["contagens"] = vizinhanca.arvore.query_radius(pontos, r=params["eps"], count_only=True).astype(np.int32)
+        estado.update(_estruturas_vizinhanca(pontos, estado["contagens"], params["min_samples"]),
+                      vizinhanca=vizinhanca)
+    return estado
+
+
+def medir_deriva(estado):
+    """
+    Compara os acumuladores (StandardScaler e IncrementalPCA) com o espaço congelado.
+
+    Retorna:
+        dict: 'desvio_media' (maior deslocamento de média, em desvios-padrão) e
+        'rotacao_pca' (seno do maior ângulo entre os subespaços principais).
+    """
+    scaler, pca, _ = estado["pipeline"]
+    acumulado = estado["scaler_acumulado"]
+    desvio_media = float(np.max(np.abs(acumulado.mean_ - scaler.mean_) / scaler.scale_))
+
+    cossenos = np.linalg.svd(estado["ipca"].components_ @ pca.components_.T, compute_uv=False)
+    rotacao_pca = float(np.sqrt(max(0.0, 1.0 - np.min(cossenos) ** 2)))
+    return {"desvio_media": desvio_media, "rotacao_pca": rotacao_pca}
+
+
+def inserir_pontos_dbscan(pontos, contagens, rotulos, novos, eps, min_samples, estruturas):
+    """
+    Insere frames (já projetados) em um agrupamento DBSCAN existente.
+
+    As buscas de vizinhança usam as árvores de `estruturas`, que só recebem os
+    pontos novos (ver ArvoreIncremental): o custo depende dos frames inseridos e
+    de seus vizinhos, não do tamanho da base.
+
+    Parâmetros:
+        pontos (np.array): Pontos já agrupados (n x d).
+        contagens (np.array): Vizinhos de cada ponto no raio eps (incluindo ele mesmo).
+        rotulos (np.array): Rótulos atuais (-1 = ruído).
+        novos (np.array): Pontos a inserir (m x d).
+        estruturas (dict): 'vizinhanca' (árvore de `pontos`), 'nucleos' (árvore dos núcleos)
+            e 'ordem_nucleos' (índice em `pontos` de cada núcleo da árvore).
+
+    Retorna:
+        pontos, contagens, rotulos (np.array) e estruturas (dict) atualizados, com os novos pontos ao final.
+    """
+    n_antigos = len(pontos)
+    novos = np.asarray(novos, dtype=pontos.dtype)
+    pontos = np.concatenate([pontos, novos])
+    vizinhanca = estruturas["vizinhanca"].acrescentar(novos)
+
+    # 1. Vizinhos dos novos frames; cada vizinho antigo ganha +1 por frame novo
+    vizinhos = vizinhanca.query_radius(pontos[n_antigos:], r=eps)
+    todos_vizinhos = np.concatenate(vizinhos) if len(vizinhos) else np.empty(0, dtype=np.intp)
+    incremento = np.bincount(todos_vizinhos[todos_vizinhos < n_antigos], minlength=n_antigos)
+    contagens = np.concatenate([contagens + incremento.astype(np.int32),
+                                np.fromiter((len(v) for v in vizinhos), dtype=np.int32, count=len(vizinhos))])
+
+    nucleo = contagens >= min_samples
+    era_nucleo = np.zeros(len(pontos), dtype=bool)
+    era_nucleo[:n_antigos] = contagens[:n_antigos] - incremento >= min_samples
+    nucleos_novos = np.flatnonzero(nucleo & ~era_nucleo)
+
+    rotulos = np.concatenate([rotulos, np.full(len(novos), -1, dtype=np.int32)])
+
+    # 2. Grafo: um nó por grupo antigo + um nó por núcleo novo
+    n_grupos = int(rotulos.max()) + 1
+    no_do_ponto = np.full(len(pontos), -1, dtype=np.int64)
+    no_do_ponto[era_nucleo] = rotulos[era_nucleo]
+    no_do_ponto[nucleos_novos] = n_grupos + np.arange(len(nucleos_novos))
+
+    vizinhos_nucleos = vizinhanca.query_radius(pontos[nucleos_novos], r=eps) if len(nucleos_novos) else []
+    indices_vizinhos = np.concatenate(vizinhos_nucleos) if len(nucleos_novos) else np.empty(0, dtype=np.intp)
+    origem = np.repeat(no_do_ponto[nucleos_novos], [len(v) for v in vizinhos_nucleos])
+    destino = no_do_ponto[indices_vizinhos]
+    ligado = destino >= 0
+    n_nos = n_grupos + len(nucleos_novos)
+    grafo = coo_matrix((np.ones(int(ligado.sum()), dtype=np.int8), (origem[ligado], destino[ligado])),
+                       shape=(n_nos, n_nos))
+    _, componente = connected_components(grafo, directed=False)
+
+    # 3. Rótulos: núcleos herdam a componente; bordas antigas seguem o grupo fundido
+    novos_rotulos = np.full(len(pontos), -1, dtype=np.int64)
+    agrupado = rotulos >= 0
+    novos_rotulos[agrupado] = componente[rotulos[agrupado]]
+    novos_rotulos[nucleos_novos] = componente[no_do_ponto[nucleos_novos]]
+
+    # 4. Bordas afetadas: frames não-núcleo vizinhos de núcleos novos, e os frames novos
+    arvore_nucleos = estruturas["nucleos"].acrescentar(pontos[nucleos_novos])
+    ordem_nucleos = np.concatenate([estruturas["ordem_nucleos"], nucleos_novos])
+    afetados = np.union1d(indices_vizinhos, np.arange(n_antigos, len(pontos)))
+    afetados = afetados[~nucleo[afetados]]
+    if len(afetados) and len(arvore_nucleos):
+        distancias, mais_proximo = arvore_nucleos.query(pontos[afetados], k=1)
+        alcancado = distancias[:, 0] <= eps
+        novos_rotulos[afetados[alcancado]] = novos_rotulos[ordem_nucleos[mais_proximo[alcancado, 0]]]
+
+    # Renumera os grupos em 0..k-1 mantendo -1 como ruído
+    _, compactos = np.unique(novos_rotulos[novos_rotulos >= 0], return_inverse=True)
+    rotulos = np.full(len(pontos), -1, dtype=np.int32)
+    rotulos[novos_rotulos >= 0] = compactos
+    estruturas = {"vizinhanca": vizinhanca, "nucleos": arvore_nucleos, "ordem_nucleos": ordem_nucleos}
+    return pontos, contagens, rotulos, estruturas
+
+
+def _modelo_atualizado(modelo, pontos, rotulos, estruturas, params):
+    # O modelo servido continua sendo um DBSCAN, com os atributos refeitos; os núcleos
+    # seguem a ordem da árvore de núcleos, que é usada direto como índice de predição
+    modelo = copy.copy(modelo)
+    nucleos = estruturas["ordem_nucleos"]
+    modelo.labels_ = rotulos.astype(np.int64)
+    modelo.core_sample_indices_ = nucleos
+    modelo.components_ = pontos[nucleos].astype(np.float64)
+    modelo.indice_nucleos_ = (estruturas["nucleos"], modelo.labels_[nucleos], params["eps"])
+    return modelo
+
+
+def _inserir_no_estado(estado, projetados, params):
+    # Insere pontos já projetados no DBSCAN do estado e refaz o modelo servido
+    scaler, pca, modelo = estado["pipeline"]
+    estado = dict(estado)
+    if "vizinhanca" not in estado:
+        # Estados gravados antes das árvores fazerem parte dele
+        estado.update(_estruturas_vizinhanca(estado["pontos"], estado["contagens"], params["min_samples"]))
+    pontos, contagens, rotulos, estruturas = inserir_pontos_dbscan(
+        estado["pontos"], estado["contagens"], estado["rotulos"], projetados, params["eps"],
+        params["min_samples"], {chave: estado[chave] for chave in ("vizinhanca", "nucleos", "ordem_nucleos")},
+    )
+    estado.update(pontos=pontos, contagens=contagens, rotulos=rotulos, **estruturas)
+    estado["pipeline"] = (scaler, pca, _modelo_atualizado(modelo, pontos, rotulos, estruturas, params))
+    return estado
+
+
+def atualizar_incremental(estado, blocos_novos, params):
+    """
+    Acrescenta os dados de arquivos novos ao estado sem refazer o treino completo.
+
+    Parâmetros:
+        estado (dict): Estado de `treino_completo` ou de uma atualização anterior.
+        blocos_novos (list[np.ndarray]): Pontos dos arquivos novos (mesmas colunas do estado).
+
+    Retorna:
+        dict: Novo estado.
+    """
+    scaler, pca, _ = estado["pipeline"]
+    novos = pd.DataFrame(np.concatenate(blocos_novos), columns=estado["colunas"])
+    novos_norm = scaler.transform(novos)
+
+    atualizado = _inserir_no_estado(estado, pca.transform(novos_norm).astype(np.float32), params)
+    atualizado["scaler_acumulado"] = copy.deepcopy(estado["scaler_acumulado"]).partial_fit(novos)
+    atualizado["ipca"] = _ajustar_ipca(copy.deepcopy(estado["ipca"]), novos_norm)
+    return atualizado
+
+
+def motivo_retreino(estado, arquivos_atuais, params):
+    """
+    Aplica a política de retreino completo.
+
+    Retorna:
+        str com o motivo do treino completo, ou None se a atualização incremental basta.
+    """
+    if estado is None:
+        return "sem modelo anterior"
+    if params.get("motor", "dbscan") != "dbscan":
+        return f"motor {params['motor']} não suporta atualização incremental"
+    anteriores = estado["arquivos"]
+    if any(arquivos_atuais.get(nome) != sha for nome, sha in anteriores.items()):
+        return "arquivos de treino removidos ou alterados"
+    return None
+
+
+def _registrar_versao(pasta, estado, tipo, motivo, deriva):
+    # Uma linha JSON por versão, acrescentada ao final: nenhuma versão anterior é reescrita
+    versao = {
+        "versao": estado["versao"],
+        "tipo": tipo,
+        "motivo": motivo,
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "linhas": int(len(estado["pontos"])),
+        "deriva": deriva,
+        "arquivos": estado["arquivos"],
+    }
+    with open(os.path.join(pasta, ARQUIVO_VERSOES), "a", encoding="utf-8") as f:
+        f.write(json.dumps(versao, ensure_ascii=False) + "\n")
+
+
+def _caminho_incremento(pasta, versao):
+    return os.path.join(pasta, PASTA_INCREMENTOS, f"{versao:06d}.joblib")
+
+
+def _carregar_estado(pasta, params):
+    """
+    Carrega o estado completo e reaplica, em ordem, os incrementos gravados depois dele.
+
+    Retorna:
+        dict ou None se não houver estado válido.
+    """
+    caminho = os.path.join(pasta, ARQUIVO_ESTADO)
+    if not os.path.exists(caminho):
+        return None
+    try:
+        estado = joblib.load(caminho)
+    except Exception as e:
+        logger.warning(f"Estado incremental inválido em {caminho}, treinando do zero: {e}")
+        return None
+
+    estado["incrementos"] = 0
+    if "linhagem" not in estado:
+        # Estado gravado antes dos incrementos: a próxima atualização regrava o estado completo
+        estado["linhagem"] = uuid.uuid4().hex
+        estado["incrementos"] = MAXIMO_INCREMENTOS
+    while os.path.exists(_caminho_incremento(pasta, estado["versao"] + 1)):
+        caminho = _caminho_incremento(pasta, estado["versao"] + 1)
+        try:
+            incremento = joblib.load(caminho)
+        except Exception as e:
+            logger.warning(f"Incremento inválido em {caminho}; usando a versão {estado['versao']}: {e}")
+            break
+        # Incrementos de um treino completo anterior (ex.: gravação interrompida) não se aplicam
+        if incremento["linhagem"] != estado.get("linhagem"):
+            break
+        estado = _inserir_no_estado(estado, incremento["pontos"], params)
+        estado.update(scaler_acumulado=incremento["scaler_acumulado"], ipca=incremento["ipca"],
+                      versao=incremento["versao"], arquivos=incremento["arquivos"],
+                      incrementos=estado["incrementos"] + 1)
+    return estado
+
+
+def _salvar_estado(pasta, estado):
+    # Grava o estado completo e descarta os incrementos que ele já inclui
+    estado = {chave: valor for chave, valor in estado.items() if chave != "incrementos"}
+    salvar_atomico(os.path.join(pasta, ARQUIVO_ESTADO), lambda f: joblib.dump(estado, f))
+    for incremento in glob(os.path.join(pasta, PASTA_INCREMENTOS, "*.joblib")):
+        os.remove(incremento)
+
+
+def _salvar_incremento(pasta, anterior, estado):
+    # Só os pontos novos (já projetados) e os acumuladores, pequenos, vão para o disco
+    incremento = {
+        "versao": estado["versao"],
+        "linhagem": estado["linhagem"],
+        "arquivos": estado["arquivos"],
+        "pontos": estado["pontos"][len(anterior["pontos"]):],
+        "scaler_acumulado": estado["scaler_acumulado"],
+        "ipca": estado["ipca"],
+    }
+    caminho = _caminho_incremento(pasta, estado["versao"])
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    salvar_atomico(caminho, lambda f: joblib.dump(incremento, f))
+
+
+def treinar_ou_atualizar(pasta_treino, colunas, params, treinar, pasta_base=PASTA_INCREMENTAL, preparar=None):
+    """
+    Atualiza o modelo com os arquivos novos de treino/ quando a política permite;
+    caso contrário faz um treino completo. O estado e o registro de versões
+    ficam em `pasta_base`, separados por colunas e hiperparâmetros.
+
+    Parâmetros:
+        pasta_treino (str): Pasta com os CSVs de treino.
+        colunas (list): Colunas do modelo.
+        params (dict): Hiperparâmetros do pipeline.
+        treinar (callable): Função de treino completo (ml_teste.treinar_modelo).
+        preparar (callable): Transforma os frames de cada arquivo (DataFrame) nos pontos
+            agrupados, ex.: características por janela; None agrupa os próprios frames.
+
+    Retorna:
+        tuple: (scaler, pca, modelo) ou None se não houver dados de treino válidos.
+    """
+    pasta = _pasta_estado(pasta_base, colunas, params)
+    # Um processo por vez lê e grava o estado: quem esperou a trava encontra a versão
+    # já atualizada pelo outro e só a carrega
+    with trava_arquivo(os.path.join(pasta, ARQUIVO_ESTADO)):
+        return _treinar_ou_atualizar(pasta, pasta_treino, colunas, params, treinar, preparar)
+
+
+def _treinar_ou_atualizar(pasta, pasta_treino, colunas, params, treinar, preparar):
+    blocos = blocos_base_treino(pasta_treino, colunas)
+    arquivos_atuais = {nome: bloco["sha256"] for nome, bloco in blocos.items()}
+    if not any(len(bloco["dados"]) for bloco in blocos.values()):
+        return None
+
+    preparados = {}
+
+    def pontos(nome):
+        # Cada arquivo é preparado à parte (janelas não atravessam arquivos) e só quando usado
+        if nome not in preparados:
+            quadro = pd.DataFrame(blocos[nome]["dados"], columns=list(colunas), copy=False)
+            preparados[nome] = preparar(quadro) if preparar else quadro
+        return preparados[nome]
+
+    estado = _carregar_estado(pasta, params)
+
+    motivo = motivo_retreino(estado, arquivos_atuais, params)
+    deriva = None
+    if motivo is None:
+        novos = [nome for nome in arquivos_atuais if nome not in estado["arquivos"]]
+        if not novos:
+            return estado["pipeline"]
+
+        linhas_novas = sum(len(pontos(nome)) for nome in novos)
+        acumuladas = len(estado["pontos"]) + linhas_novas - estado["linhas_treino_completo"]
+        if acumuladas > FRACAO_MAXIMA_INCREMENTAL * estado["linhas_treino_completo"]:
+            motivo = f"{acumuladas} pontos acumulados desde o último treino completo"
+        elif linhas_novas == 0:
+            # Nada a inserir: nem nova versão nem gravação
+            logger.info(f"{len(novos)} arquivo(s) novo(s) sem pontos válidos; modelo mantido.")
+            return estado["pipeline"]
+        else:
+            atualizado = atualizar_incremental(estado, [pontos(nome).to_numpy() for nome in novos], params)
+            deriva = medir_deriva(atualizado)
+            if deriva["desvio_media"] > LIMITE_DESVIO_MEDIA or deriva["rotacao_pca"] > LIMITE_ROTACAO_PCA:
+                motivo = (f"deriva dos dados (média {deriva['desvio_media']:.2f} dp, "
+                          f"rotação do PCA {deriva['rotacao_pca']:.2f})")
+            else:
+                anterior, estado = estado, atualizado
+                logger.info(f"Modelo atualizado incrementalmente com {linhas_novas} pontos de {len(novos)} arquivo(s).")
+
+    if motivo is not None:
+        logger.info(f"Treino completo: {motivo}.")
+        dados = pd.concat([pontos(nome) for nome in blocos], ignore_index=True)
+        if dados.empty:
+            return None
+        versao = estado["versao"] + 1 if estado else 1
+        estado = treino_completo(dados, params, treinar)
+        estado["versao"] = versao
+        tipo = "completo"
+    else:
+        estado["versao"] += 1
+        estado["incrementos"] += 1
+        tipo = "incremental"
+    estado["arquivos"] = arquivos_atuais
+
+    os.makedirs(pasta, exist_ok=True)
+    if tipo == "incremental" and estado["incrementos"] < MAXIMO_INCREMENTOS:
+        _salvar_incremento(pasta, anterior, estado)
+    else:
+        _salvar_estado(pasta, estado)
+    _registrar_versao(pasta, estado, tipo, motivo, deriva)
+    return estado["pipeline"]
@@ -0,0 +1,107 @@
+import time
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+
+from utils.indice_sessoes import listar_pacientes, sessoes_dos_pacientes, fracoes_clusters
+from utils.processamento import ARTICULACOES
+
+NOMES_ARTICULACOES = {
+    'shoulderLangle': 'Ombro E', 'shoulderRangle': 'Ombro D',
+    'elbowLangle': 'Cotovelo E', 'elbowRangle': 'Cotovelo D',
+    'hipLangle': 'Quadril E', 'hipRangle': 'Quadril D',
+    'kneeLangle': 'Joelho E', 'kneeRangle': 'Joelho D',
+}
+
+METRICAS = {
+    'Duração média dos movimentos (s)': 'duracao_media',
+    'Quantidade de movimentos': 'movimentos',
+    'Ângulo médio (graus)': 'media',
+    'Ângulo mediano (graus)': 'mediana',
+    'Movimentos Nível 3': 'nivel_3',
+}
+
+def _consultar(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, (time.perf_counter() - inicio) * 1000
+
+def carregar():
+    st.title("📚 Coorte e Evolução dos Pacientes")
+    st.markdown("Resumo de todas as sessões já analisadas, lido do índice local de sessões (sem reabrir os CSVs).")
+
+    pacientes = listar_pacientes()
+    if not pacientes:
+        st.info("Nenhuma sessão indexada ainda. Analise arquivos nas outras seções ou rode `python lote.py`.")
+        return
+
+    nome_metrica = st.selectbox("Métrica", list(METRICAS), key="coorte_metrica")
+    metrica = METRICAS[nome_metrica]
+
+    # === Evolução de um paciente ao longo das sessões
+    st.markdown("### 📈 Evolução de um paciente")
+    paciente = st.selectbox("Paciente", pacientes, key="coorte_paciente")
+    tabela, tempo_consulta = _consultar(sessoes_dos_pacientes, [paciente])
+    st.caption(f"Consulta em {tempo_consulta:.1f} ms")
+
+    if tabela.empty:
+        st.info("Sem resumo por articulação para este paciente.")
+    else:
+        articulacoes = st.multiselect("Articulações", ARTICULACOES, default=['shoulderLangle', 'shoulderRangle'],
+                                      format_func=NOMES_ARTICULACOES.get, key="coorte_articulacoes")
+        selecao = tabela[tabela['articulacao'].isin(articulacoes)].copy()
+        selecao['Articulação'] = selecao['articulacao'].map(NOMES_ARTICULACOES)
+        # Eixo x pelo número da sessão: etapas repetidas (ex.: dois "Início") não se sobrepõem
+        fig_evolucao = px.line(selecao, x='sessao', y=metrica, color='Articulação', markers=True,
+                               hover_data={'nome': True, 'etapa': True},
+                               title=f"{nome_metrica} por sessão — paciente {paciente}",
+                               labels={metrica: nome_metrica, 'sessao': 'Sessão', 'nome': 'Arquivo',
+                                       'etapa': 'Etapa'})
+        fig_evolucao.update_xaxes(dtick=1)
+        st.plotly_chart(fig_evolucao, use_container_width=True)
+
+        sessoes = tabela.drop_duplicates('id')[['sessao', 'nome', 'etapa', 'analisada_em', 'frames', 'fps',
+                                                'duracao', 'quadros_perdidos']]
+        st.dataframe(sessoes.rename(columns={
+            'sessao': 'Sessão', 'nome': 'Arquivo', 'etapa': 'Etapa', 'analisada_em': 'Analisada em',
+            'frames': 'Frames', 'fps': 'FPS', 'duracao': 'Duração (s)', 'quadros_perdidos': 'Frames perdidos'}),
+            hide_index=True)
+
+        clusters = fracoes_clusters([paciente])
+        if not clusters.empty:
+            clusters['Cluster'] = clusters['cluster'].astype(str)
+            fig_clusters = px.bar(clusters, x='nome', y='fracao', color='Cluster',
+                                  title="Fração dos frames por cluster",
+                                  labels={'nome': 'Sessão', 'fracao': 'Fração dos frames'})
+            st.plotly_chart(fig_clusters, use_container_width=True)
+
+    # === Comparação entre grupos de pacientes
+    st.markdown("### 👥 Comparação entre grupos")
+    col1, col2 = st.columns(2)
+    with col1:
+        grupo_a = st.multiselect("Grupo A", pacientes, key="coorte_grupo_a")
+    with col2:
+        grupo_b = st.multiselect("Grupo B", [p for p in pacientes if p not in grupo_a], key="coorte_grupo_b")
+
+    if not (grupo_a and grupo_b):
+        st.info("Escolha os pacientes de cada grupo para comparar.")
+        return
+
+    dados, tempo_consulta = _consultar(sessoes_dos_pacientes, grupo_a + grupo_b)
+    st.caption(f"Consulta em {tempo_consulta:.1f} ms")
+    dados['Grupo'] = dados['paciente'].map({**{p: 'A' for p in grupo_a}, **{p: 'B' for p in grupo_b}})
+    etapas = sorted(dados['etapa'].dropna().unique())
+    if etapas:
+        etapa = st.selectbox("Etapa", ["Todas"] + etapas, key="coorte_etapa")
+        if etapa != "Todas":
+            dados = dados[dados['etapa'] == etapa]
+
+    comparacao = dados.groupby(['Grupo', 'articulacao'], as_index=False)[metrica].mean()
+    comparacao['Articulação'] = comparacao['articulacao'].map(NOMES_ARTICULACOES)
+    fig_grupos = px.bar(comparacao, x='Articulação', y=metrica, color='Grupo', barmode='group',
+                        title=f"{nome_metrica} — média por grupo", labels={metrica: nome_metrica})
+    st.plotly_chart(fig_grupos, use_container_width=True)
+
+    resumo = pd.pivot_table(dados, index='Grupo', values=['duracao', 'movimentos', 'duracao_media'], aggfunc='mean')
+    st.dataframe(resumo.rename(columns={'duracao': 'Duração da sessão (s)', 'movimentos': 'Movimentos',
+                                        'duracao_media': 'Duração média (s)'}).round(2))
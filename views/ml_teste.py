@@ -1,20 +1,50 @@
 import os
+import threading
+import joblib
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from sklearn.preprocessing import StandardScaler
 from sklearn.decomposition import PCA
-from sklearn.cluster import DBSCAN
-from glob import glob
+from sklearn.neighbors import KDTree
 import logging
 
-# Configuração do logger para acompanhar o processo via terminal
-logging.basicConfig(level=logging.INFO)
+from utils.base_treino import (carregar_base_treino, blocos_base_treino, calcular_assinatura_treino, hash_arquivo,
+                               hash_conteudo, salvar_atomico, trava_arquivo)
+from utils.parametros_modelo import COLUNAS_MODELO, PARAMS_MODELO
+from utils.sessao import Sessao
+from utils.instrumentacao import etapa
+from utils.agrupamento import treinar_agrupamento
+from utils.treino_incremental import treinar_ou_atualizar
+from utils.janelas import caracteristicas_janelas
+from utils.indice_sessoes import indexar_sessao
+from utils.similaridade import IndiceSimilaridade, chave_modelo, rotulos_modelo, embedding_sessao
+
+# O nível de log é configurado pelo ponto de entrada (main.py / lote.py)
 logger = logging.getLogger(__name__)
 
+# Modelos treinados são persistidos em disco, indexados pela assinatura do treino
+PASTA_CACHE_MODELOS = os.path.join(".cache", "modelos")
+
+# Com CSVs novos em treino/, atualiza o último modelo em vez de retreinar tudo
+# (ver utils.treino_incremental para a política de retreino completo)
+TREINO_INCREMENTAL = os.environ.get("DASHBOARD_TREINO_INCREMENTAL", "1") == "1"
+
+# Pasta de sessões antigas incluídas na busca de sessões semelhantes, além de treino/
+PASTA_HISTORICO = os.environ.get("DASHBOARD_PASTA_HISTORICO", "historico")
+K_SEMELHANTES = 5
+
+_modelos_em_memoria = {}
+_trava_treino = threading.Lock()
+
+_indices_similaridade = {}
+_trava_similaridade = threading.Lock()
+
 def carregar_dados_treino(pasta_treino, colunas):
     """
-    Lê todos os arquivos CSV da pasta de treino e concatena os dados relevantes.
+    Lê os dados de treino a partir da base colunar derivada da pasta de treino.
+    Apenas CSVs novos ou alterados são processados; os demais vêm do .npy em float32.
 
     Parâmetros:
         pasta_treino (str): Caminho para a pasta com arquivos CSV de treino.
@@ -23,23 +53,35 @@ def carregar_dados_treino(pasta_treino, colunas):
     Retorna:
         DataFrame com os dados combinados ou vazio se nada for válido.
     """
-    arquivos_csv = glob(os.path.join(pasta_treino, "*.csv"))
-    dfs = []
+    return carregar_base_treino(pasta_treino, colunas)
 
-    for arquivo in arquivos_csv:
-        try:
-            df = pd.read_csv(arquivo)
-            if set(colunas).issubset(df.columns):
-                dfs.append(df[colunas].dropna())  # Garante que não existam valores ausentes
-                logger.info(f"Arquivo carregado para treino: {arquivo}")
-            else:
-                logger.warning(f"Colunas esperadas não encontradas em {arquivo}")
-        except Exception as e:
-            logger.error(f"Erro ao carregar {arquivo}: {e}")
+def preparar_pontos(dados, params=PARAMS_MODELO):
+    """
+    Converte os frames nos pontos que o modelo agrupa: os próprios frames ou,
+    com params["janela_frames"], as características de cada janela de movimento.
+
+    Parâmetros:
+        dados (DataFrame): Frames com as colunas do modelo.
 
-    if dfs:
-        return pd.concat(dfs, ignore_index=True)
-    return pd.DataFrame()
+    Retorna:
+        DataFrame de pontos (índice = primeiro frame de cada ponto).
+    """
+    if not params.get("janela_frames"):
+        return dados
+    with etapa("Janelas de movimento"):
+        return caracteristicas_janelas(dados, params["janela_frames"])
+
+def carregar_pontos_treino(pasta_treino, colunas, params=PARAMS_MODELO):
+    """
+    Dados de treino já preparados para o modelo; no modo por janelas, cada
+    arquivo é janelado separadamente para que nenhuma janela junte duas sessões.
+    """
+    if not params.get("janela_frames"):
+        return carregar_dados_treino(pasta_treino, colunas)
+    pontos = [preparar_pontos(pd.DataFrame(bloco["dados"], columns=list(colunas)), params)
+              for bloco in blocos_base_treino(pasta_treino, colunas).values()]
+    pontos = [p for p in pontos if not p.empty]
+    return pd.concat(pontos, ignore_index=True) if pontos else pd.DataFrame()
 
 def processar_csv_teste(arquivo_teste, colunas):
     """
@@ -51,51 +93,253 @@ def processar_csv_teste(arquivo_teste, colunas):
 
     Retorna:
         DataFrame com os dados do teste, apenas colunas esperadas e sem valores nulos.
+        Quando o arquivo tem a coluna `time`, a taxa de quadros fica em `df.attrs['frames_por_seg']`.
+    """
+    return ler_sessao_teste(arquivo_teste, colunas)[1]
+
+def ler_sessao_teste(arquivo_teste, colunas):
+    """
+    Como `processar_csv_teste`, mas devolve também a sessão lida (para o índice de sessões).
+
+    Retorna:
+        sessao (Sessao ou None), df_teste (DataFrame).
     """
     try:
-        df_teste = pd.read_csv(arquivo_teste)
-        return df_teste[colunas].dropna()
+        sessao, _ = Sessao.de_csv(arquivo_teste, colunas)
+        df_teste = sessao.quadro(colunas).dropna()
+        df_teste.attrs['frames_por_seg'] = sessao.fps
+        return sessao, df_teste
     except Exception as e:
         logger.error(f"Erro ao processar arquivo de teste: {e}")
-        return pd.DataFrame()
+        return None, pd.DataFrame()
 
-def treinar_modelo(dados_treino):
+def treinar_modelo(dados_treino, params=PARAMS_MODELO):
     """
-    Aplica normalização, redução de dimensionalidade (PCA) e treina o modelo DBSCAN.
+    Aplica normalização, redução de dimensionalidade (PCA) e treina o modelo de agrupamento
+    (DBSCAN exato por padrão).
+
+    Parâmetros:
+        dados_treino (DataFrame): Dados de treino já filtrados.
+        params (dict): Hiperparâmetros (n_components, eps, min_samples, motor).
 
     Retorna:
         scaler (StandardScaler): Normalizador treinado.
         pca (PCA): Redutor de dimensionalidade treinado.
-        dbscan (DBSCAN): Modelo de clustering treinado.
+        modelo: Modelo de clustering treinado, com `indice_nucleos_` para predição.
     """
-    scaler = StandardScaler()
-    dados_norm = scaler.fit_transform(dados_treino)
+    with etapa("Treino: normalização"):
+        scaler = StandardScaler()
+        dados_norm = scaler.fit_transform(dados_treino)
+
+    with etapa("Treino: PCA"):
+        pca = PCA(n_components=params["n_components"])  # Reduz para duas dimensões para visualização
+        dados_pca = pca.fit_transform(dados_norm)
+
+    motor = params.get("motor", "dbscan")
+    with etapa(f"Treino: {motor}"):
+        modelo, _ = treinar_agrupamento(dados_pca, params)
 
-    pca = PCA(n_components=2)  # Reduz para duas dimensões para visualização
-    dados_pca = pca.fit_transform(dados_norm)
+    logger.info(f"Modelo de agrupamento ({motor}) treinado com sucesso.")
+    return scaler, pca, modelo
+
+def construir_indice_nucleos(modelo):
+    """
+    Monta uma KD-tree sobre as amostras núcleo do DBSCAN treinado.
 
-    dbscan = DBSCAN(eps=0.6, min_samples=30)  # Parâmetros podem ser ajustados depois
-    dbscan.fit(dados_pca)
+    Retorna:
+        tuple: (arvore (KDTree), rotulos (np.array) do cluster de cada núcleo, raio `eps`).
+    """
+    rotulos = modelo.labels_[modelo.core_sample_indices_]
+    return KDTree(modelo.components_), rotulos, modelo.eps
 
-    logger.info("Modelo DBSCAN treinado com sucesso.")
-    return scaler, pca, dbscan
+def prever_clusters(modelo, dados_pca):
+    """
+    Atribui cada ponto ao cluster do núcleo treinado mais próximo, desde que
+    esteja dentro do raio de atribuição (`eps` no DBSCAN; por referência em
+    outros motores); caso contrário o ponto é ruído (-1).
+    Não altera o modelo treinado e custa O(n log m) para m núcleos.
+
+    Retorna:
+        clusters (np.array): Rótulos compatíveis com os clusters do treino.
+    """
+    indice = getattr(modelo, "indice_nucleos_", None)
+    if indice is None:
+        # Modelos salvos antes do índice existir
+        indice = modelo.indice_nucleos_ = construir_indice_nucleos(modelo)
+    if len(indice) == 2:
+        # Índices antigos guardavam apenas (árvore, rótulos) e usavam o eps do DBSCAN
+        indice = (*indice, modelo.eps)
+    arvore, rotulos, raio = indice
+
+    if len(rotulos) == 0 or len(dados_pca) == 0:
+        return np.full(len(dados_pca), -1, dtype=int)
+
+    distancias, indices = arvore.query(dados_pca, k=1)
+    raio = np.asarray(raio)[indices[:, 0]] if np.ndim(raio) else raio
+    return np.where(distancias[:, 0] <= raio, rotulos[indices[:, 0]], -1)
+
+def carregar_ou_treinar_modelo(pasta_treino, colunas, params=PARAMS_MODELO):
+    """
+    Devolve o pipeline treinado a partir do cache (memória ou disco) e só
+    treina novamente quando a assinatura do treino muda; com TREINO_INCREMENTAL,
+    arquivos novos são acrescentados ao último modelo sem retreino completo.
+
+    Retorna:
+        tuple: (scaler, pca, dbscan) ou None se não houver dados de treino válidos.
+    """
+    assinatura = calcular_assinatura_treino(pasta_treino, colunas, params)
+    if assinatura in _modelos_em_memoria:
+        return _modelos_em_memoria[assinatura]
+
+    with _trava_treino:
+        if assinatura in _modelos_em_memoria:
+            return _modelos_em_memoria[assinatura]
+
+        caminho = os.path.join(PASTA_CACHE_MODELOS, f"{assinatura}.joblib")
+        pipeline = _ler_cache_modelo(caminho)
+        if pipeline is None and TREINO_INCREMENTAL:
+            # O estado incremental é atualizado por um processo de cada vez (ver utils.treino_incremental)
+            pipeline = treinar_ou_atualizar(pasta_treino, colunas, params, treinar_modelo,
+                                            preparar=lambda dados: preparar_pontos(dados, params))
+        elif pipeline is None:
+            # Um processo treina por vez; quem esperou a trava encontra o modelo já salvo
+            with trava_arquivo(caminho):
+                pipeline = _ler_cache_modelo(caminho)
+                if pipeline is None:
+                    dados_treino = carregar_pontos_treino(pasta_treino, colunas, params)
+                    if dados_treino.empty:
+                        return None
+                    pipeline = treinar_modelo(dados_treino, params)
+                    # Escrita atômica: outros processos nunca leem um arquivo pela metade
+                    os.makedirs(PASTA_CACHE_MODELOS, exist_ok=True)
+                    salvar_atomico(caminho, lambda f: joblib.dump(pipeline, f))
+                    logger.info(f"Modelo salvo no cache: {caminho}")
+        if pipeline is None:
+            return None
+
+        _modelos_em_memoria[assinatura] = pipeline
+        return pipeline
+
+def _ler_cache_modelo(caminho):
+    # Pipeline salvo com a assinatura do treino, ou None se não houver (ou estiver inválido)
+    if not os.path.exists(caminho):
+        return None
+    try:
+        pipeline = joblib.load(caminho)
+        logger.info(f"Modelo carregado do cache: {caminho}")
+        return pipeline
+    except Exception as e:
+        logger.warning(f"Cache de modelo inválido em {caminho}, treinando novamente: {e}")
+        return None
 
 def aplicar_modelo(dados_teste, scaler, pca, modelo):
     """
-    Aplica o pipeline de transformação e faz predição no conjunto de teste.
+    Aplica o pipeline de transformação e faz predição no conjunto de teste,
+    reaproveitando os clusters aprendidos no treino (sem novo ajuste do DBSCAN).
 
     Retorna:
         dados_pca (np.array): Dados reduzidos em 2D (PCA).
         clusters (np.array): Rótulos de cluster atribuídos aos dados de teste.
     """
-    dados_norm = scaler.transform(dados_teste)
-    dados_pca = pca.transform(dados_norm)
-    clusters = modelo.fit_predict(dados_pca)
+    with etapa("Normalização"):
+        dados_norm = scaler.transform(dados_teste)
+    with etapa("PCA"):
+        dados_pca = pca.transform(dados_norm)
+    with etapa("Atribuição de clusters"):
+        clusters = prever_clusters(modelo, dados_pca)
 
     logger.info("Modelo DBSCAN aplicado ao conjunto de teste.")
     return dados_pca, clusters
 
 
+def embedding_arquivo(caminho, pipeline, colunas=None, params=PARAMS_MODELO):
+    """
+    Embedding de similaridade de um CSV de sessão (ver utils.similaridade).
+
+    Retorna:
+        (embedding, sha256) ou None se o arquivo não tiver dados válidos.
+    """
+    colunas = colunas or COLUNAS_MODELO
+    dados = processar_csv_teste(caminho, colunas)
+    pontos = preparar_pontos(dados, params) if not dados.empty else pd.DataFrame()
+    if pontos.empty:
+        return None
+    scaler, pca, modelo = pipeline
+    clusters = prever_clusters(modelo, pca.transform(scaler.transform(pontos)))
+    return embedding_sessao(dados, clusters, rotulos_modelo(modelo)), hash_arquivo(caminho)
+
+def _indice_similaridade(chave):
+    # Chamado com _trava_similaridade: a cópia em memória é relida se outro processo gravou o índice
+    indice = _indices_similaridade.get(chave)
+    if indice is None:
+        indice = _indices_similaridade[chave] = IndiceSimilaridade.carregar(chave)
+    else:
+        indice.recarregar()
+    return indice
+
+def sincronizar_indice_similaridade(pasta_treino, colunas=None, params=PARAMS_MODELO):
+    """
+    Indexa os CSVs novos ou alterados de treino/ e do histórico. Roda fora das
+    análises (no aquecimento e em segundo plano no pool de utils.jobs), para que a
+    busca de uma sessão enviada só consulte o índice.
+
+    Retorna:
+        int: Sessões acrescentadas ou atualizadas no índice.
+    """
+    colunas = colunas or COLUNAS_MODELO
+    pipeline = carregar_ou_treinar_modelo(pasta_treino, colunas, params)
+    if pipeline is None:
+        return 0
+    with _trava_similaridade:
+        indice = _indice_similaridade(chave_modelo(*pipeline))
+        return indice.sincronizar([pasta_treino, PASTA_HISTORICO],
+                                  lambda caminho: embedding_arquivo(caminho, pipeline, colunas, params))
+
+def buscar_sessoes_semelhantes(embedding, sha256, nome, pipeline, k=K_SEMELHANTES):
+    """
+    Busca as sessões mais parecidas já indexadas (ver `sincronizar_indice_similaridade`)
+    e acrescenta a sessão consultada ao índice, para as próximas buscas.
+
+    Retorna:
+        DataFrame (Sessão, Origem, Distância), da mais próxima à mais distante.
+    """
+    with _trava_similaridade:
+        indice = _indice_similaridade(chave_modelo(*pipeline))
+        with etapa("Busca de sessões semelhantes"):
+            semelhantes = indice.buscar(embedding, k, excluir=sha256)
+        if sha256 not in indice:
+            indice.adicionar(embedding, nome, sha256, "envio")
+            indice.salvar()
+
+    return pd.DataFrame({
+        "Sessão": [s["nome"] for s in semelhantes],
+        "Origem": [s["origem"] for s in semelhantes],
+        "Distância": [s["distancia"] for s in semelhantes],
+    })
+
+def indice_ponto_por_frame(n_frames, params=PARAMS_MODELO):
+    """
+    Retorna:
+        np.array: Para cada frame, o índice do ponto (frame ou janela) que o contém.
+        Frames finais que não completam uma janela ficam com a última janela.
+    """
+    janela = params.get("janela_frames")
+    if not janela:
+        return np.arange(n_frames)
+    return np.minimum(np.arange(n_frames) // janela, max(n_frames // janela - 1, 0))
+
+def rotulos_por_frame(clusters, n_frames, params=PARAMS_MODELO):
+    """
+    Expande os rótulos dos pontos (janelas) para os frames da sessão.
+    """
+    return np.asarray(clusters)[indice_ponto_por_frame(n_frames, params)]
+
+def angulos_dos_pontos(pontos, colunas):
+    # No modo por janelas, a média de cada ângulo representa a janela nos gráficos
+    if all(coluna in pontos.columns for coluna in colunas):
+        return pontos[colunas]
+    return pontos[[f'{coluna}_media' for coluna in colunas]].set_axis(colunas, axis=1)
+
 def gerar_graficos_interpretaveis(dados_teste, dados_pca, clusters):
     """
     Gera visualizações interpretáveis para profissionais da saúde:
@@ -146,30 +390,66 @@ def gerar_graficos_interpretaveis(dados_teste, dados_pca, clusters):
     return fig_pca, fig_barras, medias
 
 
-def identificar_outliers(dados_teste, clusters):
+def identificar_outliers(dados_teste, clusters, frames_por_seg=None):
     """
-    Identifica os pontos classificados como -1 pelo DBSCAN e 
-    destaca quais articulações mais se desviam da média (procura por compensações).
+    Identifica os pontos classificados como -1 pelo DBSCAN, agrupa frames consecutivos
+    em episódios e destaca as articulações que mais se desviam da média (procura por compensações).
+    O desvio de cada articulação é medido em z-score para que todas fiquem na mesma escala.
+
+    Parâmetros:
+        dados_teste (DataFrame): Dados do teste (índice = número do frame no arquivo).
+        clusters (np.array): Rótulos dos clusters.
+        frames_por_seg (float): Taxa de quadros, para expressar os episódios em segundos.
 
     Retorna:
-        outliers (DataFrame): Apenas os pontos fora do padrão.
-        explicacoes (list): Lista de mensagens com articulações mais impactadas.
+        episodios (DataFrame): Um registro por episódio fora do padrão (início, fim, frames, articulações).
+        explicacoes (list): Lista de mensagens com articulações mais impactadas em cada episódio.
     """
-    outliers = dados_teste[clusters == -1]
-    if outliers.empty:
-        return outliers, []
+    fora = np.asarray(clusters) == -1
+    colunas = np.asarray(dados_teste.columns)
+    if not fora.any():
+        return pd.DataFrame(columns=['inicio', 'fim', 'quadros', 'tempo_inicio', 'tempo_fim', 'articulacoes']), []
+
+    valores = dados_teste.to_numpy(dtype=np.float64)
+    desvio = valores.std(axis=0)
+    desvio[desvio == 0] = 1.0
+    z = np.abs((valores[fora] - valores.mean(axis=0)) / desvio)
+
+    # Episódios: sequências de frames consecutivos fora do padrão
+    frames = dados_teste.index.to_numpy()[fora]
+    inicios = np.r_[0, np.flatnonzero(np.diff(frames) != 1) + 1]
+    fins = np.r_[inicios[1:], len(frames)] - 1
+    quadros = fins - inicios + 1
+
+    # Desvio médio por articulação em cada episódio e as 2 maiores, sem ordenação completa
+    z_medio = np.add.reduceat(z, inicios, axis=0) / quadros[:, np.newaxis]
+    n_top = min(2, len(colunas))
+    top = np.argpartition(-z_medio, n_top - 1, axis=1)[:, :n_top]
+    top = np.take_along_axis(top, np.argsort(-np.take_along_axis(z_medio, top, axis=1), axis=1), axis=1)
+    articulacoes = [', '.join(nomes) for nomes in colunas[top]]
+
+    escala = frames_por_seg if frames_por_seg else np.nan
+    episodios = pd.DataFrame({
+        'inicio': frames[inicios],
+        'fim': frames[fins],
+        'quadros': quadros,
+        'tempo_inicio': frames[inicios] / escala,
+        'tempo_fim': (frames[fins] + 1) / escala,
+        'articulacoes': articulacoes,
+    })
 
-    medias = dados_teste.mean()
     explicacoes = []
+    for episodio in episodios.itertuples(index=False):
+        if frames_por_seg:
+            trecho = f"{episodio.tempo_inicio:.1f}s–{episodio.tempo_fim:.1f}s"
+        elif episodio.quadros == 1:
+            trecho = f"frame {episodio.inicio}"
+        else:
+            trecho = f"frames {episodio.inicio}–{episodio.fim}"
+        quadros = f"{episodio.quadros} frame" + ("s" if episodio.quadros != 1 else "")
+        explicacoes.append(f"{trecho} ({quadros}): variações fora do esperado em {episodio.articulacoes}")
 
-    for i, linha in outliers.iterrows():
-        # Calcula diferença absoluta em relação à média
-        diferencas = (linha - medias).abs()
-        # Seleciona as 2 maiores variações
-        top_variaveis = diferencas.sort_values(ascending=False).head(2).index.tolist()
-        explicacoes.append(f"Registro {i}: variações fora do esperado em {', '.join(top_variaveis)}")
-
-    return outliers, explicacoes
+    return episodios, explicacoes
 
 
 def processar_e_plotar(arquivo_teste, pasta_treino):
@@ -187,32 +467,51 @@ def processar_e_plotar(arquivo_teste, pasta_treino):
         interpretacao (str): Mensagem simples para o profissional.
         tabela_resumo (DataFrame): Médias por cluster.
         explicacoes_outliers (list): Explicações sobre os outliers detectados.
+        semelhantes (DataFrame): Sessões históricas mais parecidas.
     """
-    colunas_modelo = [
-        'shoulderLangle', 'shoulderRangle',
-        'elbowLangle', 'elbowRangle',
-        'hipLangle', 'hipRangle',
-        'kneeLangle', 'kneeRangle'
-    ]
+    colunas_modelo = COLUNAS_MODELO
 
-    dados_treino = carregar_dados_treino(pasta_treino, colunas_modelo)
-    if dados_treino.empty:
+    with etapa("Carregamento do modelo"):
+        pipeline = carregar_ou_treinar_modelo(pasta_treino, colunas_modelo)
+    if pipeline is None:
         logger.warning("Nenhum dado de treino válido encontrado.")
-        return None, None, "⚠️ Nenhum dado de treino válido encontrado.", None, []
+        return None, None, "⚠️ Nenhum dado de treino válido encontrado.", None, [], None
 
-    dados_teste = processar_csv_teste(arquivo_teste, colunas_modelo)
+    with etapa("Leitura do CSV"):
+        sessao_teste, dados_teste = ler_sessao_teste(arquivo_teste, colunas_modelo)
     if dados_teste.empty:
         logger.warning("Dados de teste inválidos ou vazios.")
-        return None, None, "⚠️ Arquivo de teste inválido ou com dados ausentes.", None, []
-
-    scaler, pca, modelo = treinar_modelo(dados_treino)
-    dados_pca_teste, clusters_teste = aplicar_modelo(dados_teste, scaler, pca, modelo)
-
-    # Gerar visualização interpretável
-    fig_pca, fig_barras, tabela_resumo = gerar_graficos_interpretaveis(dados_teste, dados_pca_teste, clusters_teste)
-
-    # Identificar outliers (-1) e explicar
-    outliers, explicacoes_outliers = identificar_outliers(dados_teste, clusters_teste)
+        return None, None, "⚠️ Arquivo de teste inválido ou com dados ausentes.", None, [], None
+
+    pontos_teste = preparar_pontos(dados_teste)
+    if pontos_teste.empty:
+        logger.warning("Sessão de teste mais curta que uma janela de movimento.")
+        return None, None, "⚠️ Sessão curta demais para a análise por janelas.", None, [], None
+
+    scaler, pca, modelo = pipeline
+    dados_pca_teste, clusters_teste = aplicar_modelo(pontos_teste, scaler, pca, modelo)
+    clusters_frames = rotulos_por_frame(clusters_teste, len(dados_teste))
+
+    # Registra o resumo e os clusters da sessão para as consultas de coorte
+    nome_teste = os.path.basename(getattr(arquivo_teste, 'name', str(arquivo_teste)))
+    sha256_teste = hash_conteudo(arquivo_teste)
+    with etapa("Índice de sessões"):
+        indexar_sessao(sessao_teste, nome_teste, sha256_teste, clusters_frames)
+
+    # Gerar visualização interpretável (no modo por janelas, com a média dos ângulos de cada janela)
+    with etapa("Construção dos gráficos"):
+        angulos_pontos = angulos_dos_pontos(pontos_teste, colunas_modelo)
+        fig_pca, fig_barras, tabela_resumo = gerar_graficos_interpretaveis(angulos_pontos, dados_pca_teste, clusters_teste)
+
+    # Identificar outliers (-1) e explicar, sempre em frames
+    with etapa("Explicação dos outliers"):
+        _, explicacoes_outliers = identificar_outliers(dados_teste, clusters_frames,
+                                                       dados_teste.attrs.get('frames_por_seg'))
+
+    # Sessões históricas mais parecidas (embedding de tamanho fixo, sem comparar frames)
+    with etapa("Sessões semelhantes"):
+        embedding = embedding_sessao(dados_teste, clusters_teste, rotulos_modelo(modelo))
+        semelhantes = buscar_sessoes_semelhantes(embedding, sha256_teste, nome_teste, pipeline)
 
     interpretacao = (
         "🔴 Foram detectados padrões de movimento incomuns (possíveis compensações)."
@@ -220,7 +519,7 @@ def processar_e_plotar(arquivo_teste, pasta_treino):
         "🟢 Todos os padrões de movimento estão dentro da normalidade esperada."
     )
 
-    return (fig_pca, fig_barras), clusters_teste, interpretacao, tabela_resumo, explicacoes_outliers
+    return (fig_pca, fig_barras), clusters_teste, interpretacao, tabela_resumo, explicacoes_outliers, semelhantes
 
 
 '''
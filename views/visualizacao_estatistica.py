@@ -2,33 +2,216 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-from utils.processamento import calcular_frames_por_segundo, calcular_tempos_picos, classificar, plot_intervalos_picos
+from utils.processamento import (eixo_tempo, reamostrar_uniforme, calcular_tempos_picos, classificar, plot_intervalos_picos,
+                                  varrer_limiares, sugerir_limiar, ARTICULACOES, limiares_relativos,
+                                  segmentar_movimentos, resumir_movimentos, indice_assimetria)
+from utils.sessao import Sessao
+from utils.decimacao import criar_serie
+from utils.instrumentacao import etapa
+from utils.streaming import MonitorSessao
+from utils.alinhamento import alinhar_movimentos
+from utils.indice_sessoes import indexar_sessao, sessao_registrada
+from utils.base_treino import hash_conteudo
+
+NOMES_ARTICULACOES = {'shoulder': 'Ombro', 'elbow': 'Cotovelo', 'hip': 'Quadril', 'knee': 'Joelho'}
+
+# Segundos iniciais ignorados na detecção de picos de cada sessão
+TEMPO_INICIAL_INICIO = 5
+TEMPO_INICIAL_FINAL = 2
+LIMIARES_VARREDURA = np.arange(0.0, 181.0, 1.0)
+
+# Modo ao vivo: intervalo de atualização (s) e limiar padrão dos ombros (graus)
+INTERVALO_AO_VIVO = 1.0
+LIMIAR_AO_VIVO = 35.0
+
+# Sessões e derivados mantidos entre reruns (cache LRU indexado pelo conteúdo do upload)
+MAX_SESSOES_EM_CACHE = 8
+
+def _reamostrar_sessao(sessao, fps):
+    # Ângulos interpolados em grade uniforme a partir do instante real de cada frame
+    _, valores = reamostrar_uniforme(eixo_tempo(sessao.tempo, fps), sessao.quadro(ARTICULACOES).to_numpy(), fps)
+    return pd.DataFrame(valores, columns=ARTICULACOES)
+
+def _chave_upload(arquivo):
+    # Hash do conteúdo, calculado uma única vez por arquivo enviado
+    hashes = st.session_state.setdefault("hashes_uploads", {})
+    if arquivo.file_id not in hashes:
+        hashes[arquivo.file_id] = hash_conteudo(arquivo)
+    return hashes[arquivo.file_id]
+
+def _indexar_upload(arquivo, sessao):
+    # Resumo da sessão no índice de coorte, uma única vez por arquivo enviado
+    indexados = st.session_state.setdefault("uploads_indexados", set())
+    if arquivo.file_id in indexados:
+        return
+    sha256 = _chave_upload(arquivo)
+    if not sessao_registrada(sha256):
+        with etapa("Índice de sessões"):
+            indexar_sessao(sessao, arquivo.name, sha256)
+    indexados.add(arquivo.file_id)
+
+@st.cache_data(max_entries=MAX_SESSOES_EM_CACHE, show_spinner=False)
+def _ler_sessao(chave, _arquivo):
+    with etapa("Leitura do CSV"):
+        return Sessao.de_csv(_arquivo, ARTICULACOES)
+
+@st.cache_data(max_entries=MAX_SESSOES_EM_CACHE, show_spinner=False)
+def _ler_sessao_reamostrada(chave, _sessao, fps):
+    return _reamostrar_sessao(_sessao, fps)
+
+@st.cache_data(max_entries=4 * MAX_SESSOES_EM_CACHE, show_spinner=False)
+def _varrer_limiares(chave, reamostrada, coluna, fps, tempo_inicial, _dados):
+    with etapa("Varredura de limiares"):
+        return varrer_limiares(_dados, fps, LIMIARES_VARREDURA, tempo_inicial)
+
+@st.cache_data(max_entries=4 * MAX_SESSOES_EM_CACHE, show_spinner=False)
+def _resumir_articulacoes(chave, reamostrada, fps, tempo_inicial, fracao, histerese, _df):
+    with etapa("Segmentação das articulações"):
+        angulos = _df[ARTICULACOES].to_numpy()
+        limiar_alto, limiar_baixo = limiares_relativos(angulos, fracao, histerese)
+        return resumir_movimentos(segmentar_movimentos(angulos, fps, limiar_alto, limiar_baixo, tempo_inicial))
+
+@st.cache_data(max_entries=MAX_SESSOES_EM_CACHE, show_spinner=False)
+def _figura_visao_geral(chave, reamostrada, resolucao_total, _inicio):
+    frames_inicio = np.arange(len(_inicio))
+    fig_amp = go.Figure()
+    fig_amp.add_trace(criar_serie(
+        frames_inicio,
+        _inicio['shoulderLangle'],
+        resolucao_total=resolucao_total,
+        mode='lines',
+        name='Ombro Esquerdo - Início',
+        line=dict(color='blue')
+    ))
+    fig_amp.add_trace(criar_serie(
+        frames_inicio,
+        _inicio['shoulderRangle'],
+        resolucao_total=resolucao_total,
+        mode='lines',
+        name='Ombro Direito - Início',
+        line=dict(color='orange')
+    ))
+    fig_amp.update_layout(
+        title="Movimento no Início do Tratamento",
+        xaxis_title="Frames",
+        yaxis_title="Amplitude (graus)",
+        legend=dict(x=0.01, y=0.99),
+        height=400
+    )
+    return fig_amp
+
+@st.fragment(run_every=INTERVALO_AO_VIVO)
+def _painel_ao_vivo():
+    # Reexecuta só este trecho a cada intervalo, lendo apenas os frames novos
+    monitor = st.session_state.get("monitor_ao_vivo")
+    if monitor is None:
+        return
+    try:
+        monitor.atualizar()
+    except (OSError, ValueError) as e:
+        st.error(f"Erro ao ler a sessão ao vivo: {e}")
+        return
+
+    janela = monitor.janela_recente()
+    st.caption(f"🎞️ {monitor.frames} frames recebidos — {monitor.estimador_fps.fps:.0f} FPS")
+    if janela.empty:
+        st.info("Aguardando frames...")
+        return
 
-def carregar():
+    fig_vivo = go.Figure()
+    for coluna, nome, cor in (('shoulderLangle', 'Ombro Esquerdo', 'blue'), ('shoulderRangle', 'Ombro Direito', 'orange')):
+        fig_vivo.add_trace(criar_serie(janela['segundos'], janela[coluna], mode='lines', name=nome, line=dict(color=cor)))
+    limiar = next(iter(monitor.detectores.values())).limiar
+    fig_vivo.add_hline(y=limiar, line_dash='dash', line_color='red')
+    fig_vivo.update_layout(title="Últimos frames recebidos", xaxis_title="Tempo (s)",
+                           yaxis_title="Amplitude (graus)", height=350)
+    st.plotly_chart(fig_vivo, use_container_width=True)
+
+    colunas = st.columns(len(monitor.detectores))
+    for coluna_st, (coluna, detector) in zip(colunas, monitor.detectores.items()):
+        with coluna_st:
+            st.markdown(f"**{'Ombro Esquerdo' if coluna == 'shoulderLangle' else 'Ombro Direito'}**")
+            st.metric("Movimentos", detector.quantidade)
+            st.metric("Duração média (s)", round(detector.media_duracao, 2))
+            st.caption(" | ".join(f"{nivel}: {qtd}" for nivel, qtd in detector.niveis.items()))
+            if detector.recentes:
+                st.dataframe(pd.DataFrame(list(detector.recentes)[-5:]).round(2), hide_index=True)
+
+def _sessao_ao_vivo():
+    with st.expander("📡 Sessão ao vivo"):
+        st.caption("Acompanha um CSV que ainda está sendo gravado pelo software de captura (ou um pipe nomeado).")
+        caminho = st.text_input("Caminho do arquivo em gravação", key="caminho_ao_vivo")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            limiar = st.number_input("Limiar (graus)", 0.0, 180.0, LIMIAR_AO_VIVO, key="limiar_ao_vivo")
+        with col2:
+            tempo_inicial = st.number_input("Segundos iniciais ignorados", 0.0, 60.0, float(TEMPO_INICIAL_FINAL),
+                                            key="tempo_inicial_ao_vivo")
+        with col3:
+            monitor = st.session_state.get("monitor_ao_vivo")
+            if monitor is None:
+                if st.button("▶️ Iniciar", disabled=not caminho):
+                    st.session_state.monitor_ao_vivo = MonitorSessao(caminho, ARTICULACOES, limiar, tempo_inicial)
+                    st.rerun()
+            elif st.button("⏹️ Parar"):
+                monitor.fechar()
+                del st.session_state.monitor_ao_vivo
+                st.rerun()
+
+        if st.session_state.get("monitor_ao_vivo") is not None:
+            _painel_ao_vivo()
+
+def carregar(inicio_file, final_file):
+    """
+    Parâmetros:
+        inicio_file, final_file: CSVs do início e do final enviados na barra lateral (ou None).
+    """
     st.title("📊 Dashboard de Análise de Movimento")
-    st.markdown("Envie os arquivos CSV do início e do final da reabilitação para visualizar os gráficos e análises.")
+    _sessao_ao_vivo()
 
-    col1, col2 = st.columns(2)
-    with col1:
-        inicio_file = st.file_uploader("📁 CSV do Início", type="csv", key="inicio")
-    with col2:
-        final_file = st.file_uploader("📁 CSV do Final", type="csv", key="final")
+    st.markdown("Envie os arquivos CSV do início e do final da reabilitação, na barra lateral, "
+                "para visualizar os gráficos e análises.")
 
     if not (inicio_file and final_file):
         st.info("Envie ambos os arquivos para iniciar a análise.")
         return
 
-    # Leitura dos dados
-    inicio_df = pd.read_csv(inicio_file)
-    final_df = pd.read_csv(final_file)
+    # Leitura dos dados (somente as colunas usadas, com tipos compactos), reaproveitada entre reruns
+    chave_inicio = _chave_upload(inicio_file)
+    chave_final = _chave_upload(final_file)
+    sessao_inicio, leitura_inicio = _ler_sessao(chave_inicio, inicio_file)
+    sessao_final, leitura_final = _ler_sessao(chave_final, final_file)
+    _indexar_upload(inicio_file, sessao_inicio)
+    _indexar_upload(final_file, sessao_final)
+    fps_info_inicio, fps_info_final = sessao_inicio.info_fps, sessao_final.info_fps
+    inicio_df, final_df = sessao_inicio.quadro(), sessao_final.quadro()
+
+    for nome, leitura in (("Início", leitura_inicio), ("Final", leitura_final)):
+        st.caption(
+            f"📥 {nome}: {leitura['linhas']} frames lidos em {leitura['tempo_leitura'] * 1000:.0f} ms "
+            f"({leitura['memoria_bytes'] / 1024:.0f} KiB em memória)"
+        )
+
+    # Taxa de quadros por segundo de captura e perdas de frames
+    fps_inicio = fps_info_inicio['fps_mediana']
+    fps_final = fps_info_final['fps_mediana']
+
+    for nome, info in (("Início", fps_info_inicio), ("Final", fps_info_final)):
+        st.caption(
+            f"🎞️ {nome}: {info['fps_mediana']:.0f} FPS (mediana), "
+            f"~{info['quadros_perdidos']} frames perdidos em {len(info['segundos_com_perda'])} segundos"
+        )
+
+    houve_perda = fps_info_inicio['quadros_perdidos'] > 0 or fps_info_final['quadros_perdidos'] > 0
+    reamostrada = st.checkbox("⏱️ Reamostrar em grade de tempo uniforme", value=houve_perda, key="reamostrar",
+                              help="Corrige as durações quando a captura oscila ou perde frames.")
+    if reamostrada:
+        inicio_df = _ler_sessao_reamostrada(chave_inicio, sessao_inicio, fps_inicio)
+        final_df = _ler_sessao_reamostrada(chave_final, sessao_final, fps_final)
 
     inicio = inicio_df[['shoulderLangle', 'shoulderRangle']]
     final = final_df[['shoulderLangle', 'shoulderRangle']]
 
-    # Cálculo do tempo total
-    fps_inicio = calcular_frames_por_segundo(inicio_df, 'time')
-    fps_final = calcular_frames_por_segundo(final_df, 'time')
-
     tempo_total_inicio = np.ceil(len(inicio_df) / fps_inicio)
     tempo_total_final = np.ceil(len(final_df) / fps_final)
 
@@ -39,29 +222,19 @@ def carregar():
     tempo_inicio = np.arange(len(inicio_df)) / fps_inicio
     tempo_final = np.arange(len(final_df)) / fps_final
 
+    # Resolução dos gráficos longos: reduzida por padrão, total sob demanda
+    duracao_maxima = float(max(tempo_inicio[-1], tempo_final[-1]))
+    with st.expander("🔍 Resolução dos gráficos"):
+        resolucao_total = st.checkbox("Exibir todos os frames (resolução total)", key="resolucao_total")
+        intervalo = st.slider("Intervalo exibido (s)", min_value=0.0, max_value=duracao_maxima,
+                              value=(0.0, duracao_maxima), key="intervalo_exibido")
+    if intervalo == (0.0, duracao_maxima):
+        intervalo = None
+
     # === Gráfico 1: Amplitude do movimento (início e final)
     st.markdown("### 📉 Visão geral do movimento (ambos os ombros)")
 
-    fig_amp = go.Figure()
-    fig_amp.add_trace(go.Scatter(
-        y=inicio['shoulderLangle'],
-        mode='lines',
-        name='Ombro Esquerdo - Início',
-        line=dict(color='blue')
-    ))
-    fig_amp.add_trace(go.Scatter(
-        y=inicio['shoulderRangle'],
-        mode='lines',
-        name='Ombro Direito - Início',
-        line=dict(color='orange')
-    ))
-    fig_amp.update_layout(
-        title="Movimento no Início do Tratamento",
-        xaxis_title="Frames",
-        yaxis_title="Amplitude (graus)",
-        legend=dict(x=0.01, y=0.99),
-        height=400
-    )
+    fig_amp = _figura_visao_geral(chave_inicio, reamostrada, resolucao_total, inicio)
     st.plotly_chart(fig_amp, use_container_width=True)
 
     # === Escolha do lado para análise detalhada
@@ -97,16 +270,20 @@ def carregar():
 
         # === Gráfico 2: Amplitude normalizada no tempo
         fig_norm = go.Figure()
-        fig_norm.add_trace(go.Scatter(
-            x=tempo_inicio,
-            y=inicio[coluna_inicio],
+        fig_norm.add_trace(criar_serie(
+            tempo_inicio,
+            inicio[coluna_inicio],
+            intervalo=intervalo,
+            resolucao_total=resolucao_total,
             mode='lines',
             name=f'Ombro {lado_escolhido} - Início',
             line=dict(color=cor_lado)
         ))
-        fig_norm.add_trace(go.Scatter(
-            x=tempo_final,
-            y=final[coluna_final],
+        fig_norm.add_trace(criar_serie(
+            tempo_final,
+            final[coluna_final],
+            intervalo=intervalo,
+            resolucao_total=resolucao_total,
             mode='lines',
             name=f'Ombro {lado_escolhido} - Final',
             line=dict(color='red')
@@ -130,6 +307,48 @@ def carregar():
             st.metric("Média - Final", round(final[coluna_final].mean(), 2))
             st.metric("Mediana - Final", round(final[coluna_final].median(), 2))
 
+        # === Sensibilidade da detecção ao limiar
+        varredura_i = _varrer_limiares(chave_inicio, reamostrada, coluna_inicio, fps_inicio, TEMPO_INICIAL_INICIO,
+                                       inicio[coluna_inicio])
+        varredura_f = _varrer_limiares(chave_final, reamostrada, coluna_final, fps_final, TEMPO_INICIAL_FINAL,
+                                       final[coluna_final])
+        sugestao_i = sugerir_limiar(varredura_i)
+        sugestao_f = sugerir_limiar(varredura_f)
+
+        with st.expander("📈 Sensibilidade ao limiar"):
+            fig_sens = go.Figure()
+            fig_sens.add_trace(go.Scatter(
+                x=varredura_i['limiares'],
+                y=varredura_i['quantidades'],
+                mode='lines',
+                name='Picos - Início',
+                line=dict(color=cor_lado)
+            ))
+            fig_sens.add_trace(go.Scatter(
+                x=varredura_f['limiares'],
+                y=varredura_f['quantidades'],
+                mode='lines',
+                name='Picos - Final',
+                line=dict(color='red')
+            ))
+            for sugestao, cor in ((sugestao_i, cor_lado), (sugestao_f, 'red')):
+                if sugestao is not None:
+                    fig_sens.add_vline(x=sugestao, line=dict(color=cor, dash='dot'))
+            fig_sens.update_layout(
+                title="Quantidade de Picos por Limiar",
+                xaxis_title="Limiar (graus)",
+                yaxis_title="Picos detectados",
+                legend=dict(x=0.70, y=0.99),
+                height=350
+            )
+            st.plotly_chart(fig_sens, use_container_width=True)
+
+            formatar = lambda valor: f"{valor:.0f}°" if valor is not None else "sem picos"
+            st.caption(
+                f"Limiar sugerido (maior faixa estável de detecção): Início **{formatar(sugestao_i)}**, "
+                f"Final **{formatar(sugestao_f)}**"
+            )
+
         # === Limiar definido pelo usuário
         st.markdown("### ⚙️ Definir Limiar para Análise de Picos")
         col1, col2 = st.columns(2)
@@ -145,8 +364,9 @@ def carregar():
         dados_f = final[coluna_final]
 
         # Cálculo dos picos
-        picos_i, duracoes_i, media_i = calcular_tempos_picos(dados_i, fps_inicio, limiar_i, 5)
-        picos_f, duracoes_f, media_f = calcular_tempos_picos(dados_f, fps_final, limiar_f, 2)
+        with etapa("Detecção de picos"):
+            picos_i, duracoes_i, media_i = calcular_tempos_picos(dados_i, fps_inicio, limiar_i, TEMPO_INICIAL_INICIO)
+            picos_f, duracoes_f, media_f = calcular_tempos_picos(dados_f, fps_final, limiar_f, TEMPO_INICIAL_FINAL)
 
         # Classificação com base nas durações
         classificacoes_i = classificar(duracoes_i)
@@ -157,8 +377,11 @@ def carregar():
         tempo_inicio = np.arange(len(dados_i)) / fps_inicio
         tempo_final = np.arange(len(dados_f)) / fps_final
 
-        fig_i = plot_intervalos_picos(tempo_inicio, dados_i, limiar_i, picos_i, "Movimento Esperado - Início")
-        fig_f = plot_intervalos_picos(tempo_final, dados_f, limiar_f, picos_f, "Movimento Esperado - Final")
+        with etapa("Construção dos gráficos de picos"):
+            fig_i = plot_intervalos_picos(tempo_inicio, dados_i, limiar_i, picos_i, "Movimento Esperado - Início",
+                                          intervalo=intervalo, resolucao_total=resolucao_total)
+            fig_f = plot_intervalos_picos(tempo_final, dados_f, limiar_f, picos_f, "Movimento Esperado - Final",
+                                          intervalo=intervalo, resolucao_total=resolucao_total)
 
         st.plotly_chart(fig_i, use_container_width=True)
         st.plotly_chart(fig_f, use_container_width=True)
@@ -209,6 +432,95 @@ def carregar():
             height=400
         )
         st.plotly_chart(fig_picos, use_container_width=True)
-    
+
+        # === Correspondência movimento a movimento (DTW com faixa de Sakoe-Chiba)
+        st.markdown("### 🔗 Correspondência entre Movimentos Iniciais e Finais")
+        with etapa("Alinhamento DTW"):
+            alinhamento = alinhar_movimentos(dados_i, picos_i, fps_inicio, dados_f, picos_f, fps_final)
+        pares = alinhamento['pares']
+
+        if pares.empty:
+            st.info("É preciso ao menos um movimento em cada sessão para o alinhamento.")
+        else:
+            st.caption(
+                "Cada movimento do início é pareado com o(s) movimento(s) mais parecido(s) do final, "
+                "respeitando a ordem em que ocorreram (DTW)."
+            )
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Δ Duração média", f"{pares['delta_duracao'].mean():+.2f} s")
+            col2.metric("Δ Amplitude média", f"{pares['delta_amplitude'].mean():+.1f}°")
+            col3.metric("Δ Velocidade média", f"{pares['delta_velocidade'].mean():+.1f}°/s")
+
+            escala = max(pares['amplitude_a'].max(), pares['amplitude_b'].max()) or 1.0
+            fig_pares = go.Figure()
+            for _, par in pares.iterrows():
+                fig_pares.add_trace(go.Scatter(
+                    x=[par['tempo_a'], par['tempo_b']], y=[0, 1], mode='lines',
+                    line=dict(color='gray', width=1), showlegend=False, hoverinfo='skip'
+                ))
+            fig_pares.add_trace(go.Scatter(
+                x=pares['tempo_a'], y=np.zeros(len(pares)), mode='markers', name='Início',
+                marker=dict(color=cor_lado, size=pares['amplitude_a'] / escala * 14 + 4)
+            ))
+            fig_pares.add_trace(go.Scatter(
+                x=pares['tempo_b'], y=np.ones(len(pares)), mode='markers', name='Final',
+                marker=dict(color='red', size=pares['amplitude_b'] / escala * 14 + 4)
+            ))
+            fig_pares.update_layout(
+                title="Movimentos Correspondentes (tamanho proporcional à amplitude)",
+                xaxis_title="Tempo (s)",
+                yaxis=dict(tickvals=[0, 1], ticktext=['Início', 'Final']),
+                height=300
+            )
+            st.plotly_chart(fig_pares, use_container_width=True)
+
+            tabela_pares = pares[['movimento_a', 'movimento_b', 'duracao_a', 'duracao_b', 'delta_duracao',
+                                  'amplitude_a', 'amplitude_b', 'delta_amplitude',
+                                  'velocidade_a', 'velocidade_b', 'delta_velocidade']].rename(columns={
+                'movimento_a': 'Mov. Início', 'movimento_b': 'Mov. Final',
+                'duracao_a': 'Duração Início (s)', 'duracao_b': 'Duração Final (s)', 'delta_duracao': 'Δ Duração (s)',
+                'amplitude_a': 'Amplitude Início (°)', 'amplitude_b': 'Amplitude Final (°)',
+                'delta_amplitude': 'Δ Amplitude (°)',
+                'velocidade_a': 'Velocidade Início (°/s)', 'velocidade_b': 'Velocidade Final (°/s)',
+                'delta_velocidade': 'Δ Velocidade (°/s)',
+            })
+            tabela_pares[['Mov. Início', 'Mov. Final']] += 1
+            colunas_numericas = tabela_pares.columns[2:]
+            st.dataframe(tabela_pares.style.format({col: "{:.2f}" for col in colunas_numericas}), hide_index=True)
+
     else:
         st.warning("Selecione o lado para continuar a análise detalhada.")
+
+    # === Segmentação conjunta de todas as articulações
+    st.markdown("### 🧍 Assimetria entre Articulações")
+    st.caption("Movimentos segmentados com limiar de histerese relativo à faixa de cada articulação.")
+    col1, col2 = st.columns(2)
+    with col1:
+        fracao = st.slider("Limiar (% da faixa de movimento)", min_value=10, max_value=90, value=50, step=5) / 100
+    with col2:
+        histerese = st.slider("Histerese (% da faixa)", min_value=0, max_value=30, value=10, step=5) / 100
+
+    linhas = []
+    for nome, chave, df, fps, tempo_inicial in (
+            ("Início", chave_inicio, inicio_df, fps_inicio, TEMPO_INICIAL_INICIO),
+            ("Final", chave_final, final_df, fps_final, TEMPO_INICIAL_FINAL)):
+        resumo = _resumir_articulacoes(chave, reamostrada, fps, tempo_inicial, fracao, histerese, df)
+
+        for prefixo, articulacao in NOMES_ARTICULACOES.items():
+            esquerdo, direito = resumo[f'{prefixo}Langle'], resumo[f'{prefixo}Rangle']
+            linhas.append({
+                'Sessão': nome,
+                'Articulação': articulacao,
+                'Movimentos (E/D)': f"{esquerdo['quantidade']} / {direito['quantidade']}",
+                'Duração média E (s)': esquerdo['duracao_media'],
+                'Duração média D (s)': direito['duracao_media'],
+                'Níveis E (1/2/3)': '/'.join(str(n) for n in esquerdo['niveis'].values()),
+                'Níveis D (1/2/3)': '/'.join(str(n) for n in direito['niveis'].values()),
+                'Assimetria (quantidade)': indice_assimetria(esquerdo['quantidade'], direito['quantidade']),
+                'Assimetria (duração)': indice_assimetria(esquerdo['duracao_media'], direito['duracao_media']),
+            })
+
+    tabela_assimetria = pd.DataFrame(linhas)
+    colunas_numericas = tabela_assimetria.select_dtypes(include=['float', 'int']).columns
+    st.dataframe(tabela_assimetria.style.format({col: "{:.2f}" for col in colunas_numericas}))
+    st.caption("Assimetria = (E − D) / (E + D): valores positivos indicam predomínio do lado esquerdo.")